@@ -0,0 +1,104 @@
+"""
+One-vs-many AI comparisons.
+
+`POST /ai/compare/batch` compares one anchor organization with many peers.
+Responses for the anchor and every peer are read in a single query, then
+the comparisons run concurrently on a bounded worker pool. Model calls go
+through the shared rate limiter and retry policy (see ai_client), and each
+pair still goes through the comparison cache.
+
+Results stream back as newline-delimited JSON, one line per peer in the
+order they finish, so a slow peer does not hold up the others.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+import ai_compare
+import crud
+import schemas
+import serialization
+from database import ReadSessionLocal
+
+router = APIRouter()
+
+AI_BATCH_CONCURRENCY = int(os.getenv("AI_BATCH_CONCURRENCY", "4"))
+AI_BATCH_MAX_PEERS = int(os.getenv("AI_BATCH_MAX_PEERS", "50"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=AI_BATCH_CONCURRENCY, thread_name_prefix="ai-batch")
+        return _executor
+
+
+def _compare_peer(anchor, peer, packed: dict, batch: schemas.AiCompareBatchCreate) -> dict:
+    started = time.perf_counter()
+    line = {"peer_id": peer.id}
+    try:
+        result, hit = ai_compare.compare_loaded(
+            anchor, peer, packed[anchor.id], packed[peer.id], batch.clause_id, batch.start_date, batch.end_date
+        )
+        line.update(status="done", cache="HIT" if hit else "MISS", result=result)
+    except Exception as e:
+        line.update(status="failed", error=str(e))
+    line["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return line
+
+
+def run_batch(anchor, peers, packed: dict, batch: schemas.AiCompareBatchCreate):
+    """Yield one encoded result line per peer as its comparison finishes"""
+    futures = [_get_executor().submit(_compare_peer, anchor, peer, packed, batch) for peer in peers]
+    try:
+        for future in as_completed(futures):
+            yield serialization.dumps(future.result()) + b"\n"
+    finally:
+        # Client went away: drop the comparisons that have not started yet
+        for future in futures:
+            future.cancel()
+
+
+@router.post("/ai/compare/batch")
+def ai_compare_batch(batch: schemas.AiCompareBatchCreate, db: Session = Depends(get_db)):
+    """Compare `anchor_id` with each of `peer_ids`.
+
+    Streams application/x-ndjson: one `{"peer_id", "status", ...}` object
+    per peer as it completes, with `result` and `cache` on success or
+    `error` on failure.
+    """
+    if batch.start_date and batch.end_date and batch.end_date < batch.start_date:
+        raise HTTPException(status_code=400, detail="end_date must be >= start_date")
+    peer_ids = list(dict.fromkeys(peer_id for peer_id in batch.peer_ids if peer_id != batch.anchor_id))
+    if not peer_ids:
+        raise HTTPException(status_code=400, detail="peer_ids must name at least one organization other than the anchor")
+    if len(peer_ids) > AI_BATCH_MAX_PEERS:
+        raise HTTPException(status_code=400, detail=f"At most {AI_BATCH_MAX_PEERS} peers per batch")
+    ai_compare.ensure_configured()
+
+    organizations = crud.reference_snapshot(db, "organizations").by_id
+    missing = [org_id for org_id in [batch.anchor_id] + peer_ids if org_id not in organizations]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Organizations not found: {missing}")
+
+    packed = ai_compare.load_responses(db, [batch.anchor_id] + peer_ids, batch.clause_id, batch.start_date, batch.end_date)
+    anchor = organizations[batch.anchor_id]
+    peers = [organizations[peer_id] for peer_id in peer_ids]
+    return StreamingResponse(run_batch(anchor, peers, packed, batch), media_type="application/x-ndjson")
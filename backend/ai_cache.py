@@ -0,0 +1,133 @@
+"""
+Result cache for AI comparisons.
+
+Two tiers: a process-local LRU in front of a SQLite file shared by every
+worker, both with a TTL. Concurrent requests for the same key are coalesced
+so only one of them calls the model; the others wait for its result.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+AI_CACHE_PATH = os.getenv("AI_CACHE_PATH", "./ai_cache.db")
+AI_CACHE_TTL = int(os.getenv("AI_CACHE_TTL", str(24 * 3600)))
+AI_CACHE_MEMORY_ENTRIES = int(os.getenv("AI_CACHE_MEMORY_ENTRIES", "256"))
+
+
+def make_key(**parts) -> str:
+    """Stable digest of the request inputs (ids, filters, model, data hash)"""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def fingerprint(data) -> str:
+    """Hash of the packed responses, so any data change misses the cache"""
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ComparisonCache:
+    def __init__(self, path: str = AI_CACHE_PATH, ttl: int = AI_CACHE_TTL, max_entries: int = AI_CACHE_MEMORY_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._db_ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._db_ready:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ai_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db_ready = True
+        return conn
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[1] > now:
+                self._memory.move_to_end(key)
+                return entry[0]
+            self._memory.pop(key, None)
+
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT value, expires_at FROM ai_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+        finally:
+            conn.close()
+        if not row:
+            return None
+        value = json.loads(row[0])
+        with self._lock:
+            self._remember(key, value, row[1])
+        return value
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ai_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at),
+                )
+                conn.execute("DELETE FROM ai_cache WHERE expires_at <= ?", (time.time(),))
+        finally:
+            conn.close()
+
+    def get_or_compute(self, key, compute):
+        """Return (value, hit). Identical concurrent misses share one `compute()` call."""
+        value = self.get(key)
+        if value is not None:
+            return value, True
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        if not leader:
+            return future.result(), True
+
+        try:
+            value = compute()
+            self.set(key, value)
+            future.set_result(value)
+            return value, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM ai_cache")
+        finally:
+            conn.close()
+
+
+comparison_cache = ComparisonCache()
@@ -0,0 +1,93 @@
+"""
+Rate limiting and retries shared by every AI model call in the process.
+
+All comparisons (single pairs, background jobs and batches) draw from one
+token bucket sized to the provider quota, so concurrent work slows down
+together instead of tripping 429s. A call that is still rate limited, or
+hits a transient server error, is retried with exponential backoff and
+jitter; a 429 also empties the bucket so the other callers back off too.
+"""
+import os
+import random
+import threading
+import time
+
+AI_RATE_LIMIT_PER_MINUTE = float(os.getenv("AI_RATE_LIMIT_PER_MINUTE", "60"))
+AI_RATE_LIMIT_BURST = int(os.getenv("AI_RATE_LIMIT_BURST", "5"))
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "4"))
+AI_BACKOFF_SECONDS = float(os.getenv("AI_BACKOFF_SECONDS", "1.0"))
+AI_BACKOFF_MAX_SECONDS = 30.0
+# HTTP statuses worth retrying; google.api_core exceptions carry theirs in `.code`
+RETRYABLE_CODES = {429, 500, 503, 504}
+
+
+class TokenBucket:
+    """`rate` acquisitions per second on average, bursts of up to `capacity`; rate <= 0 disables it"""
+
+    def __init__(self, rate: float, capacity: int, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self.capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a token is available and take it"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+    def drain(self):
+        """Spend whatever is left, e.g. after the provider answered 429"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+
+
+rate_limiter = TokenBucket(AI_RATE_LIMIT_PER_MINUTE / 60, AI_RATE_LIMIT_BURST)
+
+
+def is_retryable(error: Exception) -> bool:
+    try:
+        return int(getattr(error, "code", 0)) in RETRYABLE_CODES
+    except (TypeError, ValueError):
+        return False
+
+
+class RateLimitedModel:
+    """Wraps a model's `generate_content` in the shared rate limiter and retry policy"""
+
+    def __init__(self, model, bucket: TokenBucket = None, max_retries: int = None, sleep=time.sleep):
+        self.model = model
+        self.bucket = bucket or rate_limiter
+        self.max_retries = AI_MAX_RETRIES if max_retries is None else max_retries
+        self.retries = 0
+        self._sleep = sleep
+
+    def generate_content(self, prompt: str):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                return self.model.generate_content(prompt)
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                if int(e.code) == 429:
+                    self.bucket.drain()
+                self.retries += 1
+                delay = min(AI_BACKOFF_MAX_SECONDS, AI_BACKOFF_SECONDS * 2 ** attempt)
+                self._sleep(delay * random.uniform(0.5, 1.0))
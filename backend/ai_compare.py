@@ -1,121 +1,198 @@
 import os
+import threading
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi import Response as HTTPResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from database import SessionLocal
-from models import Organization, Response
+from database import ReadSessionLocal
+from models import Response
+import crud
 from datetime import date
 from typing import Optional
-import re
+from ai_cache import comparison_cache, make_key, fingerprint
+from ai_client import RateLimitedModel
+from ai_prompt import AI_PROMPT_TOKEN_BUDGET, LocalStubModel, run_comparison
 
 router = APIRouter()
 
-try:
-    import google.generativeai as genai
-except Exception:
-    genai = None
+# google.generativeai is slow to import and most workers never call it: load_genai() imports it on first use
+_UNLOADED = object()
+genai = _UNLOADED
+
+
+def load_genai():
+    """The google.generativeai module, or None when it is not installed"""
+    global genai
+    if genai is _UNLOADED:
+        try:
+            import google.generativeai as module
+        except Exception:
+            module = None
+        genai = module
+    return genai
 
 
 def get_db():
-    db = SessionLocal()
+    db = ReadSessionLocal()
     try:
         yield db
     finally:
         db.close()
 
 
-def _extract_json_block(text: str) -> Optional[str]:
-    if not text:
-        return None
-    fence = re.search(r"```(?:json)?\s*([\s\S]*?)\s*```", text, re.IGNORECASE)
-    if fence:
-        return fence.group(1)
-    stripped = text.strip()
-    if stripped.startswith("{") and stripped.endswith("}"):
-        return stripped
-    return None
-
-@router.get("/ai/compare")
-def ai_compare(
+MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+# GEMINI_MODEL=local-stub answers offline, without an API key
+LOCAL_STUB_MODEL = "local-stub"
+# Stub latency (seconds per call) and fraction of calls answered with a 429
+AI_STUB_LATENCY = float(os.getenv("AI_STUB_LATENCY", "0"))
+AI_STUB_429_RATE = float(os.getenv("AI_STUB_429_RATE", "0"))
+
+PACK_COLUMNS = (
+    Response.organization_id,
+    Response.clause_id,
+    Response.question_id,
+    Response.response_type,
+    Response.comment,
+    Response.date,
+)
+
+
+def pack(responses):
+    return [
+        {
+            "clause_id": r.clause_id,
+            "question_id": r.question_id,
+            "response_type": r.response_type.value if r.response_type else None,
+            "comment": r.comment,
+            "date": str(r.date),
+        }
+        for r in responses
+    ]
+
+
+def load_responses(
+    db: Session,
+    org_ids,
+    clause_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> dict:
+    """Packed responses for every organization in `org_ids`, read in one query"""
+    query = select(*PACK_COLUMNS).where(Response.organization_id.in_(org_ids)).order_by(Response.id)
+    if clause_id:
+        query = query.where(Response.clause_id == clause_id)
+    if start_date:
+        query = query.where(Response.date >= start_date)
+    if end_date:
+        query = query.where(Response.date <= end_date)
+    rows = {org_id: [] for org_id in org_ids}
+    for row in db.execute(query):
+        rows[row.organization_id].append(row)
+    return {org_id: pack(org_rows) for org_id, org_rows in rows.items()}
+
+
+# Built once and reused; rebuilt only if the module or model name changes (tests swap both)
+_client = None
+_client_lock = threading.Lock()
+_configured = None
+
+
+def get_model():
+    """A model behind the shared rate limiter; the Gemini client is built once per process"""
+    global _client
+    if MODEL_NAME == LOCAL_STUB_MODEL:
+        # A fresh stub per comparison, so its recorded prompts belong to that comparison
+        return RateLimitedModel(LocalStubModel(AI_STUB_LATENCY, AI_STUB_429_RATE))
+    provider = load_genai()
+    with _client_lock:
+        if _client is None or _client[:2] != (provider, MODEL_NAME):
+            _client = (provider, MODEL_NAME, provider.GenerativeModel(MODEL_NAME))
+        return RateLimitedModel(_client[2])
+
+
+def ensure_configured():
+    global _configured
+    if MODEL_NAME != LOCAL_STUB_MODEL:
+        api_key = os.getenv("GEMINI_API_KEY")
+        provider = load_genai() if api_key else None
+        if not provider:
+            raise HTTPException(status_code=400, detail="AI not configured. Set GEMINI_API_KEY and install google-generativeai.")
+
+        if _configured != (provider, api_key):
+            provider.configure(api_key=api_key)
+            _configured = (provider, api_key)
+
+
+def compare_loaded(
+    org1,
+    org2,
+    responses1,
+    responses2,
+    clause_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    progress=None,
+):
+    """Run (or fetch the cached) comparison of two organizations whose responses are already packed.
+
+    Returns (result, cache_hit).
+    """
+    key = make_key(
+        org1_id=org1.id,
+        org2_id=org2.id,
+        clause_id=clause_id,
+        start_date=start_date,
+        end_date=end_date,
+        model=MODEL_NAME,
+        token_budget=AI_PROMPT_TOKEN_BUDGET,
+        data=fingerprint([
+            [org1.name, org1.year_of_association, org1.details, responses1],
+            [org2.name, org2.year_of_association, org2.details, responses2],
+        ]),
+    )
+    return comparison_cache.get_or_compute(
+        key,
+        lambda: run_comparison(get_model(), org1, org2, responses1, responses2, AI_PROMPT_TOKEN_BUDGET, progress),
+    )
+
+
+def compare_organizations(
+    db: Session,
     org1_id: int,
     org2_id: int,
     clause_id: Optional[int] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
+    progress=None,
 ):
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key or not genai:
-        raise HTTPException(status_code=400, detail="AI not configured. Set GEMINI_API_KEY and install google-generativeai.")
+    """Load both organizations' responses and run (or fetch the cached) comparison.
 
-    genai.configure(api_key=api_key)
+    Returns (result, cache_hit). `progress(done, total)` is forwarded to the
+    model calls; background jobs use it to report map-reduce steps.
+    """
+    ensure_configured()
 
-    org1 = db.query(Organization).get(org1_id)
-    org2 = db.query(Organization).get(org2_id)
+    org1 = crud.get_organization(db, org1_id)
+    org2 = crud.get_organization(db, org2_id)
     if not org1 or not org2:
         raise HTTPException(status_code=404, detail="One or both organizations not found")
 
-    query = db.query(Response)
-    if clause_id:
-        query = query.filter(Response.clause_id == clause_id)
-    if start_date:
-        query = query.filter(Response.date >= start_date)
-    if end_date:
-        query = query.filter(Response.date <= end_date)
-    q1 = query.filter(Response.organization_id == org1_id).all()
-    q2 = query.filter(Response.organization_id == org2_id).all()
-
-    def pack(responses):
-        return [
-            {
-                "clause_id": r.clause_id,
-                "question_id": r.question_id,
-                "response_type": r.response_type.value if r.response_type else None,
-                "comment": r.comment,
-                "date": str(r.date),
-            }
-            for r in responses
-        ]
-
-    prompt = f"""
-You are an analyst. Compare two organizations based on their survey responses.
-
-Organization 1: {org1.name} (year_of_association={org1.year_of_association}) details={org1.details}
-Responses: {pack(q1)}
-
-Organization 2: {org2.name} (year_of_association={org2.year_of_association}) details={org2.details}
-Responses: {pack(q2)}
+    packed = load_responses(db, [org1_id, org2_id], clause_id, start_date, end_date)
+    return compare_loaded(
+        org1, org2, packed[org1_id], packed[org2_id], clause_id, start_date, end_date, progress
+    )
 
-Return STRICT JSON with keys: similarities (array of strings), differences (array of strings), summary (string). Do not include any markdown fences.
-"""
 
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    result = model.generate_content(prompt)
-    text = (result.text or "").strip()
-
-    import json
-    data = None
-
-    try:
-        data = json.loads(text)
-    except Exception:
-        block = _extract_json_block(text)
-        if block:
-            try:
-                data = json.loads(block)
-            except Exception:
-                data = None
-
-    if not isinstance(data, dict):
-        return {"similarities": [], "differences": [], "summary": text}
-
-    similarities = data.get("similarities") or []
-    differences = data.get("differences") or []
-    summary = data.get("summary") or ""
-
-    if not isinstance(similarities, list):
-        similarities = [str(similarities)] if similarities else []
-    if not isinstance(differences, list):
-        differences = [str(differences)] if differences else []
-    summary = str(summary)
-
-    return {"similarities": similarities, "differences": differences, "summary": summary}
\ No newline at end of file
+@router.get("/ai/compare")
+def ai_compare(
+    http_response: HTTPResponse,
+    org1_id: int,
+    org2_id: int,
+    clause_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+):
+    result, hit = compare_organizations(db, org1_id, org2_id, clause_id, start_date, end_date)
+    http_response.headers["X-Cache"] = "HIT" if hit else "MISS"
+    return result
@@ -0,0 +1,312 @@
+"""
+Background job mode for AI comparisons.
+
+`POST /ai/compare/jobs` stores a job row and hands it to a bounded worker
+pool, returning immediately. Clients poll `GET /ai/compare/jobs/{id}` or
+subscribe to `GET /ai/compare/jobs/{id}/events` (Server-Sent Events) for
+progress. Jobs and their results live in the database, so any worker can
+answer status requests.
+
+Each worker touches `updated_at` on the jobs it holds every
+AI_JOB_HEARTBEAT_SECONDS. A queued or running job left untouched for
+AI_JOB_STALE_SECONDS lost its worker (a crash, a deploy), so the next
+worker to sweep, at startup and then on every heartbeat, requeues it on
+its own pool. Claiming a job compares `updated_at`, so only one worker
+picks each one up. Timestamps are naive UTC, like the columns that hold
+them.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+import ai_compare
+import schemas
+from database import ReadSessionLocal, SessionLocal
+from models import AiComparisonJob
+import crud
+
+router = APIRouter()
+log = logging.getLogger("ncert.ai_jobs")
+
+AI_JOB_CONCURRENCY = int(os.getenv("AI_JOB_CONCURRENCY", "2"))
+AI_JOB_MAX_PENDING = int(os.getenv("AI_JOB_MAX_PENDING", "100"))
+AI_JOB_POLL_INTERVAL = float(os.getenv("AI_JOB_POLL_INTERVAL", "0.5"))
+AI_JOB_HEARTBEAT_SECONDS = float(os.getenv("AI_JOB_HEARTBEAT_SECONDS", "10"))
+AI_JOB_STALE_SECONDS = float(os.getenv("AI_JOB_STALE_SECONDS", "60"))
+TERMINAL_STATUSES = {"done", "failed"}
+ACTIVE_STATUSES = ("queued", "running")
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(AI_JOB_MAX_PENDING)
+_owned = set()  # ids of the jobs queued or running on this worker's pool
+_owned_lock = threading.Lock()
+_heartbeat = None
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=AI_JOB_CONCURRENCY, thread_name_prefix="ai-job")
+        return _executor
+
+
+def _now() -> datetime:
+    # Naive, so a job reads the same when created as when loaded back from the DateTime columns
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _submit(job_id: str):
+    """Run the job on this worker's pool; the caller already holds a `_pending` slot"""
+    with _owned_lock:
+        _owned.add(job_id)
+    try:
+        _get_executor().submit(_run_job, job_id)
+    except Exception:
+        with _owned_lock:
+            _owned.discard(job_id)
+        raise
+
+
+def _touch_owned():
+    with _owned_lock:
+        owned = list(_owned)
+    if not owned:
+        return
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(AiComparisonJob)
+            .where(AiComparisonJob.id.in_(owned), AiComparisonJob.status.in_(ACTIVE_STATUSES))
+            .values(updated_at=_now())
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def recover_stale_jobs() -> list:
+    """Requeue, on this worker, the queued or running jobs whose worker stopped heartbeating; returns their ids"""
+    cutoff = _now() - timedelta(seconds=AI_JOB_STALE_SECONDS)
+    adopted = []
+    db = SessionLocal()
+    try:
+        stale = db.execute(
+            select(AiComparisonJob.id, AiComparisonJob.updated_at)
+            .where(AiComparisonJob.status.in_(ACTIVE_STATUSES), AiComparisonJob.updated_at < cutoff)
+            .order_by(AiComparisonJob.created_at)
+        ).all()
+        for job_id, seen in stale:
+            if not _pending.acquire(blocking=False):
+                break  # this worker is full; another one can take the rest
+            # Another worker may be claiming the same job: the one whose update matches wins
+            claimed = db.execute(
+                update(AiComparisonJob)
+                .where(AiComparisonJob.id == job_id, AiComparisonJob.updated_at == seen)
+                .values(status="queued", progress=0, message="Requeued after its worker stopped", updated_at=_now())
+            ).rowcount
+            db.commit()
+            if not claimed:
+                _pending.release()
+                continue
+            try:
+                _submit(job_id)
+            except Exception:
+                _pending.release()
+                raise
+            adopted.append(job_id)
+    finally:
+        db.close()
+    return adopted
+
+
+def _beat():
+    while True:
+        time.sleep(AI_JOB_HEARTBEAT_SECONDS)
+        try:
+            _touch_owned()
+            recover_stale_jobs()
+        except OperationalError:
+            # A busy or locked database skips one beat; the next one catches up
+            log.warning("AI job heartbeat skipped", exc_info=True)
+
+
+def start() -> list:
+    """Called once per worker at startup: requeue stale jobs, then start the heartbeat"""
+    global _heartbeat
+    adopted = recover_stale_jobs()
+    with _executor_lock:
+        if _heartbeat is None:
+            _heartbeat = threading.Thread(target=_beat, name="ai-job-heartbeat", daemon=True)
+            _heartbeat.start()
+    return adopted
+
+
+def _update_job(job_id: str, **fields):
+    db = SessionLocal()
+    try:
+        job = db.get(AiComparisonJob, job_id)
+        if job is None:
+            return  # deleted while it ran
+        for key, value in fields.items():
+            setattr(job, key, value)
+        job.updated_at = _now()
+        db.commit()
+    finally:
+        db.close()
+
+
+def _run_job(job_id: str):
+    # Read-only: the status updates below each take the writer connection
+    db = ReadSessionLocal()
+    try:
+        job = db.get(AiComparisonJob, job_id)
+        if job is None:
+            return  # deleted before a worker picked it up
+        _update_job(job_id, status="running", progress=5, message="Loading responses")
+
+        def progress(done, total):
+            _update_job(job_id, progress=10 + 85 * done // total, message=f"Model call {done} of {total} finished")
+
+        result, hit = ai_compare.compare_organizations(
+            db, job.org1_id, job.org2_id, job.clause_id, job.start_date, job.end_date, progress
+        )
+        _update_job(
+            job_id,
+            status="done",
+            progress=100,
+            message="Served from cache" if hit else "Comparison complete",
+            result=json.dumps(result),
+        )
+    except HTTPException as e:
+        _update_job(job_id, status="failed", message="Comparison failed", error=str(e.detail))
+    except Exception as e:
+        _update_job(job_id, status="failed", message="Comparison failed", error=str(e))
+    finally:
+        db.close()
+        with _owned_lock:
+            _owned.discard(job_id)
+        _pending.release()
+
+
+def job_payload(job: AiComparisonJob) -> dict:
+    return {
+        "id": job.id,
+        "org1_id": job.org1_id,
+        "org2_id": job.org2_id,
+        "clause_id": job.clause_id,
+        "start_date": job.start_date,
+        "end_date": job.end_date,
+        "status": job.status,
+        "progress": job.progress,
+        "message": job.message,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+    }
+
+
+def _load_job(job_id: str):
+    db = ReadSessionLocal()
+    try:
+        job = db.get(AiComparisonJob, job_id)
+        return job_payload(job) if job else None
+    finally:
+        db.close()
+
+
+@router.post("/ai/compare/jobs", response_model=schemas.AiCompareJob, status_code=202)
+def create_ai_compare_job(job_in: schemas.AiCompareJobCreate, db: Session = Depends(get_db)):
+    if job_in.start_date and job_in.end_date and job_in.end_date < job_in.start_date:
+        raise HTTPException(status_code=400, detail="end_date must be >= start_date")
+    # Fail fast on problems the worker would only report later
+    ai_compare.ensure_configured()
+    if not crud.get_organization(db, job_in.org1_id) or not crud.get_organization(db, job_in.org2_id):
+        raise HTTPException(status_code=404, detail="One or both organizations not found")
+    if not _pending.acquire(blocking=False):
+        raise HTTPException(status_code=429, detail="Too many AI comparison jobs pending; try again later")
+
+    now = _now()
+    job = AiComparisonJob(
+        id=uuid.uuid4().hex,
+        status="queued",
+        progress=0,
+        message="Waiting for a worker",
+        created_at=now,
+        updated_at=now,
+        **job_in.model_dump(),
+    )
+    try:
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        _submit(job.id)
+    except Exception:
+        _pending.release()
+        raise
+    return job_payload(job)
+
+
+@router.get("/ai/compare/jobs/{job_id}", response_model=schemas.AiCompareJob)
+def get_ai_compare_job(job_id: str, db: Session = Depends(get_read_db)):
+    job = db.get(AiComparisonJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_payload(job)
+
+
+@router.get("/ai/compare/jobs/{job_id}/events")
+async def stream_ai_compare_job(job_id: str, request: Request):
+    """Server-Sent Events: a `progress` event on every change, then `done` or `failed`"""
+    if not await run_in_threadpool(_load_job, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        last = None
+        while not await request.is_disconnected():
+            job = await run_in_threadpool(_load_job, job_id)
+            if job is None:
+                # Deleted since the stream began: it will never finish
+                yield f"event: failed\ndata: {json.dumps({'id': job_id, 'status': 'failed', 'error': 'Job not found'})}\n\n"
+                break
+            state = (job["status"], job["progress"], job["message"])
+            if state != last:
+                last = state
+                event = job["status"] if job["status"] in TERMINAL_STATUSES else "progress"
+                yield f"event: {event}\ndata: {json.dumps(job, default=str)}\n\n"
+            if job["status"] in TERMINAL_STATUSES:
+                break
+            await asyncio.sleep(AI_JOB_POLL_INTERVAL)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
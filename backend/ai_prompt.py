@@ -0,0 +1,248 @@
+"""
+Token-budgeted prompt building for AI comparisons.
+
+Responses are pre-aggregated per clause (answer counts, latest answer per
+question as a one-letter code, deduplicated comments) instead of being
+inlined as dict reprs. When the compact prompt still exceeds the token
+budget, clauses are split into chunks that each fit, compared separately
+(map), and the partial results are merged in a final call (reduce).
+"""
+import json
+import os
+import random
+import re
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Optional
+
+AI_PROMPT_TOKEN_BUDGET = int(os.getenv("AI_PROMPT_TOKEN_BUDGET", "6000"))
+COMMENT_MAX_CHARS = 200
+ANSWER_CODES = {"Yes": "Y", "No": "N", "Not applicable": "NA"}
+
+RESULT_INSTRUCTIONS = (
+    "Return STRICT JSON with keys: similarities (array of strings), differences (array of strings), "
+    "summary (string). Do not include any markdown fences."
+)
+ENCODING_NOTE = (
+    "Answers are encoded per clause as counts (Y=Yes, N=No, NA=Not applicable), the latest answer "
+    "per question as q<id>=<code>, and distinct comments with the questions they were given for."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) without a tokenizer"""
+    return (len(text) + 3) // 4
+
+
+def _extract_json_block(text: str) -> Optional[str]:
+    if not text:
+        return None
+    fence = re.search(r"```(?:json)?\s*([\s\S]*?)\s*```", text, re.IGNORECASE)
+    if fence:
+        return fence.group(1)
+    stripped = text.strip()
+    if stripped.startswith("{") and stripped.endswith("}"):
+        return stripped
+    return None
+
+
+def parse_result(text: str) -> dict:
+    data = None
+
+    try:
+        data = json.loads(text)
+    except Exception:
+        block = _extract_json_block(text)
+        if block:
+            try:
+                data = json.loads(block)
+            except Exception:
+                data = None
+
+    if not isinstance(data, dict):
+        return {"similarities": [], "differences": [], "summary": text}
+
+    similarities = data.get("similarities") or []
+    differences = data.get("differences") or []
+    summary = data.get("summary") or ""
+
+    if not isinstance(similarities, list):
+        similarities = [str(similarities)] if similarities else []
+    if not isinstance(differences, list):
+        differences = [str(differences)] if differences else []
+    summary = str(summary)
+
+    return {"similarities": similarities, "differences": differences, "summary": summary}
+
+
+def summarize_clauses(responses) -> "OrderedDict[int, dict]":
+    """Group packed responses by clause: counts, latest code per question, deduped comments"""
+    clauses = OrderedDict()
+    for r in sorted(responses, key=lambda r: (r["clause_id"] or 0, r["date"])):
+        clause = clauses.setdefault(r["clause_id"], {"answers": {}, "comments": OrderedDict()})
+        clause["answers"][r["question_id"]] = ANSWER_CODES.get(r["response_type"], "?")
+        comment = " ".join((r["comment"] or "").split())
+        if comment:
+            entry = clause["comments"].setdefault(comment.lower(), {"text": comment[:COMMENT_MAX_CHARS], "questions": []})
+            if r["question_id"] not in entry["questions"]:
+                entry["questions"].append(r["question_id"])
+    return clauses
+
+
+def encode_clause(clause_id, clause: Optional[dict], with_comments: bool = True) -> str:
+    if not clause:
+        return f"C{clause_id}: no responses"
+    counts = {}
+    for code in clause["answers"].values():
+        counts[code] = counts.get(code, 0) + 1
+    line = f"C{clause_id} " + " ".join(f"{code}:{n}" for code, n in sorted(counts.items()))
+    line += " | " + " ".join(f"q{q}={code}" for q, code in sorted(clause["answers"].items()))
+    if with_comments and clause["comments"]:
+        line += " | comments: " + "; ".join(
+            f'"{entry["text"]}" (q{",q".join(str(q) for q in entry["questions"])})'
+            for entry in clause["comments"].values()
+        )
+    return line
+
+
+def _org_header(label: str, org) -> str:
+    return f"{label}: {org.name} (year_of_association={org.year_of_association}) details={org.details}"
+
+
+def comparison_prompt(org1, org2, clause_ids, clauses1, clauses2, with_comments: bool = True, part: str = "") -> str:
+    body1 = "\n".join(encode_clause(c, clauses1.get(c), with_comments) for c in clause_ids)
+    body2 = "\n".join(encode_clause(c, clauses2.get(c), with_comments) for c in clause_ids)
+    return f"""
+You are an analyst. Compare two organizations based on their survey responses{part}.
+{ENCODING_NOTE}
+
+{_org_header("Organization 1", org1)}
+{body1}
+
+{_org_header("Organization 2", org2)}
+{body2}
+
+{RESULT_INSTRUCTIONS}
+"""
+
+
+def reduce_prompt(org1, org2, partials, budget: int) -> str:
+    def render(items_per_list):
+        lines = []
+        for index, partial in enumerate(partials, start=1):
+            lines.append(f"Part {index} summary: {partial['summary']}")
+            lines += [f"- similarity: {s}" for s in partial["similarities"][:items_per_list]]
+            lines += [f"- difference: {d}" for d in partial["differences"][:items_per_list]]
+        return f"""
+You are an analyst. The comparison of two organizations was split by survey clause.
+Merge these partial results into one overall comparison, removing duplicates.
+
+{_org_header("Organization 1", org1)}
+{_org_header("Organization 2", org2)}
+
+{chr(10).join(lines)}
+
+{RESULT_INSTRUCTIONS}
+"""
+
+    items = max((len(p["similarities"]) + len(p["differences"]) for p in partials), default=0)
+    prompt = render(items)
+    while estimate_tokens(prompt) > budget and items > 0:
+        items //= 2
+        prompt = render(items)
+    return _truncate(prompt, budget)
+
+
+def _chunk_clauses(org1, org2, clause_ids, clauses1, clauses2, budget: int):
+    """Greedily pack clauses into chunks whose prompt fits the budget"""
+    chunks, current = [], []
+    for clause_id in clause_ids:
+        candidate = current + [clause_id]
+        if current and estimate_tokens(comparison_prompt(org1, org2, candidate, clauses1, clauses2)) > budget:
+            chunks.append(current)
+            candidate = [clause_id]
+        current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _truncate(prompt: str, budget: int) -> str:
+    """Last resort: cut the prompt body so the instructions still fit in the budget"""
+    if estimate_tokens(prompt) <= budget:
+        return prompt
+    return prompt[: max(0, budget * 4 - len(RESULT_INSTRUCTIONS) - 8)] + "\n...\n" + RESULT_INSTRUCTIONS
+
+
+def _fit_prompt(org1, org2, clause_ids, clauses1, clauses2, budget: int, part: str = "") -> str:
+    """Build a chunk prompt, dropping comments and then trimming text if one clause alone is too big"""
+    prompt = comparison_prompt(org1, org2, clause_ids, clauses1, clauses2, part=part)
+    if estimate_tokens(prompt) > budget:
+        prompt = comparison_prompt(org1, org2, clause_ids, clauses1, clauses2, with_comments=False, part=part)
+    return _truncate(prompt, budget)
+
+
+def run_comparison(model, org1, org2, responses1, responses2, budget: int = AI_PROMPT_TOKEN_BUDGET, progress=None) -> dict:
+    """Compare two organizations without ever sending a prompt over `budget` tokens.
+
+    `model` only needs `generate_content(prompt)` returning an object with `.text`.
+    `progress(done, total)`, if given, is called after every model call.
+    """
+    clauses1, clauses2 = summarize_clauses(responses1), summarize_clauses(responses2)
+    clause_ids = sorted(set(clauses1) | set(clauses2), key=lambda c: (c is None, c or 0))
+    calls = {"done": 0, "total": 1}
+
+    def call(prompt):
+        result = parse_result((model.generate_content(prompt).text or "").strip())
+        calls["done"] += 1
+        if progress:
+            progress(calls["done"], calls["total"])
+        return result
+
+    prompt = comparison_prompt(org1, org2, clause_ids, clauses1, clauses2)
+    if estimate_tokens(prompt) <= budget:
+        return call(prompt)
+
+    chunks = _chunk_clauses(org1, org2, clause_ids, clauses1, clauses2, budget)
+    if len(chunks) == 1:
+        return call(_fit_prompt(org1, org2, chunks[0], clauses1, clauses2, budget))
+
+    calls["total"] = len(chunks) + 1
+    partials = [
+        call(_fit_prompt(org1, org2, chunk, clauses1, clauses2, budget, part=f" (clauses {', '.join(f'C{c}' for c in chunk)})"))
+        for chunk in chunks
+    ]
+    return call(reduce_prompt(org1, org2, partials, budget))
+
+
+class StubRateLimitError(Exception):
+    """What LocalStubModel raises to imitate a provider's 429"""
+
+    code = 429
+
+
+class LocalStubModel:
+    """Offline stand-in for a generative model: records prompts, answers with fixed JSON.
+
+    `latency` seconds are slept per call and a `rate_limit_rate` fraction of
+    calls fail with StubRateLimitError, to exercise concurrency and retries.
+    """
+
+    def __init__(self, latency: float = 0.0, rate_limit_rate: float = 0.0, seed: Optional[int] = None):
+        self.prompts = []
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self._random = random.Random(seed)
+
+    def generate_content(self, prompt: str):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.rate_limit_rate and self._random.random() < self.rate_limit_rate:
+            raise StubRateLimitError("429 Resource has been exhausted (stub)")
+        self.prompts.append(prompt)
+        return SimpleNamespace(text=json.dumps({
+            "similarities": [f"stub similarity {len(self.prompts)}"],
+            "differences": [f"stub difference {len(self.prompts)}"],
+            "summary": f"Local stub model response to a {estimate_tokens(prompt)}-token prompt.",
+        }))
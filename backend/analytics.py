@@ -0,0 +1,232 @@
+"""
+Columnar, in-memory snapshot of `responses` for analytics queries.
+
+Each response is stored as one slot in five typed NumPy arrays
+(organization, clause, question and date ordinal as int32, the coded
+response type as int8), 17 bytes per row and no Python object per
+response. Filters are boolean masks and aggregations are `bincount`s, so
+counts and org x question matrices over millions of rows take
+milliseconds.
+
+The snapshot follows the table version counters: new rows are appended
+incrementally (`id > max_id`); an update or delete (the `response_edits`
+counter) triggers a full reload.
+"""
+import threading
+from datetime import date
+from functools import cached_property
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import case, select
+from sqlalchemy.orm import Session
+
+import crud
+import startup
+import versions
+from database import ReadSessionLocal
+from models import Response, ResponseType
+
+# numpy loads on first use, not when app imports this router
+np = startup.LazyModule("numpy")
+
+router = APIRouter()
+
+# Coded response types; the order is also the column order of `counts`
+RESPONSE_CODES = {ResponseType.YES: 0, ResponseType.NO: 1, ResponseType.NOT_APPLICABLE: 2}
+CODE_LABELS = [response_type.value for response_type in RESPONSE_CODES]
+NO_ANSWER = -1
+LOAD_CHUNK_SIZE = 100_000
+
+
+def get_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class ResponseSnapshot:
+    """Immutable column arrays plus the versions they were built from"""
+
+    def __init__(self, organization_id, clause_id, question_id, response_type, date_ordinal, max_id, built_from):
+        self.organization_id = organization_id
+        self.clause_id = clause_id
+        self.question_id = question_id
+        self.response_type = response_type
+        self.date = date_ordinal
+        self.max_id = max_id
+        self.built_from = built_from  # (responses version, response_edits version)
+
+    def __len__(self):
+        return len(self.organization_id)
+
+    @cached_property
+    def by_answer(self):
+        """Row positions sorted by (organization, question, date), ties in insertion (id) order"""
+        return np.lexsort((self.date, self.question_id, self.organization_id))
+
+    def mask(
+        self,
+        organization_ids: Optional[list[int]] = None,
+        clause_id: Optional[int] = None,
+        question_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ):
+        """Boolean row mask for the usual comparison filters"""
+        selected = np.ones(len(self), dtype=bool)
+        if organization_ids:
+            selected &= np.isin(self.organization_id, np.asarray(organization_ids, dtype=np.int32))
+        if clause_id:
+            selected &= self.clause_id == clause_id
+        if question_id:
+            selected &= self.question_id == question_id
+        if start_date:
+            selected &= self.date >= start_date.toordinal()
+        if end_date:
+            selected &= self.date <= end_date.toordinal()
+        return selected
+
+    def counts(self, selected) -> dict:
+        """{organization_id: [yes, no, not_applicable]} over the selected rows"""
+        orgs = self.organization_id[selected].astype(np.int64)
+        if not len(orgs):
+            return {}
+        width = len(RESPONSE_CODES)
+        totals = np.bincount(orgs * width + self.response_type[selected], minlength=(int(orgs.max()) + 1) * width)
+        totals = totals.reshape(-1, width)
+        present = np.flatnonzero(totals.sum(axis=1))
+        return {int(org_id): totals[org_id].tolist() for org_id in present}
+
+    def latest_answers(self, selected, organization_ids: list[int], question_ids: list[int]):
+        """Matrix (organizations x questions) of the latest coded answer, NO_ANSWER where none"""
+        matrix = np.full((len(organization_ids), len(question_ids)), NO_ANSWER, dtype=np.int8)
+        order = self.by_answer[selected[self.by_answer]]
+        if not len(order) or not organization_ids or not question_ids:
+            return matrix
+        orgs = self.organization_id[order]
+        questions = self.question_id[order]
+        # The last row of each (organization, question) run is its latest answer
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = (orgs[1:] != orgs[:-1]) | (questions[1:] != questions[:-1])
+        orgs, questions, answers = orgs[last], questions[last], self.response_type[order[last]]
+
+        org_index = np.asarray(organization_ids)
+        question_index = np.asarray(question_ids)
+        org_sort, question_sort = np.argsort(org_index), np.argsort(question_index)
+        rows = np.searchsorted(org_index[org_sort], orgs)
+        cols = np.searchsorted(question_index[question_sort], questions)
+        known = (rows < len(org_index)) & (cols < len(question_index))
+        known[known] &= (org_index[org_sort][rows[known]] == orgs[known]) & (question_index[question_sort][cols[known]] == questions[known])
+        matrix[org_sort[rows[known]], question_sort[cols[known]]] = answers[known]
+        return matrix
+
+
+def _load_columns(db: Session, after_id: int = 0):
+    """Read responses with id > after_id into arrays; returns (columns, max_id)"""
+    code = case(
+        *((Response.response_type == response_type, value) for response_type, value in RESPONSE_CODES.items()),
+        else_=NO_ANSWER,
+    )
+    statement = select(
+        Response.id, Response.organization_id, Response.clause_id, Response.question_id, code, Response.date
+    ).where(Response.id > after_id).order_by(Response.id)
+
+    chunks, max_id = [], after_id
+    for rows in db.execute(statement.execution_options(yield_per=LOAD_CHUNK_SIZE)).partitions():
+        ids, orgs, clauses, questions, codes, dates = zip(*rows)
+        chunks.append((
+            np.fromiter(orgs, dtype=np.int32, count=len(rows)),
+            np.fromiter(clauses, dtype=np.int32, count=len(rows)),
+            np.fromiter(questions, dtype=np.int32, count=len(rows)),
+            np.fromiter(codes, dtype=np.int8, count=len(rows)),
+            np.fromiter((day.toordinal() for day in dates), dtype=np.int32, count=len(rows)),
+        ))
+        max_id = ids[-1]
+    if not chunks:
+        empty = (np.int32, np.int32, np.int32, np.int8, np.int32)
+        return [np.empty(0, dtype=dtype) for dtype in empty], max_id
+    return [np.concatenate(column) for column in zip(*chunks)], max_id
+
+
+_snapshot: Optional[ResponseSnapshot] = None
+_refresh_lock = threading.Lock()
+
+
+def snapshot(db: Session) -> ResponseSnapshot:
+    """The current snapshot, refreshed first if responses changed since it was built"""
+    global _snapshot
+    table_versions = versions.current()
+    wanted = (table_versions.get("responses"), table_versions.get("response_edits"))
+    current = _snapshot
+    if current is not None and current.built_from == wanted:
+        return current
+
+    with _refresh_lock:
+        current = _snapshot
+        if current is not None and current.built_from == wanted:
+            return current
+        if current is not None and current.built_from[1] == wanted[1]:
+            # Inserts only: append the new rows
+            columns, max_id = _load_columns(db, current.max_id)
+            columns = [
+                np.concatenate((old, new))
+                for old, new in zip(
+                    (current.organization_id, current.clause_id, current.question_id, current.response_type, current.date),
+                    columns,
+                )
+            ]
+        else:
+            columns, max_id = _load_columns(db)
+        _snapshot = ResponseSnapshot(*columns, max_id=max_id, built_from=wanted)
+        return _snapshot
+
+
+@router.get("/analytics/counts")
+def response_counts(
+    organization_ids: Optional[list[int]] = Query(None),
+    clause_id: Optional[int] = None,
+    question_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+):
+    """Yes/No/Not applicable counts per organization, computed from the columnar snapshot"""
+    data = snapshot(db)
+    counts = data.counts(data.mask(organization_ids, clause_id, question_id, start_date, end_date))
+    organizations = crud.reference_snapshot(db, "organizations").by_id
+    return [
+        {
+            "organization_id": org_id,
+            "name": organizations[org_id].name if org_id in organizations else None,
+            **dict(zip(CODE_LABELS, values)),
+            "Total": sum(values),
+        }
+        for org_id, values in sorted(counts.items())
+    ]
+
+
+@router.get("/analytics/matrix")
+def answer_matrix(
+    organization_ids: Optional[list[int]] = Query(None),
+    clause_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+):
+    """Latest answer of every organization to every question, as an org x question matrix.
+
+    Cells index into `labels`; null means the organization has not answered.
+    """
+    data = snapshot(db)
+    org_ids = organization_ids or [org.id for org in crud.get_organizations(db)]
+    question_ids = [question.id for question in crud.get_questions(db, clause_id=clause_id)]
+    matrix = data.latest_answers(data.mask(organization_ids, clause_id, None, start_date, end_date), org_ids, question_ids)
+    return {
+        "organization_ids": org_ids,
+        "question_ids": question_ids,
+        "labels": CODE_LABELS,
+        "matrix": [[None if code == NO_ANSWER else code for code in row] for row in matrix.tolist()],
+    }
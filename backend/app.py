@@ -1,14 +1,27 @@
-from fastapi import FastAPI, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database import SessionLocal, init_db
-import models, schemas, crud
-import uvicorn
-from comparison import router as comparison_router
+import startup  # first, so its clock covers every import below
+from fastapi import FastAPI, Depends, HTTPException, Request, Query
+from fastapi import Response as HTTPResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
 from dotenv import load_dotenv
-from ai_compare import router as ai_router
 from typing import Optional
 from datetime import date
+startup.mark("framework")
+from database import ReadSessionLocal, SessionLocal, init_db, USE_ASYNC_DB
+import schemas, crud, charts, versions, metrics, serialization
+from comparison import router as comparison_router
+from ai_compare import router as ai_router
+import ai_jobs
+from ai_jobs import router as ai_jobs_router
+from ai_batch import router as ai_batch_router
+from analytics import router as analytics_router
+from similarity import router as similarity_router
+from search import router as search_router
+from bootstrap import router as bootstrap_router
+from live import router as live_router
+from pagination import MAX_PAGE_SIZE, paginate
+startup.mark("modules")
 
 load_dotenv()
 
@@ -21,7 +34,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Server-Timing"],
 )
+app.add_middleware(serialization.CompressionMiddleware)
+# Outermost, so its timings cover CORS, compression and every router
+app.add_middleware(metrics.MetricsMiddleware)
 
 
 # Dependency to get DB session
@@ -33,9 +50,22 @@ def get_db():
     finally:
         db.close()
 
+# GET handlers only read: under DB_PROFILE=production this is the read-only pool
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 @app.on_event("startup")
 def on_startup():
-    init_db()
+    with startup.phase("init_db") as timing:
+        timing.detail = "schema applied" if init_db() else "schema current"
+    with startup.phase("ai_jobs") as timing:
+        requeued = ai_jobs.start()
+        timing.detail = f"{len(requeued)} requeued" if requeued else None
+    startup.print_report()
 
 @app.get("/")
 def read_root():
@@ -43,11 +73,20 @@ def read_root():
 
 # Organization Endpoints
 @app.get("/organizations", response_model=list[schemas.Organization])
-def list_organizations(db: Session = Depends(get_db)):
-    return crud.get_organizations(db)
+def list_organizations(
+    request: Request,
+    http_response: HTTPResponse,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    cached = versions.not_modified(request, http_response, "organizations")
+    if cached:
+        return cached
+    return paginate(http_response, lambda after_id, n: crud.get_organizations(db, after_id, n), cursor, limit)
 
 @app.get("/organizations/{org_id}", response_model=schemas.Organization)
-def get_organization(org_id: int, db: Session = Depends(get_db)):
+def get_organization(org_id: int, db: Session = Depends(get_read_db)):
     org = crud.get_organization(db, org_id)
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
@@ -59,8 +98,17 @@ def add_organization(org: schemas.OrganizationCreate, db: Session = Depends(get_
 
 # Clause Endpoints
 @app.get("/clauses", response_model=list[schemas.Clause])
-def list_clauses(db: Session = Depends(get_db)):
-    return crud.get_clauses(db)
+def list_clauses(
+    request: Request,
+    http_response: HTTPResponse,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    cached = versions.not_modified(request, http_response, "clauses")
+    if cached:
+        return cached
+    return paginate(http_response, lambda after_id, n: crud.get_clauses(db, after_id, n), cursor, limit)
 
 @app.post("/clauses", response_model=schemas.Clause)
 def add_clause(clause: schemas.ClauseCreate, db: Session = Depends(get_db)):
@@ -68,8 +116,19 @@ def add_clause(clause: schemas.ClauseCreate, db: Session = Depends(get_db)):
 
 # Question Endpoints
 @app.get("/questions", response_model=list[schemas.Question])
-def list_questions(db: Session = Depends(get_db)):
-    return crud.get_questions(db)
+def list_questions(
+    request: Request,
+    http_response: HTTPResponse,
+    clause_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    cached = versions.not_modified(request, http_response, "questions")
+    if cached:
+        return cached
+    questions = paginate(http_response, lambda after_id, n: crud.get_questions(db, clause_id, after_id, n), cursor, limit)
+    return serialization.json_response(serialization.records(questions, schemas.Question), http_response)
 
 @app.post("/questions", response_model=schemas.Question)
 def add_question(question: schemas.QuestionCreate, db: Session = Depends(get_db)):
@@ -77,13 +136,72 @@ def add_question(question: schemas.QuestionCreate, db: Session = Depends(get_db)
 
 # Response Endpoints
 @app.get("/responses", response_model=list[schemas.Response])
-def list_responses(organization_id: int = None, db: Session = Depends(get_db)):
-    return crud.get_responses(db, organization_id)
+def list_responses(
+    http_response: HTTPResponse,
+    organization_id: int = None,
+    clause_id: Optional[int] = None,
+    question_id: Optional[int] = None,
+    response_type: Optional[schemas.ResponseType] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    if start_date and end_date and end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must be >= start_date")
+
+    def fetch(after_id, n):
+        return crud.get_responses(
+            db, organization_id, clause_id, question_id,
+            response_type.value if response_type else None,
+            start_date, end_date, after_id, n,
+        )
+
+    rows = paginate(http_response, fetch, cursor, limit)
+    return serialization.json_response(serialization.records(rows, schemas.Response), http_response)
 
 @app.post("/responses", response_model=schemas.Response)
 def add_response(response: schemas.ResponseCreate, db: Session = Depends(get_db)):
     return crud.create_response(db, response)
 
+def _parse_bulk_body(body: bytes, content_type: str):
+    """Parse a JSON array or NDJSON request body into (items, positions, errors).
+
+    NDJSON is parsed line by line: `positions` holds each item's 0-based line
+    number, and a line that is not JSON lands in `errors` under its number
+    instead of failing the request. A JSON array is all or nothing.
+    """
+    if "ndjson" in content_type or "jsonl" in content_type:
+        items, positions, errors = [], [], []
+        for number, line in enumerate(body.splitlines()):
+            if not line.strip():
+                continue
+            try:
+                items.append(serialization.loads(line))
+            except ValueError as e:
+                errors.append({"index": number, "detail": f"Invalid JSON: {e}"})
+                continue
+            positions.append(number)
+        return items, positions, errors
+    items = serialization.loads(body or b"[]")
+    if not isinstance(items, list):
+        raise ValueError("expected a JSON array of responses")
+    return items, None, []
+
+@app.post("/responses/bulk", response_model=schemas.BulkResponseResult)
+async def add_responses_bulk(request: Request, chunk_size: int = crud.BULK_CHUNK_SIZE, db: Session = Depends(get_db)):
+    """Insert many responses from a JSON array or NDJSON body; errors are indexed by array position or NDJSON line"""
+    try:
+        items, positions, errors = _parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid bulk payload: {e}")
+
+    received = len(items) + len(errors)  # the errors so far are unparseable NDJSON lines
+    inserted, rejected = await run_in_threadpool(crud.ingest_responses, db, items, chunk_size, positions)
+    errors = sorted(errors + rejected, key=lambda error: error["index"])
+    return {"received": received, "inserted": inserted, "errors": errors}
+
 @app.put("/responses/{response_id}", response_model=schemas.Response)
 def update_response(response_id: int, response: schemas.ResponseCreate, db: Session = Depends(get_db)):
     updated_response = crud.update_response(db, response_id, response)
@@ -99,130 +217,49 @@ def delete_response(response_id: int, db: Session = Depends(get_db)):
     return {"message": "Response deleted successfully"}
 
 @app.get("/chart-data/yes-no")
-def get_yes_no_chart_data(db: Session = Depends(get_db)):
+def get_yes_no_chart_data(db: Session = Depends(get_read_db)):
     """Get aggregated Yes/No/Not applicable response data for all organizations"""
-    from sqlalchemy import func, case  # import case here
-
-    results = db.query(
-        models.Organization.name,
-        func.sum(
-            case(
-                (models.Response.response_type == "Yes", 1),
-                else_=0
-            )
-        ).label("Yes"),
-        func.sum(
-            case(
-                (models.Response.response_type == "No", 1),
-                else_=0
-            )
-        ).label("No"),
-        func.sum(
-            case(
-                (models.Response.response_type == "Not applicable", 1),
-                else_=0
-            )
-        ).label("Not applicable"),
-        func.count(models.Response.id).label("Total")
-    ).join(
-        models.Response, models.Organization.id == models.Response.organization_id, isouter=True
-    ).group_by(
-        models.Organization.id, models.Organization.name
-    ).all()
-
-    chart_data = []
-    for org_name, yes_count, no_count, not_applicable_count, total in results:
-        if total > 0:  # Only include organizations with responses
-            chart_data.append({
-                "name": org_name,
-                "Yes": yes_count or 0,
-                "No": no_count or 0,
-                "Not applicable": not_applicable_count or 0,
-                "Total": total
-            })
-
-    return chart_data
+    organizations = crud.reference_snapshot(db, "organizations").by_id
+    return charts.yes_no_chart(db.execute(charts.yes_no_totals_query()).all(), organizations)
 
 
 @app.get("/chart-data/yes-no-comparison")
 def get_yes_no_comparison_chart_data(
-    org1_id: int,
-    org2_id: int,
+    org1_id: Optional[int] = None,
+    org2_id: Optional[int] = None,
+    org_ids: Optional[list[int]] = Query(None),
     clause_id: Optional[int] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Get Yes/No/Not applicable/NoResponse comparison data for two specific organizations"""
-    from sqlalchemy import func, case
-
-    org1 = db.query(models.Organization).get(org1_id)
-    org2 = db.query(models.Organization).get(org2_id)
-    if not org1 or not org2:
-        raise HTTPException(status_code=404, detail="One or both organizations not found")
-
-    # Get total questions (filtered by clause if provided)
-    total_query = db.query(func.count(models.Question.id))
-    if clause_id:
-        total_query = total_query.filter(models.Question.clause_id == clause_id)
-    total_questions = total_query.scalar() or 0
-
-    def get_counts(org_id):
-        yes_query = db.query(func.count(func.distinct(models.Response.question_id))).filter(
-            models.Response.organization_id == org_id,
-            models.Response.response_type == "Yes"
-        )
-        no_query = db.query(func.count(func.distinct(models.Response.question_id))).filter(
-            models.Response.organization_id == org_id,
-            models.Response.response_type == "No"
-        )
-        not_applicable_query = db.query(func.count(func.distinct(models.Response.question_id))).filter(
-            models.Response.organization_id == org_id,
-            models.Response.response_type == "Not applicable"
-        )
-        total_resp_query = db.query(func.count(func.distinct(models.Response.question_id))).filter(
-            models.Response.organization_id == org_id
-        )
+    """Get Yes/No/Not applicable/NoResponse comparison data for two or more organizations
 
-        if clause_id:
-            yes_query = yes_query.filter(models.Response.clause_id == clause_id)
-            no_query = no_query.filter(models.Response.clause_id == clause_id)
-            not_applicable_query = not_applicable_query.filter(models.Response.clause_id == clause_id)
-            total_resp_query = total_resp_query.filter(models.Response.clause_id == clause_id)
-        if start_date:
-            yes_query = yes_query.filter(models.Response.date >= start_date)
-            no_query = no_query.filter(models.Response.date >= start_date)
-            not_applicable_query = not_applicable_query.filter(models.Response.date >= start_date)
-            total_resp_query = total_resp_query.filter(models.Response.date >= start_date)
-        if end_date:
-            yes_query = yes_query.filter(models.Response.date <= end_date)
-            no_query = no_query.filter(models.Response.date <= end_date)
-            not_applicable_query = not_applicable_query.filter(models.Response.date <= end_date)
-            total_resp_query = total_resp_query.filter(models.Response.date <= end_date)
-
-        yes_count = yes_query.scalar() or 0
-        no_count = no_query.scalar() or 0
-        not_applicable_count = not_applicable_query.scalar() or 0
-        total_responses = total_resp_query.scalar() or 0
-        no_response = max(0, total_questions - total_responses)
-
-        return yes_count, no_count, not_applicable_count, no_response
-
-    yes1, no1, na1, nr1 = get_counts(org1_id)
-    yes2, no2, na2, nr2 = get_counts(org2_id)
-
-    chart_data = [
-        {"name": "Yes", org1.name: yes1, org2.name: yes2},
-        {"name": "No", org1.name: no1, org2.name: no2},
-        {"name": "Not Applicable", org1.name: na1, org2.name: na2},
-        {"name": "No Response", org1.name: nr1, org2.name: nr2},
-    ]
-
-    return chart_data
+    Pass `org1_id`/`org2_id` for a pair or repeat `org_ids` for any number of
+    organizations; the result shape is the same either way.
+    """
+    requested = charts.comparison_org_ids(org1_id, org2_id, org_ids)
+    organizations = crud.reference_snapshot(db, "organizations").by_id
+    rows = db.execute(charts.yes_no_comparison_query(requested, clause_id, start_date, end_date)).all()
+    return charts.yes_no_comparison_chart(rows, requested, organizations, crud.question_count(db, clause_id))
 
 
 app.include_router(comparison_router)
 app.include_router(ai_router)
+app.include_router(ai_jobs_router)
+app.include_router(ai_batch_router)
+app.include_router(analytics_router)
+app.include_router(similarity_router)
+app.include_router(search_router)
+app.include_router(bootstrap_router)
+app.include_router(live_router)
+app.include_router(metrics.router)
+
+if USE_ASYNC_DB:
+    import async_api
+    async_api.install(app)
+startup.mark("routes")
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
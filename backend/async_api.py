@@ -0,0 +1,184 @@
+"""
+Async versions of the read, response and aggregation endpoints.
+
+Enabled with USE_ASYNC_DB=1: `install` swaps these handlers in for the sync
+ones registered in app.py and comparison.py, so the URLs, parameters and
+payloads stay identical while queries run on an AsyncSession instead of the
+threadpool.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi import Response as HTTPResponse
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import date
+from database import get_async_db
+from pagination import MAX_PAGE_SIZE, page_bounds, finish_page
+import schemas, charts, crud_async, versions, serialization
+import comparison
+
+router = APIRouter()
+
+async def _not_modified(request: Request, http_response: HTTPResponse, table: str):
+    """versions.not_modified, with any due version re-read moved off the event loop"""
+    await versions.current_async()
+    return versions.not_modified(request, http_response, table)
+
+# Organization Endpoints
+@router.get("/organizations", response_model=list[schemas.Organization])
+async def list_organizations(
+    request: Request,
+    http_response: HTTPResponse,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    cached = await _not_modified(request, http_response, "organizations")
+    if cached:
+        return cached
+    after_id, fetch_limit = page_bounds(cursor, limit)
+    return finish_page(http_response, await crud_async.get_organizations(db, after_id, fetch_limit), limit)
+
+@router.get("/organizations/{org_id}", response_model=schemas.Organization)
+async def get_organization(org_id: int, db: AsyncSession = Depends(get_async_db)):
+    org = await crud_async.get_organization(db, org_id)
+    if not org:
+        raise HTTPException(status_code=404, detail="Organization not found")
+    return org
+
+# Clause Endpoints
+@router.get("/clauses", response_model=list[schemas.Clause])
+async def list_clauses(
+    request: Request,
+    http_response: HTTPResponse,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    cached = await _not_modified(request, http_response, "clauses")
+    if cached:
+        return cached
+    after_id, fetch_limit = page_bounds(cursor, limit)
+    return finish_page(http_response, await crud_async.get_clauses(db, after_id, fetch_limit), limit)
+
+# Question Endpoints
+@router.get("/questions", response_model=list[schemas.Question])
+async def list_questions(
+    request: Request,
+    http_response: HTTPResponse,
+    clause_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    cached = await _not_modified(request, http_response, "questions")
+    if cached:
+        return cached
+    after_id, fetch_limit = page_bounds(cursor, limit)
+    questions = finish_page(http_response, await crud_async.get_questions(db, clause_id, after_id, fetch_limit), limit)
+    return serialization.json_response(serialization.records(questions, schemas.Question), http_response)
+
+# Response Endpoints
+@router.get("/responses", response_model=list[schemas.Response])
+async def list_responses(
+    http_response: HTTPResponse,
+    organization_id: int = None,
+    clause_id: Optional[int] = None,
+    question_id: Optional[int] = None,
+    response_type: Optional[schemas.ResponseType] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if start_date and end_date and end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must be >= start_date")
+
+    after_id, fetch_limit = page_bounds(cursor, limit)
+    rows = await crud_async.get_responses(
+        db, organization_id, clause_id, question_id,
+        response_type.value if response_type else None,
+        start_date, end_date, after_id, fetch_limit,
+    )
+    rows = finish_page(http_response, rows, limit)
+    return serialization.json_response(serialization.records(rows, schemas.Response), http_response)
+
+@router.post("/responses", response_model=schemas.Response)
+async def add_response(response: schemas.ResponseCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.create_response(db, response)
+
+@router.put("/responses/{response_id}", response_model=schemas.Response)
+async def update_response(response_id: int, response: schemas.ResponseCreate, db: AsyncSession = Depends(get_async_db)):
+    updated_response = await crud_async.update_response(db, response_id, response)
+    if not updated_response:
+        raise HTTPException(status_code=404, detail="Response not found")
+    return updated_response
+
+@router.delete("/responses/{response_id}")
+async def delete_response(response_id: int, db: AsyncSession = Depends(get_async_db)):
+    success = await crud_async.delete_response(db, response_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Response not found")
+    return {"message": "Response deleted successfully"}
+
+# Aggregation Endpoints
+@router.get("/chart-data/yes-no")
+async def get_yes_no_chart_data(db: AsyncSession = Depends(get_async_db)):
+    """Get aggregated Yes/No/Not applicable response data for all organizations"""
+    organizations = (await crud_async.reference_snapshot(db, "organizations")).by_id
+    return charts.yes_no_chart((await db.execute(charts.yes_no_totals_query())).all(), organizations)
+
+@router.get("/chart-data/yes-no-comparison")
+async def get_yes_no_comparison_chart_data(
+    org1_id: Optional[int] = None,
+    org2_id: Optional[int] = None,
+    org_ids: Optional[list[int]] = Query(None),
+    clause_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get Yes/No/Not applicable/NoResponse comparison data for two or more organizations"""
+    requested = charts.comparison_org_ids(org1_id, org2_id, org_ids)
+    organizations = (await crud_async.reference_snapshot(db, "organizations")).by_id
+    statement = charts.yes_no_comparison_query(requested, clause_id, start_date, end_date)
+    rows = (await db.execute(statement)).all()
+    return charts.yes_no_comparison_chart(rows, requested, organizations, await crud_async.question_count(db, clause_id))
+
+@router.get("/compare")
+async def compare_surveys(
+    organization_ids: Optional[List[int]] = Query(None),
+    clause_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    format: str = Query("json", pattern="^(json|ndjson|csv)$"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if start_date and end_date and end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must be >= start_date")
+
+    if format != "json":
+        # The streaming exports already run off the event loop on their own session
+        media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+        return StreamingResponse(
+            comparison._stream_compare_rows(organization_ids, clause_id, start_date, end_date, format),
+            media_type=media_type,
+        )
+
+    statement = comparison._filter_responses(
+        select(*comparison.compare_columns()), organization_ids, clause_id, start_date, end_date
+    )
+    return serialization.json_response(comparison.compare_rows((await db.execute(statement)).all()))
+
+
+def install(app):
+    """Replace the sync handlers on `app` with the async routes above"""
+    replaced = {(route.path, method) for route in router.routes for method in route.methods}
+    app.router.routes = [
+        route for route in app.router.routes
+        if not (isinstance(route, APIRoute) and any((route.path, method) in replaced for method in route.methods))
+    ]
+    app.include_router(router)
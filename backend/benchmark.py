@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Benchmark every API endpoint in-process and save the results as JSON.
+
+Each scenario is one endpoint (or one end-to-end flow such as an AI job)
+called repeatedly with randomized but seeded parameters. The report holds
+p50/p95/p99/mean latency in milliseconds, throughput and peak RSS (null
+where the platform has no `resource` module, e.g. Windows), plus
+enough metadata (git commit, row counts) to compare runs between commits:
+
+    python generate_data.py --responses 1000000
+    python benchmark.py --requests 200 --output before.json
+    # ...change something...
+    python benchmark.py --requests 200 --output after.json --compare before.json
+
+The AI endpoints run against the offline stub model (GEMINI_MODEL=local-stub)
+with a throwaway result cache, so no API key or network access is needed.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Callable, NamedTuple, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Must be set before ai_compare/ai_cache read them at import time
+os.environ["GEMINI_MODEL"] = "local-stub"
+os.environ.setdefault("AI_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "ai_cache.db"))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+
+from ai_cache import comparison_cache
+from app import app
+from database import SessionLocal
+import crud
+import models
+import versions
+
+MARKER = "benchmark"
+
+
+class Scenario(NamedTuple):
+    name: str
+    call: Callable  # (client, rng, ids) -> httpx.Response
+    setup: Callable = None  # untimed, runs before every call
+
+
+class Ids(NamedTuple):
+    organizations: list
+    clauses: list
+    questions: list
+    responses: list
+    sample_response: dict
+    first_date: date
+    last_date: date
+
+
+def percentile(samples, fraction: float) -> float:
+    """Nearest-rank percentile of an unsorted sample list"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def load_ids(sample_size: int = 1000) -> Ids:
+    db = SessionLocal()
+    try:
+        response = models.Response
+        first_date, last_date = db.query(func.min(response.date), func.max(response.date)).one()
+        sample = db.query(response).order_by(response.id).first()
+        return Ids(
+            organizations=[row[0] for row in db.query(models.Organization.id)],
+            clauses=[row[0] for row in db.query(models.Clause.id)],
+            questions=[row[0] for row in db.query(models.Question.id)],
+            responses=[row[0] for row in db.query(response.id).order_by(func.random()).limit(sample_size)],
+            sample_response=sample and {
+                "id": sample.id,
+                "organization_id": sample.organization_id,
+                "clause_id": sample.clause_id,
+                "question_id": sample.question_id,
+                "response_type": sample.response_type.value,
+                "comment": sample.comment,
+                "date": sample.date.isoformat(),
+            },
+            first_date=first_date or date.today(),
+            last_date=last_date or date.today(),
+        )
+    finally:
+        db.close()
+
+
+def table_counts() -> dict:
+    db = SessionLocal()
+    try:
+        return {
+            model.__tablename__: db.query(func.count(model.id)).scalar()
+            for model in (models.Organization, models.Clause, models.Question, models.Response)
+        }
+    finally:
+        db.close()
+
+
+def _date_window(rng: random.Random, ids: Ids):
+    span = max(1, (ids.last_date - ids.first_date).days)
+    start = ids.first_date + timedelta(days=rng.randrange(span))
+    return start.isoformat(), min(ids.last_date, start + timedelta(days=90)).isoformat()
+
+
+def _org_pair(rng: random.Random, ids: Ids):
+    return rng.sample(ids.organizations, 2) if len(ids.organizations) > 1 else ids.organizations * 2
+
+
+def _new_response(rng: random.Random, ids: Ids) -> dict:
+    return {
+        "organization_id": rng.choice(ids.organizations),
+        "clause_id": rng.choice(ids.clauses),
+        "question_id": rng.choice(ids.questions),
+        "response_type": rng.choice(["Yes", "No", "Not applicable"]),
+        "comment": MARKER,
+        "date": ids.last_date.isoformat(),
+    }
+
+
+def _create_then_delete(client, rng, ids):
+    created = client.post("/responses", json=_new_response(rng, ids))
+    client.delete(f"/responses/{created.json()['id']}")
+    return created
+
+
+def _new_name() -> str:
+    # Names are unique columns; the rows are removed again by _cleanup
+    return f"{MARKER}-{uuid.uuid4().hex}"
+
+
+def _new_organization(client, rng, ids):
+    return client.post("/organizations", json={"name": _new_name(), "year_of_association": 2020, "details": MARKER})
+
+
+def _new_clause(client, rng, ids):
+    return client.post("/clauses", json={"name": _new_name(), "title": MARKER})
+
+
+def _new_question(client, rng, ids):
+    return client.post("/questions", json={"text": _new_name(), "title": MARKER, "clause_id": rng.choice(ids.clauses)})
+
+
+def _rewrite_response(client, rng, ids):
+    """PUT a response back with its own values so the dataset does not drift"""
+    fields = dict(ids.sample_response)
+    return client.put(f"/responses/{fields.pop('id')}", json=fields)
+
+
+def _ai_job(client, rng, ids):
+    org1, org2 = _org_pair(rng, ids)
+    job = client.post("/ai/compare/jobs", json={"org1_id": org1, "org2_id": org2}).json()
+    while True:
+        status = client.get(f"/ai/compare/jobs/{job['id']}")
+        if status.json()["status"] in ("done", "failed"):
+            return status
+        time.sleep(0.005)
+
+
+def _bulk_rows(rng, ids):
+    return [dict(_new_response(rng, ids), comment=f"{MARKER}-bulk") for _ in range(100)]
+
+
+SCENARIOS = [
+    Scenario("GET /organizations", lambda c, r, i: c.get("/organizations")),
+    Scenario("GET /organizations/{id}", lambda c, r, i: c.get(f"/organizations/{r.choice(i.organizations)}")),
+    Scenario("GET /clauses", lambda c, r, i: c.get("/clauses")),
+    Scenario("GET /bootstrap", lambda c, r, i: c.get("/bootstrap")),
+    Scenario("GET /questions", lambda c, r, i: c.get("/questions", params={"clause_id": r.choice(i.clauses)})),
+    Scenario("GET /responses", lambda c, r, i: c.get("/responses", params={
+        "organization_id": r.choice(i.organizations), "limit": 100,
+    })),
+    Scenario("GET /responses (filtered)", lambda c, r, i: c.get("/responses", params=dict(zip(
+        ("start_date", "end_date"), _date_window(r, i)), clause_id=r.choice(i.clauses), limit=100,
+    ))),
+    Scenario("GET /responses (1000 rows)", lambda c, r, i: c.get("/responses", params={
+        "clause_id": r.choice(i.clauses), "limit": 1000,
+    })),
+    Scenario("POST+DELETE /responses", _create_then_delete),
+    Scenario("PUT /responses/{id}", _rewrite_response),
+    Scenario("POST /responses/bulk (100 rows)", lambda c, r, i: c.post(
+        "/responses/bulk", content="\n".join(json.dumps(row) for row in _bulk_rows(r, i)),
+        headers={"Content-Type": "application/x-ndjson"},
+    )),
+    Scenario("GET /chart-data/yes-no", lambda c, r, i: c.get("/chart-data/yes-no")),
+    Scenario("GET /chart-data/yes-no-comparison", lambda c, r, i: c.get(
+        "/chart-data/yes-no-comparison", params={"org_ids": r.sample(i.organizations, min(5, len(i.organizations)))},
+    )),
+    Scenario("GET /compare (json)", lambda c, r, i: c.get("/compare", params={
+        "organization_ids": _org_pair(r, i), "clause_id": r.choice(i.clauses),
+    })),
+    Scenario("GET /compare (csv)", lambda c, r, i: c.get("/compare", params={
+        "organization_ids": _org_pair(r, i), "clause_id": r.choice(i.clauses), "format": "csv",
+    })),
+    Scenario("GET /analytics/counts", lambda c, r, i: c.get("/analytics/counts", params=dict(
+        zip(("start_date", "end_date"), _date_window(r, i)), organization_ids=_org_pair(r, i),
+    ))),
+    Scenario("GET /analytics/matrix", lambda c, r, i: c.get("/analytics/matrix", params={"clause_id": r.choice(i.clauses)})),
+    Scenario("GET /analytics/similarity (top_k)", lambda c, r, i: c.get("/analytics/similarity", params={
+        "organization_id": r.choice(i.organizations), "top_k": 5,
+    })),
+    Scenario("GET /ai/compare (cold)", lambda c, r, i: c.get("/ai/compare", params=dict(
+        zip(("org1_id", "org2_id"), _org_pair(r, i)),
+    )), setup=lambda: comparison_cache.clear()),
+    Scenario("GET /ai/compare (cached)", lambda c, r, i: c.get("/ai/compare", params={
+        "org1_id": i.organizations[0], "org2_id": i.organizations[-1],
+    })),
+    Scenario("AI job (submit to done)", _ai_job, setup=lambda: comparison_cache.clear()),
+    # Last, so the rows they add do not grow the lists the read scenarios fetch
+    Scenario("POST /organizations", _new_organization),
+    Scenario("POST /clauses", _new_clause),
+    Scenario("POST /questions", _new_question),
+]
+
+
+def _cleanup():
+    """Remove the rows the write scenarios left behind"""
+    db = SessionLocal()
+    try:
+        ids = [row[0] for row in db.query(models.Response.id).filter(models.Response.comment == f"{MARKER}-bulk")]
+        crud.delete_responses_bulk(db, ids)
+        # There are no delete endpoints for reference data
+        db.query(models.Question).filter(models.Question.title == MARKER).delete()
+        db.query(models.Clause).filter(models.Clause.title == MARKER).delete()
+        db.query(models.Organization).filter(models.Organization.details == MARKER).delete()
+        versions.bump(db, "organizations", "clauses", "questions")
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_scenario(client, scenario: Scenario, ids: Ids, requests: int, concurrency: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    latencies = []
+    errors = 0
+
+    def one(_):
+        if scenario.setup:
+            scenario.setup()
+        began = time.perf_counter()
+        response = scenario.call(client, rng, ids)
+        return time.perf_counter() - began, response.status_code
+
+    # One untimed warm-up call so caches and connections are primed
+    one(None)
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for elapsed, status in pool.map(one, range(requests)):
+            latencies.append(elapsed * 1000)
+            errors += status >= 400
+    wall = time.perf_counter() - began
+    peak_rss = peak_rss_mb()
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "throughput_rps": round(requests / wall, 1),
+        "peak_rss_mb": peak_rss and round(peak_rss, 1),
+    }
+
+
+def run(requests: int = 100, concurrency: int = 1, seed: int = 42, only: str = None) -> dict:
+    ids = load_ids()
+    if not ids.organizations or not ids.questions or not ids.sample_response:
+        raise SystemExit("The database is empty; run generate_data.py or populate_db.py first")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "database": SessionLocal.kw["bind"].url.render_as_string(hide_password=True),
+            "async_db": os.getenv("USE_ASYNC_DB", "0"),
+            "requests": requests,
+            "concurrency": concurrency,
+            "seed": seed,
+            "rows": table_counts(),
+        },
+        "results": {},
+    }
+    with TestClient(app) as client:
+        try:
+            for scenario in SCENARIOS:
+                if only and only.lower() not in scenario.name.lower():
+                    continue
+                result = run_scenario(client, scenario, ids, requests, concurrency, seed)
+                report["results"][scenario.name] = result
+                print(f"{scenario.name:<38} p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+                      f"p99 {result['p99_ms']:>9.2f}ms  {result['throughput_rps']:>8.1f} req/s"
+                      f"{'  errors ' + str(result['errors']) if result['errors'] else ''}")
+        finally:
+            _cleanup()
+    return report
+
+
+def compare(report: dict, baseline: dict):
+    """Print the p50/p95/throughput change of every scenario against a saved run"""
+    print(f"\nAgainst {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')}):")
+    for name, result in report["results"].items():
+        before = baseline["results"].get(name)
+        if not before:
+            continue
+        changes = []
+        for metric in ("p50_ms", "p95_ms", "throughput_rps"):
+            if before[metric]:
+                changes.append(f"{metric} {100 * (result[metric] - before[metric]) / before[metric]:+6.1f}%")
+        print(f"{name:<38} " + "  ".join(changes))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100, help="timed requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", help="run only scenarios whose name contains this text")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", help="a previous --output file to diff against")
+    args = parser.parse_args()
+
+    report = run(args.requests, args.concurrency, args.seed, args.only)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
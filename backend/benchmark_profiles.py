@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Concurrent read/write throughput of the SQLite engine profiles (DB_PROFILE).
+
+Each profile gets its own copy of the database and a set of worker
+processes, the way several uvicorn workers would share one file: readers
+page through responses and run the comparison chart query, writers create and
+delete responses through crud. Reports operations per second, p95
+latency and "database is locked" failures per profile:
+
+    python benchmark_profiles.py --readers 6 --writers 2 --seconds 15
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy.engine import make_url
+
+PROFILES = ("default", "production")
+
+
+def _worker(role: str, database_url: str, profile: str, seconds: float, seed: int, results):
+    # Configure before `database` builds its engines
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["DB_PROFILE"] = profile
+    from sqlalchemy.exc import OperationalError
+    import charts
+    import crud
+    from database import ReadSessionLocal, SessionLocal
+
+    rng = random.Random(seed)
+    db = ReadSessionLocal()
+    try:
+        org_ids = [org.id for org in crud.get_organizations(db)]
+        questions = [(question.id, question.clause_id) for question in crud.get_questions(db)]
+    finally:
+        db.close()
+
+    latencies, locked, other = [], 0, 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        began = time.perf_counter()
+        try:
+            if role == "reader":
+                db = ReadSessionLocal()
+                try:
+                    question_id, clause_id = rng.choice(questions)
+                    crud.get_responses(db, organization_id=rng.choice(org_ids), clause_id=clause_id, limit=100)
+                    db.execute(charts.yes_no_comparison_query(rng.sample(org_ids, 2), clause_id)).all()
+                finally:
+                    db.close()
+            else:
+                question_id, clause_id = rng.choice(questions)
+                db = SessionLocal()
+                try:
+                    created = crud.create_response(db, {
+                        "organization_id": rng.choice(org_ids),
+                        "clause_id": clause_id,
+                        "question_id": question_id,
+                        "response_type": "Yes",
+                        "date": date.today(),
+                    })
+                    crud.delete_response(db, created.id)
+                finally:
+                    db.close()
+            latencies.append(time.perf_counter() - began)
+        except OperationalError as e:
+            if "locked" in str(e):
+                locked += 1
+            else:
+                other += 1
+    results.put((role, latencies, locked, other))
+
+
+def _copy_database(source: str, target: str):
+    """Consistent copy via the backup API (also folds in any pending WAL)"""
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        src.backup(dst)
+
+
+def run_profile(profile: str, source: str, readers: int, writers: int, seconds: float) -> dict:
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, "bench.db")
+        _copy_database(source, path)
+        database_url = f"sqlite:///{path}"
+        if profile == "production":
+            # WAL is persistent; switch it on up front, as the writer engine would on first connect
+            with sqlite3.connect(path) as connection:
+                connection.execute("PRAGMA journal_mode=WAL")
+
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        roles = ["reader"] * readers + ["writer"] * writers
+        processes = [
+            context.Process(target=_worker, args=(role, database_url, profile, seconds, seed, results))
+            for seed, role in enumerate(roles)
+        ]
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {}
+    for role in ("reader", "writer"):
+        latencies = sorted(l for r, ls, _, _ in collected if r == role for l in ls)
+        report[role + "s"] = {
+            "processes": roles.count(role),
+            "operations": len(latencies),
+            "ops_per_second": round(len(latencies) / seconds, 1),
+            "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 2) if latencies else None,
+            "locked_errors": sum(locked for r, _, locked, _ in collected if r == role),
+            "other_errors": sum(other for r, _, _, other in collected if r == role),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--output", default="benchmark_profiles.json")
+    args = parser.parse_args()
+
+    url = make_url(os.getenv("DATABASE_URL", "sqlite:///./ncert.db"))
+    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+        raise SystemExit("benchmark_profiles.py needs a file-backed SQLite DATABASE_URL")
+
+    report = {"readers": args.readers, "writers": args.writers, "seconds": args.seconds, "profiles": {}}
+    for profile in PROFILES:
+        result = run_profile(profile, url.database, args.readers, args.writers, args.seconds)
+        report["profiles"][profile] = result
+        for role, stats in result.items():
+            print(f"{profile:<11} {role:<8} {stats['ops_per_second']:>9.1f} ops/s  p95 {stats['p95_ms']} ms  "
+                  f"locked {stats['locked_errors']}  other errors {stats['other_errors']}")
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {args.output}")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Serialization cost of a /responses page: the response_model path against the fast path.
+
+For each page size the same rows are fetched and encoded both ways:
+
+    model: ORM objects -> pydantic validation -> JSON-mode dump -> json.dumps
+           (what FastAPI does for a route returning ORM rows with a response_model)
+    fast:  column tuples -> dicts -> serialization.dumps (orjson when installed)
+
+and the fast payload is compressed with every encoding CompressionMiddleware
+can negotiate. Run it against a generated database:
+
+    python generate_data.py --responses 100000
+    python benchmark_serialization.py --sizes 100 1000 10000 50000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pydantic import TypeAdapter
+
+import crud
+import models
+import schemas
+import serialization
+from database import ReadSessionLocal
+
+RESPONSE_LIST = TypeAdapter(list[schemas.Response])
+
+
+def model_path(db, limit: int) -> bytes:
+    rows = db.query(models.Response).order_by(models.Response.id).limit(limit).all()
+    content = RESPONSE_LIST.dump_python(RESPONSE_LIST.validate_python(rows, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def fast_path(db, limit: int) -> bytes:
+    rows = db.execute(crud.responses_statement(limit=limit)).all()
+    return serialization.dumps(serialization.records(rows, schemas.Response))
+
+
+def _time(fn, repeat: int) -> tuple[float, object]:
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - began)
+    return round(statistics.median(timings) * 1000, 2), result
+
+
+def run(sizes: list[int], repeat: int) -> dict:
+    report = {"encoder": "orjson" if serialization.orjson else "json", "sizes": {}}
+    db = ReadSessionLocal()
+    try:
+        for size in sizes:
+            # Fresh session state each round, so the model path pays for ORM object construction every time
+            model_ms, model_body = _time(lambda: (db.expunge_all(), model_path(db, size))[1], repeat)
+            fast_ms, fast_body = _time(lambda: fast_path(db, size), repeat)
+            if json.loads(model_body) != json.loads(fast_body):
+                raise SystemExit(f"Payloads differ at {size} rows")
+            result = {
+                "rows": len(json.loads(fast_body)),
+                "model_ms": model_ms,
+                "fast_ms": fast_ms,
+                "speedup": round(model_ms / fast_ms, 2) if fast_ms else None,
+                "bytes": len(fast_body),
+            }
+            for encoding, encoder in serialization.ENCODERS.items():
+                compress_ms, compressed = _time(lambda: encoder().finish(fast_body), repeat)
+                result[f"{encoding}_bytes"] = len(compressed)
+                result[f"{encoding}_ms"] = compress_ms
+            report["sizes"][size] = result
+            compressed = "  ".join(
+                f"{encoding} {result[f'{encoding}_bytes']:>9} B in {result[f'{encoding}_ms']:>6.2f}ms"
+                for encoding in serialization.ENCODERS
+            )
+            print(f"{result['rows']:>7} rows  model {model_ms:>8.2f}ms  fast {fast_ms:>8.2f}ms  "
+                  f"x{result['speedup']:<5}  {result['bytes']:>10} B  {compressed}")
+    finally:
+        db.close()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="benchmark_serialization.json")
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.repeat)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {args.output}")
@@ -0,0 +1,106 @@
+"""
+All reference data in one request, for the pages that need organizations,
+clauses and questions before they can render.
+
+The encoded payload is built once per combination of reference table
+versions and kept in memory alongside its compressed forms, so a request
+costs a dict lookup and no query or serialization until one of the tables
+changes. Its version token doubles as the ETag, suffixed with the content
+coding when the body is compressed.
+"""
+import threading
+from itertools import groupby
+from typing import NamedTuple, Optional
+
+from fastapi import APIRouter, Depends, Request
+from fastapi import Response as HTTPResponse
+from sqlalchemy.orm import Session
+
+import crud
+import serialization
+import versions
+from database import ReadSessionLocal
+
+router = APIRouter()
+
+BOOTSTRAP_TABLES = ("organizations", "clauses", "questions")
+
+
+def get_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class BootstrapBlob(NamedTuple):
+    built_from: tuple  # reference table versions
+    version: str
+    bodies: dict  # content encoding (None for identity) -> bytes
+
+
+_blob: Optional[BootstrapBlob] = None
+_blob_lock = threading.Lock()
+
+
+def build(snapshots: dict, version: str) -> bytes:
+    """Encode the payload; questions are grouped by clause and drop their repeated clause_id"""
+    questions = sorted(snapshots["questions"].rows, key=lambda question: (question.clause_id, question.id))
+    return serialization.dumps({
+        "version": version,
+        "organizations": [org.model_dump() for org in snapshots["organizations"].rows],
+        "clauses": [clause.model_dump() for clause in snapshots["clauses"].rows],
+        "questions": [
+            {
+                "clause_id": clause_id,
+                "questions": [question.model_dump(exclude={"clause_id"}) for question in group],
+            }
+            for clause_id, group in groupby(questions, key=lambda question: question.clause_id)
+        ],
+    })
+
+
+def blob(db: Session) -> BootstrapBlob:
+    """The current payload, rebuilt only when a reference table version moved"""
+    global _blob
+    snapshots = {table: crud.reference_snapshot(db, table) for table in BOOTSTRAP_TABLES}
+    built_from = tuple(snapshots[table].version for table in BOOTSTRAP_TABLES)
+    current = _blob
+    if current and current.built_from == built_from:
+        return current
+    version = versions.token(dict(zip(BOOTSTRAP_TABLES, built_from)), *BOOTSTRAP_TABLES)
+    fresh = BootstrapBlob(built_from, version, {None: build(snapshots, version)})
+    with _blob_lock:
+        _blob = fresh
+    return fresh
+
+
+def encoded(current: BootstrapBlob, encoding: Optional[str]) -> bytes:
+    """The body in `encoding`, compressed on first use and kept with the blob"""
+    body = current.bodies.get(encoding)
+    if body is None:
+        body = serialization.ENCODERS[encoding]().finish(current.bodies[None])
+        current.bodies[encoding] = body
+    return body
+
+
+@router.get("/bootstrap")
+def get_bootstrap(request: Request, db: Session = Depends(get_db)):
+    """Organizations, clauses and questions (grouped by clause) plus a combined version token.
+
+    The token is also the ETag: clients revalidating with If-None-Match get
+    a 304 until any of the three tables changes.
+    """
+    current = blob(db)
+    headers = {"ETag": f'"{current.version}"', "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if serialization.etag_matches(request.headers.get("if-none-match", ""), headers["ETag"]):
+        return HTTPResponse(status_code=304, headers=headers)
+
+    encoding = serialization.negotiate(request.headers.get("accept-encoding", ""))
+    if len(current.bodies[None]) < serialization.COMPRESS_MIN_BYTES:
+        encoding = None
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        headers["ETag"] = serialization.encoded_etag(headers["ETag"], encoding)
+    return HTTPResponse(encoded(current, encoding), media_type="application/json", headers=headers)
@@ -0,0 +1,112 @@
+"""
+Query builders and result shaping for the yes/no chart endpoints.
+
+The statements are plain `select()` constructs so the sync handlers in
+app.py and the async ones in async_api.py run exactly the same SQL. They
+only touch the rollup and current-answer tables: organization names and
+question totals come from crud's in-process reference snapshots.
+"""
+from sqlalchemy import select, func, case
+from fastapi import HTTPException
+from typing import Optional
+from datetime import date
+import models
+import current_answers
+
+COMPARISON_LABELS = ["Yes", "No", "Not Applicable", "No Response"]
+
+
+def yes_no_totals_query():
+    """Yes/No/Not applicable totals per organization, read from the rollup table"""
+    rollup = models.ResponseRollup
+    return select(
+        rollup.organization_id,
+        func.sum(rollup.yes_count),
+        func.sum(rollup.no_count),
+        func.sum(rollup.not_applicable_count),
+    ).group_by(
+        rollup.organization_id
+    ).order_by(
+        rollup.organization_id
+    )
+
+
+def yes_no_chart(rows, organizations):
+    """`organizations` maps id -> organization (a reference snapshot's by_id)"""
+    chart_data = []
+    for org_id, yes_count, no_count, not_applicable_count in rows:
+        org = organizations.get(org_id)
+        total = (yes_count or 0) + (no_count or 0) + (not_applicable_count or 0)
+        if org and total > 0:  # Only include organizations with responses
+            chart_data.append({
+                "name": org.name,
+                "Yes": yes_count or 0,
+                "No": no_count or 0,
+                "Not applicable": not_applicable_count or 0,
+                "Total": total
+            })
+    return chart_data
+
+
+def comparison_org_ids(org1_id: Optional[int], org2_id: Optional[int], org_ids: Optional[list[int]]):
+    """Merge the pair and list forms of the comparison parameters, keeping order"""
+    requested = list(org_ids or [])
+    requested += [org_id for org_id in (org1_id, org2_id) if org_id is not None]
+    requested = list(dict.fromkeys(requested))
+    if not requested:
+        raise HTTPException(status_code=400, detail="Provide org1_id and org2_id or one or more org_ids")
+    return requested
+
+
+def yes_no_comparison_query(
+    org_ids: list[int],
+    clause_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+):
+    """Per-organization Yes/No/Not applicable/answered counts in one grouped query.
+
+    Each question counts once, by the organization's latest answer: plain
+    counts over `current_answers` (or, with `end_date`, over the latest
+    answers as of that day). Organizations without matching rows simply do
+    not appear.
+    """
+    current = current_answers.as_of(end_date, org_ids, clause_id)
+    statement = select(
+        current.c.organization_id,
+        answers_of(current, models.ResponseType.YES),
+        answers_of(current, models.ResponseType.NO),
+        answers_of(current, models.ResponseType.NOT_APPLICABLE),
+        func.count(),
+    ).where(
+        current.c.organization_id.in_(org_ids)
+    )
+    if clause_id:
+        statement = statement.where(current.c.clause_id == clause_id)
+    if start_date:
+        statement = statement.where(current.c.date >= start_date)
+    return statement.group_by(current.c.organization_id)
+
+
+def answers_of(current, response_type: models.ResponseType):
+    return func.count(case((current.c.response_type == response_type, 1)))
+
+
+def yes_no_comparison_chart(rows, requested: list[int], organizations, total_questions: int):
+    """Chart rows for `requested` org ids, in order; 404 if any is unknown"""
+    if any(org_id not in organizations for org_id in requested):
+        raise HTTPException(status_code=404, detail="One or more organizations not found")
+
+    counts = {org_id: (yes, no, not_applicable, answered) for org_id, yes, no, not_applicable, answered in rows}
+    columns = []
+    for org_id in requested:
+        yes, no, not_applicable, answered = counts.get(org_id, (0, 0, 0, 0))
+        columns.append((organizations[org_id].name, yes, no, not_applicable, max(0, total_questions - answered)))
+
+    chart_data = []
+    for index, label in enumerate(COMPARISON_LABELS, start=1):
+        row = {"name": label}
+        for column in columns:
+            row[column[0]] = column[index]
+        chart_data.append(row)
+    return chart_data
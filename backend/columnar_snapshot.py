@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Columnar snapshot files: `responses` plus the reference tables in one file
+that loads by memory-mapping, for offline reporting and backups.
+
+Layout (little-endian):
+    magic    b"NCSNAP1\\n"
+    u64      header length
+    header   UTF-8 JSON: row count, reference table rows, and for every
+             block its dtype, offset, length and base
+    blocks   one fixed-width array per column, each 64-byte aligned
+
+Integer columns are stored frame-of-reference (value - base) in the
+narrowest unsigned type that fits, so ids and dates usually take 4 and 2
+bytes and organization, clause, question and response type 1-2 each.
+Comments are dictionary-encoded: a code per row (-1 for none) plus the
+distinct strings as one UTF-8 block and an offsets block. Loading reads the
+header and wraps each block in a NumPy view over the mapping; no row is
+parsed or copied until a column is decoded.
+
+Importing goes through `crud.insert_responses`, the bulk insert path, so
+rollups, current answers, search and versions are maintained exactly as for
+any other write. The whole import is one transaction: if it fails, the
+database is left empty and the import can be re-run.
+
+    python columnar_snapshot.py export responses.ncs
+    python columnar_snapshot.py info responses.ncs
+    DATABASE_URL=sqlite:///./restored.db python columnar_snapshot.py import responses.ncs
+"""
+import argparse
+import json
+import mmap
+import os
+import sys
+import time
+from datetime import date, datetime, timezone
+from typing import Optional
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from sqlalchemy import case, insert, select
+from sqlalchemy.orm import Session
+
+import analytics
+import crud
+import versions
+from models import Response
+
+MAGIC = b"NCSNAP1\n"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+EXPORT_CHUNK_SIZE = 100_000
+IMPORT_CHUNK_SIZE = 10_000
+# Per-row integer columns, in file order; response_type holds analytics.RESPONSE_CODES
+COLUMNS = ("id", "organization_id", "clause_id", "question_id", "response_type", "date", "comment")
+NO_COMMENT = -1
+RESPONSE_TYPES = list(analytics.RESPONSE_CODES)
+
+
+def _narrow(values: np.ndarray):
+    """(base, values - base in the narrowest unsigned dtype that holds them)"""
+    if not len(values):
+        return 0, values.astype(np.uint8)
+    base = int(values.min())
+    span = int(values.max()) - base
+    dtype = next(dtype for dtype in (np.uint8, np.uint16, np.uint32, np.uint64) if span <= np.iinfo(dtype).max)
+    return base, (values - base).astype(dtype)
+
+
+def write(path: str, columns: dict, comments: list, tables: dict, **meta) -> int:
+    """Write `columns` (name -> int64 array, see COLUMNS), the comment dictionary and reference rows.
+
+    The file is written next to `path` and renamed into place. Returns its size.
+    """
+    blocks = {}
+    for name in COLUMNS:
+        blocks[name] = _narrow(np.asarray(columns[name], dtype=np.int64))
+    encoded = [comment.encode() for comment in comments]
+    blocks["comment_text"] = (0, np.frombuffer(b"".join(encoded), dtype=np.uint8))
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    np.cumsum([len(text) for text in encoded], out=offsets[1:])
+    blocks["comment_offsets"] = (0, offsets)
+
+    rows = len(blocks["id"][1])
+    header = {"format": FORMAT_VERSION, "rows": rows, "comments": len(comments), "tables": tables, **meta, "blocks": {}}
+    # Offsets depend on the header length, which depends on the offsets: size it with a placeholder first
+    specs = {name: {"dtype": array.dtype.str, "length": len(array), "base": base} for name, (base, array) in blocks.items()}
+    placeholder = len(json.dumps(dict(header, blocks={name: dict(spec, offset=2 ** 62) for name, spec in specs.items()})).encode())
+    offset = len(MAGIC) + 8 + placeholder
+    for name, (_, array) in blocks.items():
+        offset += -offset % ALIGNMENT
+        header["blocks"][name] = dict(specs[name], offset=offset)
+        offset += array.nbytes
+    encoded_header = json.dumps(header).encode().ljust(placeholder)
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(encoded_header).to_bytes(8, "little"))
+        f.write(encoded_header)
+        for name, (_, array) in blocks.items():
+            f.write(b"\0" * (header["blocks"][name]["offset"] - f.tell()))
+            f.write(array.tobytes())
+    os.replace(temporary, path)
+    return os.path.getsize(path)
+
+
+def export(db: Session, path: str) -> int:
+    """Write every response and the reference tables to `path`; returns the row count"""
+    tables = {}
+    for table, (model, schema) in crud.REFERENCE_TABLES.items():
+        tables[table] = [schema.model_validate(row).model_dump() for row in db.query(model).order_by(model.id)]
+
+    code = case(
+        *((Response.response_type == response_type, value) for response_type, value in analytics.RESPONSE_CODES.items()),
+        else_=analytics.NO_ANSWER,
+    )
+    statement = select(
+        Response.id, Response.organization_id, Response.clause_id, Response.question_id, code, Response.date, Response.comment
+    ).order_by(Response.id)
+
+    chunks, dictionary = [], {}
+    for rows in db.execute(statement.execution_options(yield_per=EXPORT_CHUNK_SIZE)).partitions():
+        ids, orgs, clauses, questions, codes, dates, comments = zip(*rows)
+        chunks.append([
+            np.fromiter(ids, dtype=np.int64, count=len(rows)),
+            np.fromiter(orgs, dtype=np.int64, count=len(rows)),
+            np.fromiter(clauses, dtype=np.int64, count=len(rows)),
+            np.fromiter(questions, dtype=np.int64, count=len(rows)),
+            np.fromiter(codes, dtype=np.int64, count=len(rows)),
+            np.fromiter((day.toordinal() for day in dates), dtype=np.int64, count=len(rows)),
+            np.fromiter(
+                (NO_COMMENT if comment is None else dictionary.setdefault(comment, len(dictionary)) for comment in comments),
+                dtype=np.int64,
+                count=len(rows),
+            ),
+        ])
+    columns = {
+        name: np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        for name, parts in zip(COLUMNS, zip(*chunks) if chunks else [[]] * len(COLUMNS))
+    }
+    write(path, columns, list(dictionary), tables, exported_at=datetime.now(timezone.utc).isoformat(timespec="seconds"))
+    return len(columns["id"])
+
+
+class ColumnarSnapshot:
+    """A snapshot file mapped read-only; `raw` holds zero-copy views of the stored blocks"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a columnar snapshot")
+        length = int.from_bytes(self._buffer[len(MAGIC):len(MAGIC) + 8], "little")
+        self.header = json.loads(self._buffer[len(MAGIC) + 8:len(MAGIC) + 8 + length])
+        if self.header["format"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format {self.header['format']}")
+        self.tables = self.header["tables"]
+        self.raw = {
+            name: np.frombuffer(self._buffer, dtype=spec["dtype"], count=spec["length"], offset=spec["offset"])
+            for name, spec in self.header["blocks"].items()
+        }
+
+    def __len__(self):
+        return self.header["rows"]
+
+    def column(self, name: str, start: int = 0, stop: Optional[int] = None, dtype=np.int64) -> np.ndarray:
+        """Decoded values of rows [start, stop) of a column"""
+        values = self.raw[name][start:stop].astype(dtype)
+        values += self.header["blocks"][name]["base"]
+        return values
+
+    def comments(self) -> list:
+        """The comment dictionary; a row's `comment` column indexes into it"""
+        text, offsets = self.raw["comment_text"].tobytes(), self.raw["comment_offsets"].tolist()
+        return [text[begin:end].decode() for begin, end in zip(offsets, offsets[1:])]
+
+    def to_analytics(self) -> analytics.ResponseSnapshot:
+        """The rows as an analytics snapshot, for counts and answer matrices without a database"""
+        return analytics.ResponseSnapshot(
+            self.column("organization_id", dtype=np.int32),
+            self.column("clause_id", dtype=np.int32),
+            self.column("question_id", dtype=np.int32),
+            self.column("response_type", dtype=np.int8),
+            self.column("date", dtype=np.int32),
+            max_id=int(self.column("id", len(self) - 1)[0]) if len(self) else 0,
+            built_from=None,
+        )
+
+
+def import_snapshot(db: Session, snapshot: ColumnarSnapshot, chunk_size: int = IMPORT_CHUNK_SIZE, verbose: bool = False) -> int:
+    """Load a snapshot into an empty database, keeping every id; returns the number of responses.
+
+    Everything is written in one transaction: an import that fails partway
+    rolls back and leaves the database empty, so it can simply be retried.
+    """
+    if db.query(Response.id).first() or any(db.query(model.id).first() for model, _ in crud.REFERENCE_TABLES.values()):
+        raise ValueError("The target database is not empty; import a snapshot into a fresh database")
+
+    comments = snapshot.comments() + [None]  # NO_COMMENT (-1) picks the last entry
+    inserted = 0
+    try:
+        for table, (model, _) in crud.REFERENCE_TABLES.items():
+            if snapshot.tables[table]:
+                db.execute(insert(model.__table__), snapshot.tables[table])
+                versions.bump(db, table)
+        for start in range(0, len(snapshot), chunk_size):
+            stop = min(start + chunk_size, len(snapshot))
+            ids, orgs, clauses, questions, codes, ordinals, comment_codes = (
+                snapshot.column(name, start, stop).tolist() for name in COLUMNS
+            )
+            days = {ordinal: date.fromordinal(ordinal) for ordinal in set(ordinals)}
+            inserted += crud.insert_responses(db, [
+                {
+                    "id": row_id,
+                    "organization_id": org_id,
+                    "clause_id": clause_id,
+                    "question_id": question_id,
+                    "response_type": RESPONSE_TYPES[code],
+                    "date": days[ordinal],
+                    "comment": comments[comment],
+                }
+                for row_id, org_id, clause_id, question_id, code, ordinal, comment in zip(
+                    ids, orgs, clauses, questions, codes, ordinals, comment_codes
+                )
+            ])
+            if verbose:
+                print(f"  {inserted:,} / {len(snapshot):,} responses", end="\r", flush=True)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return inserted
+
+
+def describe(path: str) -> str:
+    began = time.perf_counter()
+    snapshot = ColumnarSnapshot(path)
+    loaded = time.perf_counter() - began
+    size = os.path.getsize(path)
+    lines = [
+        f"{path}: {len(snapshot):,} responses, {snapshot.header['comments']:,} distinct comments, "
+        f"{size:,} bytes ({size / max(len(snapshot), 1):.1f} bytes/row), mapped in {loaded * 1000:.2f}ms",
+    ]
+    lines += [f"  {table}: {len(rows):,} rows" for table, rows in snapshot.tables.items()]
+    lines += [
+        f"  {name}: {spec['dtype']} base {spec['base']}"
+        for name, spec in snapshot.header["blocks"].items() if name in COLUMNS
+    ]
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("export", help="write the database to a snapshot file").add_argument("path")
+    commands.add_parser("info", help="describe a snapshot file").add_argument("path")
+    importer = commands.add_parser("import", help="load a snapshot into a fresh DATABASE_URL")
+    importer.add_argument("path")
+    importer.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    from database import ReadSessionLocal, SessionLocal, init_db
+
+    began = time.perf_counter()
+    if args.command == "export":
+        db = ReadSessionLocal()
+        try:
+            rows = export(db, args.path)
+        finally:
+            db.close()
+        print(f"Exported {rows:,} responses in {time.perf_counter() - began:.1f}s")
+        print(describe(args.path))
+    elif args.command == "info":
+        print(describe(args.path))
+    else:
+        init_db()
+        db = SessionLocal()
+        try:
+            rows = import_snapshot(db, ColumnarSnapshot(args.path), args.chunk_size, verbose=True)
+        except ValueError as e:
+            sys.exit(str(e))
+        finally:
+            db.close()
+        elapsed = time.perf_counter() - began
+        print(f"Imported {rows:,} responses in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
@@ -1,48 +1,102 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from database import SessionLocal
-from models import Response, Organization, Clause, Question
+from database import ReadSessionLocal
+from models import Response
 from typing import List, Optional  # Added import for Optional
 from datetime import date
+import csv
+import io
+import serialization
 
 router = APIRouter()
 
 def get_db():
-    db = SessionLocal()
+    db = ReadSessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+COMPARE_FIELDS = ["organization_id", "clause_id", "question_id", "response_type", "comment", "date"]
+STREAM_CHUNK_SIZE = 1000
+
+def compare_columns():
+    return [getattr(Response, field) for field in COMPARE_FIELDS]
+
+def _filter_responses(query, organization_ids, clause_id, start_date, end_date):
+    if organization_ids:
+        query = query.filter(Response.organization_id.in_(organization_ids))
+    if clause_id:
+        query = query.filter(Response.clause_id == clause_id)
+    if start_date:
+        query = query.filter(Response.date >= start_date)
+    if end_date:
+        query = query.filter(Response.date <= end_date)
+    return query
+
+def _csv_chunk(rows, header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(COMPARE_FIELDS)
+    for org_id, cl_id, q_id, response_type, comment, day in rows:
+        writer.writerow([org_id, cl_id, q_id, response_type.value if response_type else None, comment, day.isoformat()])
+    return buffer.getvalue()
+
+def _ndjson_chunk(rows) -> bytes:
+    """One JSON object per line, encoded like the JSON list (enum by value, date as ISO)"""
+    return b"".join(serialization.dumps(row) + b"\n" for row in compare_rows(rows))
+
+def _stream_compare_rows(organization_ids, clause_id, start_date, end_date, fmt):
+    """Yield encoded rows chunk by chunk, fetching only the exported columns.
+
+    Opens its own session: the request-scoped one is closed before a
+    StreamingResponse body is consumed.
+    """
+    db = ReadSessionLocal()
+    try:
+        query = db.query(*compare_columns()).order_by(Response.id)
+        query = _filter_responses(query, organization_ids, clause_id, start_date, end_date)
+        rows = query.execution_options(yield_per=STREAM_CHUNK_SIZE)
+
+        encode = _csv_chunk if fmt == "csv" else _ndjson_chunk
+        if fmt == "csv":
+            yield _csv_chunk([], header=True)
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == STREAM_CHUNK_SIZE:
+                yield encode(chunk)
+                chunk = []
+        if chunk:
+            yield encode(chunk)
+    finally:
+        db.close()
+
 @router.get("/compare")
 def compare_surveys(
     organization_ids: Optional[List[int]] = Query(None),
     clause_id: Optional[int] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    format: str = Query("json", pattern="^(json|ndjson|csv)$"),
     db: Session = Depends(get_db)
 ):
     if start_date and end_date and end_date < start_date:
         raise HTTPException(status_code=400, detail="end_date must be >= start_date")
 
-    query = db.query(Response)
-    if organization_ids:
-        query = query.filter(Response.organization_id.in_(organization_ids))
-    if clause_id:
-        query = query.filter(Response.clause_id == clause_id)
-    if start_date:
-        query = query.filter(Response.date >= start_date)
-    if end_date:
-        query = query.filter(Response.date <= end_date)
+    if format != "json":
+        media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+        return StreamingResponse(
+            _stream_compare_rows(organization_ids, clause_id, start_date, end_date, format),
+            media_type=media_type,
+        )
+
+    query = _filter_responses(db.query(*compare_columns()), organization_ids, clause_id, start_date, end_date)
+
+    return serialization.json_response(compare_rows(query.all()))
 
-    results = query.all()
-    return [
-        {
-            "organization_id": r.organization_id,
-            "clause_id": r.clause_id,
-            "question_id": r.question_id,
-            "response_type": r.response_type.value if r.response_type else None,
-            "comment": r.comment,
-            "date": r.date
-        } for r in results
-    ]
\ No newline at end of file
+def compare_rows(results):
+    """compare_columns() rows as dicts; the JSON encoder writes the enum by value and the date as ISO"""
+    return [dict(zip(COMPARE_FIELDS, row)) for row in results]
\ No newline at end of file
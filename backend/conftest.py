@@ -0,0 +1,50 @@
+import os
+import tempfile
+from datetime import date
+
+# Point every test at a throwaway database before `database` creates its engine
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def seeded_db():
+    """Three organizations, two clauses with one question each, and their responses"""
+    from database import SessionLocal, init_db
+    import crud
+
+    init_db()
+    db = SessionLocal()
+    try:
+        if not crud.get_organizations(db, limit=1):
+            for i in range(1, 4):
+                crud.create_organization(db, {"name": f"Org {i}", "year_of_association": 2020})
+            for i in range(1, 3):
+                crud.create_clause(db, {"name": f"clause_{i}", "title": f"Clause {i}"})
+                crud.create_question(db, {"text": f"Question {i}?", "title": f"Q{i}", "clause_id": i})
+            crud.ingest_responses(db, [
+                {
+                    "organization_id": org_id,
+                    "clause_id": question_id,
+                    "question_id": question_id,
+                    "response_type": "Yes" if (org_id + question_id) % 2 else "No",
+                    "date": date(2024, 1, org_id),
+                }
+                for org_id in range(1, 4)
+                for question_id in range(1, 3)
+            ])
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def db(seeded_db):
+    """A read/write session on the seeded database"""
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
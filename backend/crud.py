@@ -1,58 +1,287 @@
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
-import models, schemas
+from pydantic import BaseModel, ValidationError
+import models, schemas, rollups, versions, current_answers, live
 from datetime import date
+from types import MappingProxyType
+from typing import NamedTuple
+import threading
 
-def get_organizations(db: Session):
-    return db.query(models.Organization).all()
+def _keyset(query, model, after_id: int = None, limit: int = None):
+    """Order by primary key and resume after the last seen id (keyset pagination)"""
+    query = query.order_by(model.id)
+    if after_id is not None:
+        query = query.filter(model.id > after_id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def _as_dict(data) -> dict:
+    return data.model_dump() if isinstance(data, BaseModel) else dict(data)
+
+class ReferenceSnapshot(NamedTuple):
+    """Immutable copy of a reference table, valid for one table version"""
+    version: int
+    rows: tuple
+    by_id: MappingProxyType
+
+REFERENCE_TABLES = {
+    "organizations": (models.Organization, schemas.Organization),
+    "clauses": (models.Clause, schemas.Clause),
+    "questions": (models.Question, schemas.Question),
+}
+
+_reference_cache = {}
+_reference_lock = threading.Lock()
+
+def reference_snapshot(db: Session, table: str) -> ReferenceSnapshot:
+    """Process-local snapshot of a reference table, reloaded when its version changes.
+
+    Versions are bumped by the create_* functions below and re-checked across
+    workers through versions.current(), so a warm snapshot costs no query. A
+    reload stamps each row with the table's version in the same statement:
+    `db`'s transaction may be older than versions.current(), and the snapshot
+    must carry the version its rows were actually read at.
+    """
+    snapshot = _reference_cache.get(table)
+    if snapshot and snapshot.version >= versions.current().get(table, 0):
+        return snapshot
+    model, schema = REFERENCE_TABLES[table]
+    version_column = select(models.TableVersion.version).where(models.TableVersion.name == table).scalar_subquery()
+    result = db.execute(select(version_column, model).order_by(model.id)).all()
+    version = result[0][0] if result else db.execute(select(version_column)).scalar() or 0
+    rows = tuple(schema.model_validate(row) for _, row in result)
+    snapshot = ReferenceSnapshot(version, rows, MappingProxyType({row.id: row for row in rows}))
+    with _reference_lock:
+        cached = _reference_cache.get(table)
+        if not cached or cached.version <= version:
+            _reference_cache[table] = snapshot
+    return snapshot
+
+def _page(rows, after_id: int = None, limit: int = None):
+    """Keyset pagination over a snapshot already ordered by id"""
+    if after_id is not None:
+        rows = [row for row in rows if row.id > after_id]
+    return list(rows[:limit] if limit is not None else rows)
+
+def question_count(db: Session, clause_id: int = None) -> int:
+    questions = reference_snapshot(db, "questions").rows
+    if clause_id:
+        return sum(1 for question in questions if question.clause_id == clause_id)
+    return len(questions)
+
+def get_organizations(db: Session, after_id: int = None, limit: int = None):
+    return _page(reference_snapshot(db, "organizations").rows, after_id, limit)
 
 def get_organization(db: Session, org_id: int):
-    return db.query(models.Organization).filter(models.Organization.id == org_id).first()
+    return reference_snapshot(db, "organizations").by_id.get(org_id)
 
 def create_organization(db: Session, org_data: dict):
-    db_org = models.Organization(**org_data)
+    db_org = models.Organization(**_as_dict(org_data))
     db.add(db_org)
+    versions.bump(db, "organizations")
     db.commit()
     db.refresh(db_org)
     return db_org
 
-def get_clauses(db: Session):
-    return db.query(models.Clause).all()
+def get_clauses(db: Session, after_id: int = None, limit: int = None):
+    return _page(reference_snapshot(db, "clauses").rows, after_id, limit)
 
 def create_clause(db: Session, clause_data: dict):
-    db_clause = models.Clause(**clause_data)
+    db_clause = models.Clause(**_as_dict(clause_data))
     db.add(db_clause)
+    versions.bump(db, "clauses")
     db.commit()
     db.refresh(db_clause)
     return db_clause
 
-def get_questions(db: Session):
-    return db.query(models.Question).all()
+def get_questions(db: Session, clause_id: int = None, after_id: int = None, limit: int = None):
+    questions = reference_snapshot(db, "questions").rows
+    if clause_id:
+        questions = tuple(question for question in questions if question.clause_id == clause_id)
+    return _page(questions, after_id, limit)
 
 def create_question(db: Session, question_data: dict):
-    db_question = models.Question(**question_data)
+    db_question = models.Question(**_as_dict(question_data))
     db.add(db_question)
+    versions.bump(db, "questions")
     db.commit()
     db.refresh(db_question)
     return db_question
 
-def get_responses(db: Session, organization_id: int = None):
-    query = db.query(models.Response)
+def filter_responses(
+    query,
+    organization_id: int = None,
+    clause_id: int = None,
+    question_id: int = None,
+    response_type: str = None,
+    start_date: date = None,
+    end_date: date = None,
+):
+    """Apply the /responses filters to a Query or select() over models.Response"""
     if organization_id:
         query = query.filter(models.Response.organization_id == organization_id)
-    return query.all()
+    if clause_id:
+        query = query.filter(models.Response.clause_id == clause_id)
+    if question_id:
+        query = query.filter(models.Response.question_id == question_id)
+    if response_type:
+        query = query.filter(models.Response.response_type == models.ResponseType(response_type))
+    if start_date:
+        query = query.filter(models.Response.date >= start_date)
+    if end_date:
+        query = query.filter(models.Response.date <= end_date)
+    return query
+
+def responses_statement(
+    organization_id: int = None,
+    clause_id: int = None,
+    question_id: int = None,
+    response_type: str = None,
+    start_date: date = None,
+    end_date: date = None,
+    after_id: int = None,
+    limit: int = None,
+):
+    """A /responses page as named column tuples: no ORM objects to build for read-only listings"""
+    columns = [getattr(models.Response, field) for field in schemas.Response.model_fields]
+    statement = filter_responses(
+        select(*columns), organization_id, clause_id, question_id, response_type, start_date, end_date
+    )
+    return _keyset(statement, models.Response, after_id, limit)
+
+def get_responses(
+    db: Session,
+    organization_id: int = None,
+    clause_id: int = None,
+    question_id: int = None,
+    response_type: str = None,
+    start_date: date = None,
+    end_date: date = None,
+    after_id: int = None,
+    limit: int = None,
+):
+    return db.execute(responses_statement(
+        organization_id, clause_id, question_id, response_type, start_date, end_date, after_id, limit
+    )).all()
+
+def _response_fields(response_data) -> dict:
+    """Accept a ResponseCreate schema or a plain dict and return column values"""
+    if isinstance(response_data, schemas.ResponseCreate):
+        return _response_row(response_data)
+    fields = dict(response_data)
+    if "response_type" in fields:
+        fields["response_type"] = models.ResponseType(getattr(fields["response_type"], "value", fields["response_type"]))
+    return fields
 
 def create_response(db: Session, response_data: dict):
-    db_response = models.Response(**response_data)
+    db_response = models.Response(**_response_fields(response_data))
     db.add(db_response)
+    db.flush()
+    rollups.apply(db, [db_response])
+    live.stage(db, [db_response])
+    current_answers.apply(db, [db_response])
+    versions.bump(db, "responses")
     db.commit()
     db.refresh(db_response)
     return db_response
 
+BULK_CHUNK_SIZE = 1000
+
+def _response_row(item) -> dict:
+    """Validate a raw response (dict or schema) into a row ready for insert"""
+    if not isinstance(item, schemas.ResponseCreate):
+        item = schemas.ResponseCreate.model_validate(item)
+    row = item.model_dump()
+    row["response_type"] = models.ResponseType(item.response_type.value)
+    return row
+
+def insert_responses(db: Session, responses_data: list[dict]) -> int:
+    """Insert response rows with a single executemany and maintain the projections; does not commit.
+
+    Rows either all carry their `id` (snapshot imports) or all leave it to the database.
+    """
+    if not responses_data:
+        return 0
+    table = models.Response.__table__
+    if "id" in responses_data[0]:
+        # Nothing to read back: a plain executemany (RETURNING would go row by row here)
+        db.execute(insert(table), responses_data)
+        ids = [row["id"] for row in responses_data]
+    else:
+        # Core (not ORM) insert: one insertmanyvalues batch per ~1000 rows, ids in input order
+        ids = db.execute(
+            insert(table).returning(table.c.id, sort_by_parameter_order=True), responses_data
+        ).scalars().all()
+    rollups.apply(db, responses_data)
+    live.stage(db, responses_data)
+    current_answers.apply(db, [dict(row, id=row_id) for row, row_id in zip(responses_data, ids)])
+    versions.bump(db, "responses")
+    return len(responses_data)
+
+def create_responses_bulk(db: Session, responses_data: list[dict]):
+    """Insert a chunk of response rows with a single executemany and one commit"""
+    if not responses_data:
+        return 0
+    try:
+        inserted = insert_responses(db, responses_data)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return inserted
+
+def _validation_detail(error: ValidationError) -> str:
+    """One readable line per failed field, e.g. "date: Field required; response_type: Input should be ..." """
+    return "; ".join(
+        f"{'.'.join(str(part) for part in problem['loc']) or 'response'}: {problem['msg']}"
+        for problem in error.errors(include_url=False)
+    )
+
+def ingest_responses(db: Session, items: list, chunk_size: int = BULK_CHUNK_SIZE, positions: list = None):
+    """Validate and insert many responses, one transaction per chunk.
+
+    Returns (inserted, errors) where errors lists {"index", "detail"} for every
+    rejected row; a bad row never aborts the rest of the batch. `index` is the
+    item's position in `items`, or the matching entry of `positions` if given
+    (the NDJSON endpoint passes line numbers).
+    """
+    chunk_size = max(1, chunk_size)
+    positions = range(len(items)) if positions is None else positions
+    inserted = 0
+    errors = []
+    for start in range(0, len(items), chunk_size):
+        indexes, rows = [], []
+        for index, raw in zip(positions[start:start + chunk_size], items[start:start + chunk_size]):
+            try:
+                rows.append(_response_row(raw))
+                indexes.append(index)
+            except ValidationError as e:
+                errors.append({"index": index, "detail": _validation_detail(e)})
+        try:
+            inserted += create_responses_bulk(db, rows)
+        except Exception:
+            # Retry row by row so only the offending rows are rejected
+            for index, row in zip(indexes, rows):
+                try:
+                    inserted += create_responses_bulk(db, [row])
+                except Exception as e:
+                    errors.append({"index": index, "detail": str(getattr(e, "orig", None) or e)})
+    return inserted, errors
+
 def update_response(db: Session, response_id: int, response_data: dict):
     db_response = db.query(models.Response).filter(models.Response.id == response_id).first()
     if db_response:
-        for key, value in response_data.items():
+        rollups.apply(db, [db_response], delta=-1)
+        live.stage(db, [db_response], delta=-1)
+        keys = current_answers.response_keys([db_response])
+        for key, value in _response_fields(response_data).items():
             setattr(db_response, key, value)
+        db.flush()
+        rollups.apply(db, [db_response])
+        live.stage(db, [db_response])
+        current_answers.refresh(db, keys | current_answers.response_keys([db_response]))
+        versions.bump(db, "responses", "response_edits")
         db.commit()
         db.refresh(db_response)
     return db_response
@@ -60,7 +289,29 @@ def update_response(db: Session, response_id: int, response_data: dict):
 def delete_response(db: Session, response_id: int):
     db_response = db.query(models.Response).filter(models.Response.id == response_id).first()
     if db_response:
+        rollups.apply(db, [db_response], delta=-1)
+        live.stage(db, [db_response], delta=-1)
         db.delete(db_response)
+        db.flush()
+        current_answers.refresh(db, current_answers.response_keys([db_response]))
+        versions.bump(db, "responses", "response_edits")
         db.commit()
         return True
-    return False
\ No newline at end of file
+    return False
+
+def delete_responses_bulk(db: Session, response_ids: list[int]):
+    """Delete many responses (and their counters) in one transaction"""
+    rows = db.query(models.Response).filter(models.Response.id.in_(response_ids)).all()
+    if not rows:
+        return 0
+    try:
+        rollups.apply(db, rows, delta=-1)
+        live.stage(db, rows, delta=-1)
+        db.query(models.Response).filter(models.Response.id.in_([row.id for row in rows])).delete(synchronize_session=False)
+        current_answers.refresh(db, current_answers.response_keys(rows))
+        versions.bump(db, "responses", "response_edits")
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(rows)
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""
+AsyncSession counterparts of the crud read and response write functions.
+
+Statements are built with the same helpers as crud.py, so filtering,
+pagination and rollup maintenance behave identically in both stacks.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+import models, rollups, versions, crud, current_answers, live
+from crud import _response_fields
+
+async def _apply_rollups(db: AsyncSession, responses, delta: int = 1):
+    update = rollups.counter_updates(db.get_bind().dialect.name, responses, delta)
+    if update:
+        await db.execute(*update)
+    live.stage(db.sync_session, responses, delta)
+
+async def _upsert_current_answers(db: AsyncSession, responses):
+    update = current_answers.upsert(db.get_bind().dialect.name, responses)
+    if update:
+        await db.execute(*update)
+
+async def _refresh_current_answers(db: AsyncSession, keys):
+    for statement in current_answers.refresh_statements(keys):
+        await db.execute(statement)
+
+async def _bump_versions(db: AsyncSession, *tables: str):
+    await db.execute(versions.bump_statement(*tables))
+    versions.expire_after_commit(db.sync_session)
+
+# Reference data comes from crud's in-process snapshots; run_sync only
+# reaches the database when a snapshot has to be reloaded. The snapshots
+# check versions.current(), whose periodic re-read is a blocking query:
+# refresh it in the threadpool first so run_sync finds it fresh.
+async def _from_snapshot(db: AsyncSession, function, *args):
+    await versions.current_async()
+    return await db.run_sync(function, *args)
+
+async def get_organizations(db: AsyncSession, after_id: int = None, limit: int = None):
+    return await _from_snapshot(db, crud.get_organizations, after_id, limit)
+
+async def get_organization(db: AsyncSession, org_id: int):
+    return await _from_snapshot(db, crud.get_organization, org_id)
+
+async def get_clauses(db: AsyncSession, after_id: int = None, limit: int = None):
+    return await _from_snapshot(db, crud.get_clauses, after_id, limit)
+
+async def get_questions(db: AsyncSession, clause_id: int = None, after_id: int = None, limit: int = None):
+    return await _from_snapshot(db, crud.get_questions, clause_id, after_id, limit)
+
+async def reference_snapshot(db: AsyncSession, table: str):
+    return await _from_snapshot(db, crud.reference_snapshot, table)
+
+async def question_count(db: AsyncSession, clause_id: int = None):
+    return await _from_snapshot(db, crud.question_count, clause_id)
+
+async def get_responses(
+    db: AsyncSession,
+    organization_id: int = None,
+    clause_id: int = None,
+    question_id: int = None,
+    response_type: str = None,
+    start_date: date = None,
+    end_date: date = None,
+    after_id: int = None,
+    limit: int = None,
+):
+    statement = crud.responses_statement(
+        organization_id, clause_id, question_id, response_type, start_date, end_date, after_id, limit
+    )
+    return (await db.execute(statement)).all()
+
+async def create_response(db: AsyncSession, response_data: dict):
+    db_response = models.Response(**_response_fields(response_data))
+    db.add(db_response)
+    await db.flush()
+    await _apply_rollups(db, [db_response])
+    await _upsert_current_answers(db, [db_response])
+    await _bump_versions(db, "responses")
+    await db.commit()
+    await db.refresh(db_response)
+    return db_response
+
+async def update_response(db: AsyncSession, response_id: int, response_data: dict):
+    db_response = await db.get(models.Response, response_id)
+    if db_response:
+        await _apply_rollups(db, [db_response], delta=-1)
+        keys = current_answers.response_keys([db_response])
+        for key, value in _response_fields(response_data).items():
+            setattr(db_response, key, value)
+        await db.flush()
+        await _apply_rollups(db, [db_response])
+        await _refresh_current_answers(db, keys | current_answers.response_keys([db_response]))
+        await _bump_versions(db, "responses", "response_edits")
+        await db.commit()
+        await db.refresh(db_response)
+    return db_response
+
+async def delete_response(db: AsyncSession, response_id: int):
+    db_response = await db.get(models.Response, response_id)
+    if db_response:
+        await _apply_rollups(db, [db_response], delta=-1)
+        await db.delete(db_response)
+        await db.flush()
+        await _refresh_current_answers(db, current_answers.response_keys([db_response]))
+        await _bump_versions(db, "responses", "response_edits")
+        await db.commit()
+        return True
+    return False
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+The `current_answers` projection: one row per (organization, question)
+holding its latest response, so comparison counts are plain indexed counts
+instead of COUNT(DISTINCT) over the full history.
+
+`crud` keeps it in step inside the same transaction as every response write:
+inserts upsert (a newer answer replaces an older one, never the reverse);
+updates and deletes recompute the affected keys from `responses`. Run this
+script to rebuild it from scratch:
+
+    python current_answers.py
+"""
+import os
+import sys
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import and_, delete, func, insert, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models
+
+KEY_COLUMNS = ["organization_id", "question_id"]
+VALUE_COLUMNS = ["clause_id", "response_id", "response_type", "date"]
+# Keys per recompute statement, well under SQLite's bound-parameter limit
+REFRESH_CHUNK_SIZE = 500
+
+
+def _field(response, name):
+    return response[name] if isinstance(response, dict) else getattr(response, name)
+
+
+def _newer(candidate, existing) -> bool:
+    return (_field(candidate, "date"), _field(candidate, "id")) > (_field(existing, "date"), _field(existing, "id"))
+
+
+def upsert(dialect_name: str, responses):
+    """Build the (statement, params) upsert making `responses` current where they are newer.
+
+    `responses` are ORM objects or row dicts that already have their `id`.
+    Returns None when there is nothing to apply.
+    """
+    latest = {}
+    for response in responses:
+        key = (_field(response, "organization_id"), _field(response, "question_id"))
+        if key not in latest or _newer(response, latest[key]):
+            latest[key] = response
+    if not latest:
+        return None
+
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    table = models.CurrentAnswer.__table__
+    stmt = dialect_insert(table)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=KEY_COLUMNS,
+        set_={column: excluded[column] for column in VALUE_COLUMNS},
+        where=or_(
+            excluded.date > table.c.date,
+            and_(excluded.date == table.c.date, excluded.response_id > table.c.response_id),
+        ),
+    )
+    params = [
+        {
+            "organization_id": _field(response, "organization_id"),
+            "question_id": _field(response, "question_id"),
+            "clause_id": _field(response, "clause_id"),
+            "response_id": _field(response, "id"),
+            "response_type": _field(response, "response_type"),
+            "date": _field(response, "date"),
+        }
+        for response in latest.values()
+    ]
+    return stmt, params
+
+
+def latest_responses(*criteria):
+    """Subquery of the latest response per (organization, question) among rows matching `criteria`"""
+    response = models.Response
+    ranked = select(
+        response.organization_id,
+        response.question_id,
+        response.clause_id,
+        response.id.label("response_id"),
+        response.response_type,
+        response.date,
+        func.row_number().over(
+            partition_by=(response.organization_id, response.question_id),
+            order_by=(response.date.desc(), response.id.desc()),
+        ).label("rank"),
+    ).where(*criteria).subquery()
+    return select(*(ranked.c[column] for column in KEY_COLUMNS + VALUE_COLUMNS)).where(ranked.c.rank == 1).subquery()
+
+
+def _insert_latest(*criteria):
+    latest = latest_responses(*criteria)
+    return insert(models.CurrentAnswer).from_select(KEY_COLUMNS + VALUE_COLUMNS, select(latest))
+
+
+def refresh_statements(keys):
+    """Statements recomputing the current answer of each (organization_id, question_id) key"""
+    keys = sorted(set(keys))
+    table = models.CurrentAnswer
+    response = models.Response
+    statements = []
+    for start in range(0, len(keys), REFRESH_CHUNK_SIZE):
+        chunk = keys[start:start + REFRESH_CHUNK_SIZE]
+        statements.append(delete(table).where(tuple_(table.organization_id, table.question_id).in_(chunk)))
+        statements.append(_insert_latest(tuple_(response.organization_id, response.question_id).in_(chunk)))
+    return statements
+
+
+def response_keys(responses):
+    return {(_field(response, "organization_id"), _field(response, "question_id")) for response in responses}
+
+
+def apply(db: Session, responses):
+    """Upsert newly inserted `responses` (with ids) into the projection; does not commit"""
+    update = upsert(db.get_bind().dialect.name, responses)
+    if update:
+        db.execute(*update)
+
+
+def refresh(db: Session, keys):
+    """Recompute the given (organization_id, question_id) keys; does not commit"""
+    for statement in refresh_statements(keys):
+        db.execute(statement)
+
+
+def as_of(
+    end_date: Optional[date] = None,
+    organization_ids: Optional[list[int]] = None,
+    clause_id: Optional[int] = None,
+):
+    """Current answers as a selectable, optionally as they stood on `end_date`.
+
+    Without `end_date` this is the maintained table itself; with it, the
+    latest response on or before that day is picked from the history.
+    """
+    if end_date is None:
+        return models.CurrentAnswer.__table__
+    response = models.Response
+    criteria = [response.date <= end_date]
+    if organization_ids:
+        criteria.append(response.organization_id.in_(organization_ids))
+    if clause_id:
+        criteria.append(response.clause_id == clause_id)
+    return latest_responses(*criteria)
+
+
+def rebuild(db: Session):
+    """Recompute the whole projection from `responses` in one transaction"""
+    try:
+        db.execute(delete(models.CurrentAnswer))
+        db.execute(_insert_latest())
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return db.query(func.count(models.CurrentAnswer.id)).scalar()
+
+
+if __name__ == "__main__":
+    from database import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        print(f"Rebuilt {rebuild(db)} current answers")
+    finally:
+        db.close()
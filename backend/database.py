@@ -1,12 +1,163 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
-from models import Base
+from sqlalchemy.schema import CreateIndex, CreateTable
+from functools import lru_cache
+from pathlib import Path
+import hashlib
+from models import Base, CurrentAnswer, ResponseRollup
+import metrics
 import os
 
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///./ncert.db')
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Engine profiles (SQLite only; other databases always use one default engine):
+#   default     one read/write engine, driver defaults
+#   production  WAL journaling and tuned pragmas, a read-only pool for GET
+#               handlers and a single-connection writer, so readers never
+#               block writers and this worker's writes queue instead of
+#               failing with "database is locked"
+DB_PROFILE = os.getenv('DB_PROFILE', 'default').lower()
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', str(-64 * 1024))),  # negative = KiB
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000')),  # ms
+    'temp_store': 'MEMORY',
+}
+# Pragmas a read-only connection can set (journal_mode lives in the file itself)
+SQLITE_READER_PRAGMAS = ('mmap_size', 'cache_size', 'busy_timeout', 'temp_store')
+READ_POOL_SIZE = int(os.getenv('READ_POOL_SIZE', '8'))
+WRITE_POOL_TIMEOUT = float(os.getenv('WRITE_POOL_TIMEOUT', '30'))
+
+def _set_pragmas(engine, pragmas: dict):
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+def _sqlite_file(url: str):
+    """Path of a file-backed SQLite database, or None"""
+    url = make_url(url)
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:') or url.database.startswith('file:'):
+        return None
+    return os.path.abspath(url.database)
+
+def _create_engines():
+    """(writer, reader) engines for DB_PROFILE; the same engine twice when there is no split"""
+    sqlite_file = _sqlite_file(DATABASE_URL)
+    if DB_PROFILE != 'production' or not sqlite_file:
+        engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+        return engine, engine
+
+    writer = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=WRITE_POOL_TIMEOUT,
+    )
+    _set_pragmas(writer, SQLITE_PRAGMAS)
+    reader = create_engine(
+        f'sqlite:///{Path(sqlite_file).as_uri()}?mode=ro&uri=true',
+        connect_args={"check_same_thread": False},
+        pool_size=READ_POOL_SIZE,
+        max_overflow=READ_POOL_SIZE,
+    )
+    _set_pragmas(reader, dict({name: SQLITE_PRAGMAS[name] for name in SQLITE_READER_PRAGMAS}, query_only='ON'))
+    return writer, reader
+
+# `engine`/`SessionLocal` write (and may read); `read_engine`/`ReadSessionLocal`
+# only read and are what GET handlers should use
+engine, read_engine = _create_engines()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+metrics.instrument(engine)
+metrics.instrument(read_engine)
+
+# Serve the read and response endpoints from an AsyncSession (see async_api.py)
+USE_ASYNC_DB = os.getenv('USE_ASYNC_DB', '').lower() in ('1', 'true', 'yes')
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+}
+
+def async_database_url():
+    url = os.getenv('ASYNC_DATABASE_URL')
+    if url:
+        return url
+    url = make_url(DATABASE_URL)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername)).render_as_string(hide_password=False)
+
+@lru_cache(maxsize=None)
+def get_async_sessionmaker():
+    """Build the async engine on first use so sync-only deployments never import its driver"""
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = create_async_engine(async_database_url())
+    if DB_PROFILE == 'production' and _sqlite_file(DATABASE_URL):
+        _set_pragmas(async_engine.sync_engine, SQLITE_PRAGMAS)
+    metrics.instrument(async_engine.sync_engine)
+    return async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+def schema_version(dialect) -> int:
+    """Fingerprint of everything init_db creates, as a positive 31-bit int (SQLite's user_version)"""
+    import versions, search
+    tables = Base.metadata.sorted_tables
+    ddl = [str(CreateTable(table).compile(dialect=dialect)) for table in tables]
+    ddl += [str(CreateIndex(index).compile(dialect=dialect)) for table in tables for index in sorted(table.indexes, key=lambda index: index.name)]
+    ddl += list(search.INDEX_DDL) + list(versions.TRACKED_TABLES)
+    return int.from_bytes(hashlib.sha256("\n".join(ddl).encode()).digest()[:4], "big") >> 1
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    """Create missing tables, indexes, version rows and projections.
+
+    On SQLite the schema fingerprint is stored as `PRAGMA user_version`; when
+    it already matches, nothing is inspected or created and this returns
+    False. Returns True when the schema was (re)applied.
+    """
+    version = schema_version(engine.dialect) if _sqlite_file(DATABASE_URL) else None
+    if version is not None:
+        with engine.connect() as connection:
+            if connection.exec_driver_sql('PRAGMA user_version').scalar() == version:
+                return False
+
+    new_rollups = not inspect(engine).has_table(ResponseRollup.__tablename__)
+    new_current_answers = not inspect(engine).has_table(CurrentAnswer.__tablename__)
+    Base.metadata.create_all(bind=engine)
+    # create_all skips indexes on tables that already exist: add any missing ones
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    import versions, search
+    with engine.begin() as connection:
+        versions.ensure_rows(connection)
+        if search.ensure_index(connection):
+            search.rebuild(connection)
+    # Existing databases predate these projections: backfill each once
+    if new_rollups:
+        import rollups
+        _rebuild(rollups.rebuild)
+    if new_current_answers:
+        import current_answers
+        _rebuild(current_answers.rebuild)
+    if version is not None:
+        with engine.begin() as connection:
+            connection.exec_driver_sql(f'PRAGMA user_version = {version}')
+    return True
+
+def _rebuild(rebuild):
+    db = SessionLocal()
+    try:
+        rebuild(db)
+    finally:
+        db.close()
\ No newline at end of file
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Generate a large synthetic dataset for load and performance testing.
+
+Reference data goes through the normal crud calls; responses are built in
+memory and written with `crud.create_responses_bulk`, one executemany per
+chunk, so millions of rows take minutes rather than hours.
+
+The distribution is meant to look like real survey traffic:
+- response volume is skewed across organizations (Zipf-like weights),
+- every organization has its own maturity, and re-submits answers over
+  time with a slowly improving Yes rate,
+- a fixed share of answers are Not applicable.
+
+    python generate_data.py --organizations 200 --responses 2000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import SessionLocal, init_db
+from models import ResponseType
+import crud
+
+COMMENTS = [None, None, None, "Evidence attached", "Partially implemented", "Under review", "Policy pending approval"]
+
+
+def organization_profiles(org_ids, rng: random.Random, skew: float = 1.1):
+    """(org_id, weight, maturity) per organization; weight drives response volume"""
+    ranked = list(org_ids)
+    rng.shuffle(ranked)
+    return [(org_id, 1 / (rank ** skew), rng.betavariate(2, 2)) for rank, org_id in enumerate(ranked, start=1)]
+
+
+def generate_responses(
+    profiles,
+    questions,
+    total: int,
+    rng: random.Random,
+    start: date,
+    days: int,
+    not_applicable_rate: float = 0.08,
+    improvement: float = 0.25,
+):
+    """Yield `total` response row dicts ready for `crud.create_responses_bulk`.
+
+    `questions` is a list of (question_id, clause_id). Later submissions are
+    more likely to be Yes, by up to `improvement` over the organization's
+    starting maturity.
+    """
+    org_ids = [org_id for org_id, _, _ in profiles]
+    weights = [weight for _, weight, _ in profiles]
+    maturity = {org_id: value for org_id, _, value in profiles}
+    for org_id in rng.choices(org_ids, weights, k=total):
+        question_id, clause_id = rng.choice(questions)
+        offset = rng.randrange(days)
+        if rng.random() < not_applicable_rate:
+            response_type = ResponseType.NOT_APPLICABLE
+        elif rng.random() < min(1.0, maturity[org_id] + improvement * offset / days):
+            response_type = ResponseType.YES
+        else:
+            response_type = ResponseType.NO
+        yield {
+            "organization_id": org_id,
+            "clause_id": clause_id,
+            "question_id": question_id,
+            "response_type": response_type,
+            "comment": rng.choice(COMMENTS),
+            "date": start + timedelta(days=offset),
+        }
+
+
+def create_reference_data(db, organizations: int, clauses: int, questions_per_clause: int, rng: random.Random):
+    """Create the synthetic organizations, clauses and questions; returns (org_ids, questions)"""
+    run = f"{int(time.time())}-{rng.randrange(10 ** 6)}"
+    org_ids = [
+        crud.create_organization(db, {
+            "name": f"Synthetic Org {run}-{i}",
+            "year_of_association": rng.randint(2015, 2024),
+            "details": "Generated by generate_data.py",
+        }).id
+        for i in range(1, organizations + 1)
+    ]
+    questions = []
+    for c in range(1, clauses + 1):
+        clause = crud.create_clause(db, {"name": f"synthetic_{run}_{c}", "title": f"Synthetic Clause {c}"})
+        for q in range(1, questions_per_clause + 1):
+            question = crud.create_question(db, {
+                "text": f"Synthetic question {q} of clause {c}?",
+                "title": f"Synthetic Q{c}.{q}",
+                "clause_id": clause.id,
+            })
+            questions.append((question.id, clause.id))
+    return org_ids, questions
+
+
+def populate(
+    organizations: int = 50,
+    clauses: int = 10,
+    questions_per_clause: int = 10,
+    responses: int = 100_000,
+    seed: int = 42,
+    chunk_size: int = 10_000,
+    start: date = date(2022, 1, 1),
+    days: int = 3 * 365,
+    verbose: bool = True,
+):
+    """Create a synthetic dataset; returns the number of responses inserted"""
+    rng = random.Random(seed)
+    init_db()
+    db = SessionLocal()
+    try:
+        org_ids, questions = create_reference_data(db, organizations, clauses, questions_per_clause, rng)
+        profiles = organization_profiles(org_ids, rng)
+
+        began = time.perf_counter()
+        inserted = 0
+        chunk = []
+        for row in generate_responses(profiles, questions, responses, rng, start, days):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                inserted += crud.create_responses_bulk(db, chunk)
+                chunk = []
+                if verbose:
+                    print(f"  {inserted:,} / {responses:,} responses", end="\r", flush=True)
+        inserted += crud.create_responses_bulk(db, chunk)
+
+        elapsed = time.perf_counter() - began
+        if verbose:
+            print(f"Inserted {inserted:,} responses for {len(org_ids)} organizations and "
+                  f"{len(questions)} questions in {elapsed:.1f}s ({inserted / max(elapsed, 1e-9):,.0f} rows/s)")
+        return inserted
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--organizations", type=int, default=50)
+    parser.add_argument("--clauses", type=int, default=10)
+    parser.add_argument("--questions-per-clause", type=int, default=10)
+    parser.add_argument("--responses", type=int, default=100_000)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    populate(
+        organizations=args.organizations,
+        clauses=args.clauses,
+        questions_per_clause=args.questions_per_clause,
+        responses=args.responses,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+    )
@@ -0,0 +1,229 @@
+"""
+Live Yes/No/Not applicable counts over Server-Sent Events.
+
+The crud write paths `stage` the count changes of every response they add
+or remove, next to their rollup updates. When the session commits, the
+changes are summed per (organization, clause), encoded once and handed to
+every open stream; a rollback discards them. One write is one event, no
+matter how many dashboards are watching, and watching costs no queries.
+
+GET /live/counts opens a stream. It starts with a `snapshot` event (the
+rollup totals per organization and clause, cached per responses version
+so a burst of connections runs one query), then sends `delta` events.
+Every event carries the `responses` table version it reflects; deltas
+already included in the snapshot are skipped.
+
+Events are published in the process that committed the write. With
+several workers, a stream notices at its next heartbeat that the
+responses version moved without an event and sends a fresh snapshot.
+"""
+import asyncio
+import os
+import threading
+from collections import defaultdict
+from typing import NamedTuple, Optional
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+import models
+import serialization
+import versions
+from database import ReadSessionLocal
+
+router = APIRouter()
+
+LIVE_HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+# Events buffered per stream; a client that falls this far behind is sent a fresh snapshot
+LIVE_QUEUE_SIZE = 256
+LABELS = {
+    models.ResponseType.YES: "Yes",
+    models.ResponseType.NO: "No",
+    models.ResponseType.NOT_APPLICABLE: "Not applicable",
+}
+PENDING_KEY = "live_counts_pending"
+VERSION_KEY = "live_counts_version"
+RESYNC = object()
+
+
+def _field(response, name):
+    return response[name] if isinstance(response, dict) else getattr(response, name)
+
+
+class Message(NamedTuple):
+    version: int
+    body: bytes  # the encoded SSE event, shared by every subscriber
+
+
+def _encode(kind: str, version: int, payload: dict) -> bytes:
+    return b"event: %s\nid: %d\ndata: %s\n\n" % (kind.encode(), version, serialization.dumps(payload))
+
+
+class Hub:
+    """In-process fan-out: each published message is queued on every subscriber's event loop"""
+
+    def __init__(self, queue_size: int = LIVE_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(self.queue_size)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def publish(self, message: Message):
+        """Safe to call from any thread"""
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, message)
+            except RuntimeError:  # loop closed under a stream that never unsubscribed
+                self.unsubscribe(queue)
+
+
+def _offer(queue: asyncio.Queue, message):
+    if queue.full():
+        # Too far behind for deltas to be worth replaying
+        while not queue.empty():
+            queue.get_nowait()
+        message = RESYNC
+    queue.put_nowait(message)
+
+
+hub = Hub()
+
+
+def stage(session: Session, responses, delta: int = 1):
+    """Queue `responses` (ORM objects or row dicts) as added (+1) or removed (-1) on commit.
+
+    `session` is a sync Session (pass `db.sync_session` from async code).
+    """
+    pending = session.info.setdefault(PENDING_KEY, defaultdict(lambda: dict.fromkeys(LABELS.values(), 0)))
+    for response in responses:
+        key = (_field(response, "organization_id"), _field(response, "clause_id"))
+        pending[key][LABELS[models.ResponseType(_field(response, "response_type"))]] += delta
+    if not event.contains(session, "after_commit", _publish):
+        event.listen(session, "before_commit", _read_version)
+        event.listen(session, "after_commit", _publish)
+        event.listen(session, "after_rollback", _discard)
+
+
+def _responses_version():
+    table = models.TableVersion
+    return select(table.version).where(table.name == "responses").scalar_subquery()
+
+
+def _read_version(session: Session):
+    # Inside the transaction, after crud's versions.bump: the version this commit creates
+    if session.info.get(PENDING_KEY):
+        session.info[VERSION_KEY] = session.execute(select(_responses_version())).scalar()
+
+
+def _publish(session: Session):
+    pending = session.info.pop(PENDING_KEY, None)
+    version = session.info.pop(VERSION_KEY, None)
+    if not pending or version is None:
+        return
+    deltas = [
+        dict(organization_id=org_id, clause_id=clause_id, **counts)
+        for (org_id, clause_id), counts in sorted(pending.items(), key=lambda item: (item[0][0], item[0][1] or 0))
+        if any(counts.values())
+    ]
+    if deltas:
+        hub.publish(Message(version, _encode("delta", version, {"version": version, "deltas": deltas})))
+
+
+def _discard(session: Session):
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(VERSION_KEY, None)
+
+
+def counts_query():
+    """Rollup totals per organization and clause, each row stamped with the responses version"""
+    rollup = models.ResponseRollup
+    return select(
+        _responses_version(),
+        rollup.organization_id,
+        rollup.clause_id,
+        func.sum(rollup.yes_count),
+        func.sum(rollup.no_count),
+        func.sum(rollup.not_applicable_count),
+    ).group_by(rollup.organization_id, rollup.clause_id).order_by(rollup.organization_id, rollup.clause_id)
+
+
+_snapshot: Optional[Message] = None
+
+
+def snapshot(min_version: int = 0) -> Message:
+    """The current totals as an encoded `snapshot` event, reused while the responses version holds"""
+    global _snapshot
+    cached = _snapshot
+    if cached and cached.version >= max(min_version, versions.current().get("responses", 0)):
+        return cached
+    db = ReadSessionLocal()
+    try:
+        # One statement, so the version and the counts come from the same read
+        rows = db.execute(counts_query()).all()
+        version = rows[0][0] if rows else db.execute(select(_responses_version())).scalar() or 0
+    finally:
+        db.close()
+    counts = [
+        {"organization_id": org_id, "clause_id": clause_id,
+         "Yes": yes_count or 0, "No": no_count or 0, "Not applicable": not_applicable_count or 0}
+        for _, org_id, clause_id, yes_count, no_count, not_applicable_count in rows
+        if yes_count or no_count or not_applicable_count
+    ]
+    _snapshot = Message(version, _encode("snapshot", version, {"version": version, "counts": counts}))
+    return _snapshot
+
+
+async def _stream():
+    # Subscribe before reading the snapshot, so no write can fall between the two
+    queue = hub.subscribe()
+    try:
+        current = await run_in_threadpool(snapshot)
+        floor = seen = current.version
+        yield current.body
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), LIVE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                latest = (await run_in_threadpool(versions.current)).get("responses", 0)
+                if latest <= seen:
+                    yield b": keep-alive\n\n"
+                    continue
+                message = RESYNC  # written by another worker: no event reached this process
+            if message is RESYNC:
+                current = await run_in_threadpool(snapshot, seen)
+                floor = seen = current.version
+                yield current.body
+            elif message.version > floor:
+                seen = max(seen, message.version)
+                yield message.body
+    finally:
+        hub.unsubscribe(queue)
+
+
+@router.get("/live/counts")
+async def live_counts():
+    """Server-Sent Events: a `snapshot` of Yes/No/Not applicable totals per organization and
+    clause, then a `delta` event for every committed response write.
+    """
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
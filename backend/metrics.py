@@ -0,0 +1,209 @@
+"""
+Per-request performance instrumentation.
+
+- `MetricsMiddleware` times every request and keeps a latency histogram per
+  route template, plus SQL statement counts and database time.
+- `instrument(engine)` hooks SQLAlchemy cursor events so every statement is
+  attributed to the request that issued it (through a context variable, which
+  also follows the request into the threadpool running sync endpoints).
+- Each response carries a `Server-Timing` header (`app`, `db`) for the
+  browser's network panel, and `GET /metrics` serves everything in the
+  Prometheus text format.
+- Statements slower than SLOW_QUERY_MS are logged to the `ncert.slow_query`
+  logger; leave it unset to disable the log.
+"""
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+# Requests that do not match any route share one label to keep cardinality bounded
+UNMATCHED_ROUTE = "unmatched"
+BACKGROUND_ROUTE = "background"
+
+slow_query_log = logging.getLogger("ncert.slow_query")
+router = APIRouter()
+
+
+class RequestStats:
+    __slots__ = ("statements", "db_time")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: str):
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum:.6f}"
+        yield f"{name}_count{{{labels}}} {cumulative}"
+
+
+_current: ContextVar[RequestStats] = ContextVar("request_stats", default=None)
+_lock = threading.Lock()
+_latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+_statements = defaultdict(lambda: Histogram(STATEMENT_BUCKETS))
+_requests = defaultdict(int)
+_db_time = defaultdict(float)
+_background = RequestStats()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _current.get()
+    if stats is None:
+        with _lock:
+            _background.statements += 1
+            _background.db_time += elapsed
+    else:
+        stats.statements += 1
+        stats.db_time += elapsed
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        slow_query_log.warning("%.1fms: %s", elapsed * 1000, " ".join(statement.split())[:1000])
+
+
+def _handle_error(context):
+    started = context.connection.info.get("query_started") if context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument(engine):
+    """Attach the statement counters to a (sync) Engine; safe to call twice"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+def _server_timing(stats: RequestStats, began: float) -> bytes:
+    app_ms = (time.perf_counter() - began) * 1000
+    return (
+        f'app;dur={app_ms:.1f}, db;dur={stats.db_time * 1000:.1f};desc="{stats.statements} statements"'
+    ).encode()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses are not buffered"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        began = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", _server_timing(stats, began))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            _record(scope["method"], getattr(route, "path", UNMATCHED_ROUTE), status, time.perf_counter() - began, stats)
+
+
+def _record(method: str, route: str, status: int, elapsed: float, stats: RequestStats):
+    with _lock:
+        _latency[method, route].observe(elapsed)
+        _statements[method, route].observe(stats.statements)
+        _requests[method, route, status] += 1
+        _db_time[method, route] += stats.db_time
+
+
+def _labels(method: str, route: str) -> str:
+    return f'method="{method}",route="{route}"'
+
+
+def render() -> str:
+    """Everything recorded so far, in the Prometheus text exposition format"""
+    with _lock:
+        lines = [
+            "# HELP http_requests_total Requests handled, by route and status",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(_requests.items()):
+            lines.append(f'http_requests_total{{{_labels(method, route)},status="{status}"}} {count}')
+
+        lines += [
+            "# HELP http_request_duration_seconds Request latency, by route",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for key, histogram in sorted(_latency.items()):
+            lines.extend(histogram.lines("http_request_duration_seconds", _labels(*key)))
+
+        lines += [
+            "# HELP db_statements_per_request SQL statements issued per request, by route",
+            "# TYPE db_statements_per_request histogram",
+        ]
+        for key, histogram in sorted(_statements.items()):
+            lines.extend(histogram.lines("db_statements_per_request", _labels(*key)))
+
+        lines += [
+            "# HELP db_time_seconds_total Time spent executing SQL, by route",
+            "# TYPE db_time_seconds_total counter",
+        ]
+        for key, seconds in sorted(_db_time.items()):
+            lines.append(f"db_time_seconds_total{{{_labels(*key)}}} {seconds:.6f}")
+        lines.append(f'db_time_seconds_total{{method="",route="{BACKGROUND_ROUTE}"}} {_background.db_time:.6f}')
+
+        lines += [
+            "# HELP db_background_statements_total SQL statements issued outside a request (AI jobs, startup)",
+            "# TYPE db_background_statements_total counter",
+            f"db_background_statements_total {_background.statements}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _latency.clear()
+        _statements.clear()
+        _requests.clear()
+        _db_time.clear()
+        _background.statements = 0
+        _background.db_time = 0.0
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, Text, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, DateTime, Text, Enum, UniqueConstraint, Index
 from sqlalchemy.orm import relationship, declarative_base
 import enum
 
@@ -7,6 +7,7 @@ Base = declarative_base()
 class ResponseType(enum.Enum):
     YES = "Yes"
     NO = "No"
+    NOT_APPLICABLE = "Not applicable"
 
 class Organization(Base):
     __tablename__ = 'organizations'
@@ -29,12 +30,20 @@ class Question(Base):
     id = Column(Integer, primary_key=True, index=True)
     text = Column(Text, nullable=False)
     title = Column(String, nullable=False)
-    clause_id = Column(Integer, ForeignKey('clauses.id'))
+    clause_id = Column(Integer, ForeignKey('clauses.id'), index=True)
     clause = relationship('Clause', back_populates='questions')
     responses = relationship('Response', back_populates='question')
 
 class Response(Base):
     __tablename__ = 'responses'
+    __table_args__ = (
+        # /compare, /ai/compare and the list filters: org (+ clause) + date range
+        Index('ix_responses_org_clause_date', 'organization_id', 'clause_id', 'date'),
+        # Per-question lookups within an organization
+        Index('ix_responses_org_question', 'organization_id', 'question_id'),
+        # Clause/date filters without an organization
+        Index('ix_responses_clause_date', 'clause_id', 'date'),
+    )
     id = Column(Integer, primary_key=True, index=True)
     organization_id = Column(Integer, ForeignKey('organizations.id'))
     clause_id = Column(Integer, ForeignKey('clauses.id'))
@@ -44,4 +53,63 @@ class Response(Base):
     date = Column(Date, nullable=False)
     organization = relationship('Organization', back_populates='responses')
     clause = relationship('Clause', back_populates='responses')
-    question = relationship('Question', back_populates='responses')
\ No newline at end of file
+    question = relationship('Question', back_populates='responses')
+
+class ResponseRollup(Base):
+    """Yes/No/Not applicable counts per organization, clause, question and day.
+
+    Maintained by the crud write paths in the same transaction as `responses`;
+    see rollups.py for the rebuild command.
+    """
+    __tablename__ = 'response_rollups'
+    __table_args__ = (UniqueConstraint('organization_id', 'clause_id', 'question_id', 'date'),)
+    id = Column(Integer, primary_key=True)
+    organization_id = Column(Integer, ForeignKey('organizations.id'), nullable=False)
+    clause_id = Column(Integer, ForeignKey('clauses.id'))
+    question_id = Column(Integer, ForeignKey('questions.id'))
+    date = Column(Date, nullable=False)
+    yes_count = Column(Integer, nullable=False, default=0)
+    no_count = Column(Integer, nullable=False, default=0)
+    not_applicable_count = Column(Integer, nullable=False, default=0)
+
+class CurrentAnswer(Base):
+    """Each organization's latest response to each question (by date, then id).
+
+    A projection of `responses`, which keeps the full history; maintained by
+    the crud write paths, see current_answers.py for the rebuild command.
+    """
+    __tablename__ = 'current_answers'
+    __table_args__ = (
+        UniqueConstraint('organization_id', 'question_id'),
+        Index('ix_current_answers_clause_org', 'clause_id', 'organization_id'),
+    )
+    id = Column(Integer, primary_key=True)
+    organization_id = Column(Integer, ForeignKey('organizations.id'), nullable=False)
+    question_id = Column(Integer, ForeignKey('questions.id'), nullable=False)
+    clause_id = Column(Integer, ForeignKey('clauses.id'))
+    response_id = Column(Integer, ForeignKey('responses.id'), nullable=False)
+    response_type = Column(Enum(ResponseType), nullable=False)
+    date = Column(Date, nullable=False)
+
+class AiComparisonJob(Base):
+    """A queued /ai/compare run; see ai_jobs.py"""
+    __tablename__ = 'ai_comparison_jobs'
+    id = Column(String, primary_key=True)
+    org1_id = Column(Integer, ForeignKey('organizations.id'), nullable=False)
+    org2_id = Column(Integer, ForeignKey('organizations.id'), nullable=False)
+    clause_id = Column(Integer, ForeignKey('clauses.id'))
+    start_date = Column(Date)
+    end_date = Column(Date)
+    status = Column(String, nullable=False, default='queued')  # queued, running, done, failed
+    progress = Column(Integer, nullable=False, default=0)  # percent
+    message = Column(String)
+    result = Column(Text)  # JSON comparison result once done
+    error = Column(Text)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+class TableVersion(Base):
+    """Write counter per table, bumped by crud; see versions.py"""
+    __tablename__ = 'table_versions'
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""
+Keyset pagination helpers shared by the sync and async list endpoints.
+
+Pages are ordered by primary key; the opaque cursor encodes the last id
+served and is returned to the client in the X-Next-Cursor header.
+"""
+from fastapi import HTTPException
+from fastapi import Response as HTTPResponse
+from typing import Optional
+import base64
+import binascii
+import json
+
+MAX_PAGE_SIZE = 1000
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str], key: str = "id") -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))[key])
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+# Ranked results (e.g. /search) have no stable key order: their cursor is an offset
+def encode_offset_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode().rstrip("=")
+
+def decode_offset_cursor(cursor: Optional[str]) -> int:
+    return decode_cursor(cursor, "offset") or 0
+
+def page_bounds(cursor: Optional[str], limit: Optional[int]):
+    """Return (after_id, fetch_limit); one extra row is fetched to detect a next page"""
+    return decode_cursor(cursor), (limit + 1 if limit is not None else None)
+
+def finish_page(http_response: HTTPResponse, rows: list, limit: Optional[int]):
+    """Trim the look-ahead row and set X-Next-Cursor when another page exists"""
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        http_response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].id)
+    return rows
+
+def paginate(http_response: HTTPResponse, fetch, cursor: Optional[str], limit: Optional[int]):
+    """Run a keyset-paginated crud fetch and expose the next page as X-Next-Cursor.
+
+    `fetch(after_id, limit)` is asked for one extra row to detect whether
+    another page exists. Without a limit the full list is returned as before.
+    """
+    after_id, fetch_limit = page_bounds(cursor, limit)
+    return finish_page(http_response, fetch(after_id, fetch_limit), limit)
@@ -102,27 +102,27 @@ def populate_database():
         base_date = date(2024, 1, 1)
         response_types = [ResponseType.YES, ResponseType.NO]
         
-        response_count = 0
+        responses = []
         for org in created_orgs:
             for question in created_questions:
                 # Randomly assign Yes/No responses
-                response_type = response_types[response_count % 2]
+                response_type = response_types[len(responses) % 2]
                 comment = f"Sample response for {org.name} - {question.title}"
                 
-                response_data = {
+                responses.append({
                     "organization_id": org.id,
                     "clause_id": question.clause_id,
                     "question_id": question.id,
-                    "response_type": response_type,
+                    "response_type": response_type.value,
                     "comment": comment,
-                    "date": base_date + timedelta(days=response_count)
-                }
-                
-                crud.create_response(db, response_data)
-                response_count += 1
-                
-                if response_count % 10 == 0:
-                    print(f"Created {response_count} responses...")
+                    "date": base_date + timedelta(days=len(responses))
+                })
+        
+        # Same batched path as POST /responses/bulk: one transaction per chunk
+        response_count, errors = crud.ingest_responses(db, responses)
+        if errors:
+            print(f"Skipped {len(errors)} invalid responses: {errors[:5]}")
+        print(f"Created {response_count} responses...")
         
         print(f"\nDatabase populated successfully!")
         print(f"- {len(created_orgs)} organizations")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Incrementally maintained response counters for the dashboard charts.
+
+`crud` calls `apply` inside the same transaction as every response write, so
+`response_rollups` always matches `responses`. Run this script to rebuild the
+counters from scratch if they ever drift:
+
+    python rollups.py
+"""
+import os
+import sys
+from collections import defaultdict
+from sqlalchemy import delete, func, case, insert, select
+from sqlalchemy.orm import Session
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models
+
+KEY_COLUMNS = ["organization_id", "clause_id", "question_id", "date"]
+COUNT_COLUMNS = {
+    models.ResponseType.YES: "yes_count",
+    models.ResponseType.NO: "no_count",
+    models.ResponseType.NOT_APPLICABLE: "not_applicable_count",
+}
+
+
+def _field(response, name):
+    return response[name] if isinstance(response, dict) else getattr(response, name)
+
+
+def _upsert_statement(dialect_name: str):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    table = models.ResponseRollup.__table__
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=KEY_COLUMNS,
+        set_={column: table.c[column] + stmt.excluded[column] for column in COUNT_COLUMNS.values()},
+    )
+
+
+def counter_updates(dialect_name: str, responses, delta: int = 1):
+    """Build the (statement, params) upsert that adds or removes `responses`.
+
+    Returns None when there is nothing to apply. Shared by `apply` and the
+    async write paths in crud_async.py.
+    """
+    deltas = defaultdict(lambda: dict.fromkeys(COUNT_COLUMNS.values(), 0))
+    for response in responses:
+        key = tuple(_field(response, column) for column in KEY_COLUMNS)
+        deltas[key][COUNT_COLUMNS[models.ResponseType(_field(response, "response_type"))]] += delta
+    if not deltas:
+        return None
+    params = [dict(zip(KEY_COLUMNS, key), **counts) for key, counts in deltas.items()]
+    return _upsert_statement(dialect_name), params
+
+
+def apply(db: Session, responses, delta: int = 1):
+    """Add (delta=1) or remove (delta=-1) responses from the counters.
+
+    `responses` may be ORM objects or row dicts. Does not commit; the caller's
+    transaction covers both the response write and the counter update.
+    """
+    update = counter_updates(db.get_bind().dialect.name, responses, delta)
+    if update:
+        db.execute(*update)
+
+
+def rebuild(db: Session):
+    """Recompute every counter from `responses` in one transaction"""
+    response = models.Response
+    rollup = models.ResponseRollup
+    counts = [
+        func.sum(case((response.response_type == response_type, 1), else_=0))
+        for response_type in COUNT_COLUMNS
+    ]
+    source = select(
+        response.organization_id, response.clause_id, response.question_id, response.date, *counts
+    ).group_by(
+        response.organization_id, response.clause_id, response.question_id, response.date
+    )
+    try:
+        db.execute(delete(rollup))
+        db.execute(insert(rollup).from_select(KEY_COLUMNS + list(COUNT_COLUMNS.values()), source))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return db.query(func.count(rollup.id)).scalar()
+
+
+if __name__ == "__main__":
+    from database import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        print(f"Rebuilt {rebuild(db)} rollup rows")
+    finally:
+        db.close()
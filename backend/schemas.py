@@ -1,11 +1,12 @@
 from pydantic import BaseModel, ConfigDict
 from typing import Optional
-from datetime import date
+from datetime import date, datetime
 from enum import Enum
 
 class ResponseType(str, Enum):
     YES = "Yes"
     NO = "No"
+    NOT_APPLICABLE = "Not applicable"
 
 class OrganizationBase(BaseModel):
     name: str
@@ -55,4 +56,52 @@ class ResponseCreate(ResponseBase):
 
 class Response(ResponseBase):
     id: int
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BulkResponseError(BaseModel):
+    index: int
+    detail: str
+
+class BulkResponseResult(BaseModel):
+    received: int
+    inserted: int
+    errors: list[BulkResponseError] = []
+
+class AiCompareJobCreate(BaseModel):
+    org1_id: int
+    org2_id: int
+    clause_id: Optional[int] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+class AiCompareBatchCreate(BaseModel):
+    anchor_id: int
+    peer_ids: list[int]
+    clause_id: Optional[int] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+class AiCompareJob(AiCompareJobCreate):
+    id: str
+    status: str
+    progress: int
+    message: Optional[str] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+# A field called `date` defaulting to None would shadow the type in the class body
+OptionalDate = Optional[date]
+
+class SearchHit(BaseModel):
+    type: str  # "question" or "response"
+    id: int
+    rank: float  # FTS5 bm25; lower is better
+    snippet: str
+    title: Optional[str] = None
+    clause_id: Optional[int] = None
+    organization_id: Optional[int] = None
+    question_id: Optional[int] = None
+    date: OptionalDate = None
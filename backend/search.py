@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Full-text search over question titles/texts and response comments.
+
+Two external-content SQLite FTS5 tables index the text in place:
+
+    questions_fts(title, text)   -> questions
+    responses_fts(comment)       -> responses
+
+Triggers keep them in step with every insert, update and delete (including
+the bulk executemany path), so the crud functions need no changes.
+`init_db` creates them on SQLite databases; run this script to rebuild the
+index of an existing database:
+
+    python search.py
+"""
+import os
+import re
+import sys
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import Response as HTTPResponse
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import schemas
+from database import ReadSessionLocal
+from pagination import MAX_PAGE_SIZE, decode_offset_cursor, encode_offset_cursor
+
+router = APIRouter()
+
+SCOPES = ("all", "questions", "responses")
+SNIPPET_TOKENS = 12
+FTS_TABLES = ("questions_fts", "responses_fts")
+
+INDEX_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(
+        title, text, content='questions', content_rowid='id', tokenize='porter unicode61')""",
+    """CREATE TRIGGER IF NOT EXISTS questions_fts_insert AFTER INSERT ON questions BEGIN
+        INSERT INTO questions_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS questions_fts_delete AFTER DELETE ON questions BEGIN
+        INSERT INTO questions_fts(questions_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS questions_fts_update AFTER UPDATE OF title, text ON questions BEGIN
+        INSERT INTO questions_fts(questions_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO questions_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+    END""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS responses_fts USING fts5(
+        comment, content='responses', content_rowid='id', tokenize='porter unicode61')""",
+    """CREATE TRIGGER IF NOT EXISTS responses_fts_insert AFTER INSERT ON responses BEGIN
+        INSERT INTO responses_fts(rowid, comment) VALUES (new.id, new.comment);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS responses_fts_delete AFTER DELETE ON responses BEGIN
+        INSERT INTO responses_fts(responses_fts, rowid, comment) VALUES ('delete', old.id, old.comment);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS responses_fts_update AFTER UPDATE OF comment ON responses BEGIN
+        INSERT INTO responses_fts(responses_fts, rowid, comment) VALUES ('delete', old.id, old.comment);
+        INSERT INTO responses_fts(rowid, comment) VALUES (new.id, new.comment);
+    END""",
+]
+
+QUESTION_HITS = """
+    SELECT 'question' AS type, q.id AS id, questions_fts.rank AS rank,
+           snippet(questions_fts, -1, '<mark>', '</mark>', '…', :snippet_tokens) AS snippet,
+           q.title AS title, q.clause_id AS clause_id,
+           NULL AS organization_id, NULL AS question_id, NULL AS date
+    FROM questions_fts JOIN questions q ON q.id = questions_fts.rowid
+    WHERE questions_fts MATCH :query {filters}
+"""
+
+RESPONSE_HITS = """
+    SELECT 'response' AS type, r.id AS id, responses_fts.rank AS rank,
+           snippet(responses_fts, 0, '<mark>', '</mark>', '…', :snippet_tokens) AS snippet,
+           NULL AS title, r.clause_id AS clause_id,
+           r.organization_id AS organization_id, r.question_id AS question_id, r.date AS date
+    FROM responses_fts JOIN responses r ON r.id = responses_fts.rowid
+    WHERE responses_fts MATCH :query {filters}
+"""
+
+
+def get_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def supported(connection) -> bool:
+    return connection.dialect.name == "sqlite"
+
+
+def ensure_index(connection) -> bool:
+    """Create the FTS tables and triggers if missing; True when they were just created"""
+    if not supported(connection):
+        return False
+    existing = set(connection.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('questions_fts', 'responses_fts')")
+    ).scalars())
+    for statement in INDEX_DDL:
+        connection.execute(text(statement))
+    return existing != set(FTS_TABLES)
+
+
+def rebuild(connection):
+    """Re-index every question and response from their tables"""
+    for table in FTS_TABLES:
+        connection.execute(text(f"INSERT INTO {table}({table}) VALUES ('rebuild')"))
+
+
+def fts_query(raw: str) -> str:
+    """Turn user input into a safe FTS5 query.
+
+    Words are quoted (so punctuation cannot break the syntax) and ANDed;
+    a trailing * keeps prefix matching and a bare OR is kept as an operator:
+    `MFA OR backup*` -> `"MFA" OR "backup"*`.
+    """
+    terms = []
+    for word in re.findall(r'"[^"]+"|\S+', raw):
+        if word == "OR":
+            if terms and terms[-1] != "OR":
+                terms.append(word)
+            continue
+        prefix = word.endswith("*")
+        word = word.strip('"*').replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    while terms and terms[-1] == "OR":
+        terms.pop()
+    return " ".join(terms)
+
+
+@router.get("/search", response_model=list[schemas.SearchHit])
+def search(
+    http_response: HTTPResponse,
+    q: str = Query(..., min_length=1),
+    scope: str = "all",
+    organization_id: Optional[int] = None,
+    clause_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    """Ranked full-text search with highlighted snippets.
+
+    Organization and date filters only apply to responses, so questions are
+    left out when either is given. The next page, if any, is in X-Next-Cursor.
+    """
+    if scope not in SCOPES:
+        raise HTTPException(status_code=400, detail=f"scope must be one of {', '.join(SCOPES)}")
+    if not supported(db.get_bind()):
+        raise HTTPException(status_code=501, detail="Full-text search needs the SQLite FTS5 index")
+    query = fts_query(q)
+    if not query:
+        return []
+
+    params = {"query": query, "snippet_tokens": SNIPPET_TOKENS}
+    parts = []
+    if scope in ("all", "questions") and not (organization_id or start_date or end_date):
+        filters = ""
+        if clause_id:
+            filters += " AND q.clause_id = :clause_id"
+        parts.append(QUESTION_HITS.format(filters=filters))
+    if scope in ("all", "responses"):
+        filters = ""
+        if organization_id:
+            filters += " AND r.organization_id = :organization_id"
+        if clause_id:
+            filters += " AND r.clause_id = :clause_id"
+        if start_date:
+            filters += " AND r.date >= :start_date"
+        if end_date:
+            filters += " AND r.date <= :end_date"
+        parts.append(RESPONSE_HITS.format(filters=filters))
+    if not parts:
+        return []
+    params.update(
+        organization_id=organization_id,
+        clause_id=clause_id,
+        start_date=start_date.isoformat() if start_date else None,
+        end_date=end_date.isoformat() if end_date else None,
+    )
+
+    offset = decode_offset_cursor(cursor)
+    statement = " UNION ALL ".join(parts) + " ORDER BY rank, type, id LIMIT :limit OFFSET :offset"
+    try:
+        rows = db.execute(text(statement), dict(params, limit=limit + 1, offset=offset)).mappings().all()
+    except OperationalError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid search query: {e.orig}")
+    if len(rows) > limit:
+        rows = rows[:limit]
+        http_response.headers["X-Next-Cursor"] = encode_offset_cursor(offset + limit)
+    return rows
+
+
+if __name__ == "__main__":
+    from database import engine, init_db
+
+    init_db()
+    with engine.begin() as connection:
+        if not supported(connection):
+            raise SystemExit("Full-text search is only available on SQLite")
+        rebuild(connection)
+        counts = [connection.execute(text(f"SELECT count(*) FROM {table}")).scalar() for table in FTS_TABLES]
+    print(f"Rebuilt the search index over {counts[0]} questions and {counts[1]} responses")
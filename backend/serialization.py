@@ -0,0 +1,211 @@
+"""
+Fast JSON responses and negotiated compression for large payloads.
+
+The list endpoints (/responses, /questions, /compare) select plain column
+tuples and return them through `json_response`, skipping FastAPI's per-row
+pydantic validation and jsonable_encoder walk: the rows come straight from
+our own tables, so validating them again on the way out buys nothing.
+Routes keep their `response_model` for the OpenAPI schema. Encoding uses
+orjson when it is installed and the stdlib json otherwise (same output).
+
+CompressionMiddleware compresses any response of at least
+COMPRESS_MIN_BYTES with brotli (when the optional `brotli` package is
+installed) or gzip, whichever the client's Accept-Encoding prefers. A
+strong ETag names exactly one sequence of bytes, so a compressed body gets
+its coding appended to the tag (`"v"` becomes `"v-gzip"`), and
+If-None-Match accepts a tag with or without that suffix.
+"""
+import json
+import os
+import zlib
+from datetime import date, datetime
+from enum import Enum
+from typing import Optional
+
+from fastapi import Response as HTTPResponse
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder is used instead
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4  # brotli's fast end; higher levels cost far more CPU than they save in bytes
+# Server-sent events must reach the client as they are written, not when a compressor flushes
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+# Every coding an ETag suffix may name, including ones this process cannot produce (another worker might)
+ETAG_CODINGS = ("br", "gzip")
+
+
+def _default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def records(rows, model: type[BaseModel]) -> list[dict]:
+    """Rows (ORM objects or named column tuples) as dicts with `model`'s fields, unvalidated"""
+    fields = tuple(model.model_fields)
+    if rows and getattr(rows[0], "_fields", None) == fields:
+        # Rows selected in field order: zip is several times faster than attribute lookups
+        return [dict(zip(fields, row)) for row in rows]
+    return [{field: getattr(row, field) for field in fields} for row in rows]
+
+
+def json_response(content, http_response: Optional[HTTPResponse] = None) -> FastJSONResponse:
+    """Encode `content` directly, keeping headers already set on the injected response (ETag, X-Next-Cursor)"""
+    headers = None
+    if http_response is not None:
+        headers = {key: value for key, value in http_response.headers.items() if key != "content-length"}
+    return FastJSONResponse(content, headers=headers)
+
+
+class _Gzip:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+# In order of preference when the client weighs them equally
+ENCODERS = {"br": _Brotli} if brotli is not None else {}
+ENCODERS["gzip"] = _Gzip
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """The supported encoding the client weighs highest in Accept-Encoding, or None"""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for encoding in ENCODERS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def encoded_etag(tag: str, encoding: Optional[str]) -> str:
+    """The ETag of `tag`'s representation compressed with `encoding`; weak tags are left as they are"""
+    if not encoding or not tag.startswith('"'):
+        return tag
+    return f'{tag[:-1]}-{encoding}"'
+
+
+def etag_matches(if_none_match: str, tag: str) -> bool:
+    """Whether If-None-Match names `tag`, in any content coding, or is `*`"""
+    if if_none_match.strip() == "*":
+        return True
+    accepted = {tag, *(encoded_etag(tag, coding) for coding in ETAG_CODINGS)}
+    return any(value.strip() in accepted for value in if_none_match.split(","))
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware: one-shot bodies are compressed whole, streamed ones chunk by chunk"""
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        encoder = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                return await send(message)
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                start["headers"] = list(start.get("headers", []))
+                headers = MutableHeaders(raw=start["headers"])
+                if (
+                    "content-encoding" in headers
+                    or headers.get("content-type", "").startswith(UNCOMPRESSED_TYPES)
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start)
+                    return await send(message)
+                encoder = ENCODERS[encoding]()
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers:
+                    headers["ETag"] = encoded_etag(headers["etag"], encoding)
+                if not more_body:
+                    body = encoder.finish(body)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    return await send({"type": "http.response.body", "body": body})
+                del headers["Content-Length"]
+                await send(start)
+
+            if more_body:
+                chunk = encoder.chunk(body)
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": encoder.finish(body)})
+
+        await self.app(scope, receive, send_compressed)
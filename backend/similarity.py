@@ -0,0 +1,167 @@
+"""
+Pairwise organization similarity from their latest answers.
+
+Each organization's latest answer per question (from the analytics
+snapshot) is one-hot encoded into Yes/No/Not applicable indicator
+matrices, so for all pairs at once
+
+    shared[a, b] = questions both organizations answered
+    agree[a, b]  = questions they answered the same way
+
+are a handful of matrix products, and similarity = agree / shared.
+Results are cached per filter set and dropped as soon as the snapshot's
+versions (responses) or the organization list change.
+
+The ranked pairs are also what the AI comparison screens should offer
+first: the least similar pairs with enough shared questions are where a
+written comparison says something new.
+"""
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import NamedTuple, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+import analytics
+import crud
+import startup
+
+np = startup.LazyModule("numpy")
+
+router = APIRouter()
+get_db = analytics.get_db
+
+SIMILARITY_CACHE_ENTRIES = 32
+
+
+class SimilarityMatrix(NamedTuple):
+    organization_ids: list
+    similarity: "np.ndarray"  # float, NaN where no shared questions
+    shared: "np.ndarray"  # int, questions answered by both
+
+
+def compute(latest: "np.ndarray") -> "tuple[np.ndarray, np.ndarray]":
+    """(similarity, shared) for an organizations x questions matrix of latest answer codes"""
+    answered = (latest != analytics.NO_ANSWER).astype(np.float32)
+    shared = answered @ answered.T
+    agree = np.zeros_like(shared)
+    for code in range(len(analytics.RESPONSE_CODES)):
+        indicator = (latest == code).astype(np.float32)
+        agree += indicator @ indicator.T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        similarity = np.where(shared > 0, agree / shared, np.nan)
+    return similarity, shared.astype(np.int64)
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def similarity_matrix(
+    db: Session,
+    clause_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> SimilarityMatrix:
+    """All-pairs similarity for the filters, served from cache while the data is unchanged"""
+    data = analytics.snapshot(db)
+    organizations = crud.reference_snapshot(db, "organizations")
+    questions = crud.reference_snapshot(db, "questions")
+    key = (data.built_from, organizations.version, questions.version, clause_id, start_date, end_date)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    org_ids = [org.id for org in organizations.rows]
+    question_ids = [question.id for question in questions.rows if not clause_id or question.clause_id == clause_id]
+    latest = data.latest_answers(data.mask(None, clause_id, None, start_date, end_date), org_ids, question_ids)
+    result = SimilarityMatrix(org_ids, *compute(latest))
+
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > SIMILARITY_CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return result
+
+
+def _score(value) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+def top_k(matrix: SimilarityMatrix, organization_id: int, k: int, min_shared: int = 1) -> list[dict]:
+    """The k organizations most similar to `organization_id`"""
+    row = matrix.organization_ids.index(organization_id)
+    candidates = [
+        (matrix.similarity[row, col], matrix.shared[row, col], org_id)
+        for col, org_id in enumerate(matrix.organization_ids)
+        if col != row and matrix.shared[row, col] >= min_shared
+    ]
+    candidates.sort(key=lambda item: (-item[0], -item[1], item[2]))
+    return [
+        {"organization_id": org_id, "similarity": _score(score), "shared_questions": int(shared)}
+        for score, shared, org_id in candidates[:k]
+    ]
+
+
+def ranked_pairs(matrix: SimilarityMatrix, limit: int, min_shared: int = 1, most_similar: bool = False) -> list[dict]:
+    """Distinct organization pairs ordered by similarity (least similar first by default)"""
+    rows, cols = np.triu_indices(len(matrix.organization_ids), k=1)
+    keep = matrix.shared[rows, cols] >= min_shared
+    rows, cols = rows[keep], cols[keep]
+    scores = matrix.similarity[rows, cols]
+    order = np.argsort(-scores if most_similar else scores, kind="stable")[:limit]
+    return [
+        {
+            "org1_id": matrix.organization_ids[rows[i]],
+            "org2_id": matrix.organization_ids[cols[i]],
+            "similarity": _score(scores[i]),
+            "shared_questions": int(matrix.shared[rows[i], cols[i]]),
+        }
+        for i in order
+    ]
+
+
+@router.get("/analytics/similarity")
+def organization_similarity(
+    organization_id: Optional[int] = None,
+    top_k_count: int = Query(5, alias="top_k", ge=1, le=100),
+    min_shared: int = Query(1, ge=1),
+    clause_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+):
+    """Similarity of organizations by their latest Yes/No/Not applicable answers.
+
+    Without `organization_id` returns the full matrix (null where two
+    organizations share no answered question); with it, the `top_k` most
+    similar organizations.
+    """
+    matrix = similarity_matrix(db, clause_id, start_date, end_date)
+    if organization_id is None:
+        return {
+            "organization_ids": matrix.organization_ids,
+            "similarity": [[_score(value) for value in row] for row in matrix.similarity],
+            "shared_questions": matrix.shared.tolist(),
+        }
+    if organization_id not in matrix.organization_ids:
+        raise HTTPException(status_code=404, detail="Organization not found")
+    return top_k(matrix, organization_id, top_k_count, min_shared)
+
+
+@router.get("/analytics/similarity/pairs")
+def similarity_pairs(
+    limit: int = Query(10, ge=1, le=500),
+    min_shared: int = Query(5, ge=1),
+    most_similar: bool = False,
+    clause_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+):
+    """Organization pairs ranked for AI comparison: least similar first (most_similar=true flips it)"""
+    matrix = similarity_matrix(db, clause_id, start_date, end_date)
+    return ranked_pairs(matrix, limit, min_shared, most_similar)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+/ai/compare/batch against the offline stub model, plus the shared rate limiter and retries
+"""
+import json
+import os
+import sys
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import ai_batch
+import ai_client
+import ai_compare
+import schemas
+from ai_cache import ComparisonCache
+from ai_prompt import LocalStubModel, StubRateLimitError
+from app import app
+from database import read_engine
+
+
+@pytest.fixture
+def stub(monkeypatch, tmp_path):
+    monkeypatch.setattr(ai_compare, "MODEL_NAME", ai_compare.LOCAL_STUB_MODEL)
+    monkeypatch.setattr(ai_compare, "comparison_cache", ComparisonCache(str(tmp_path / "cache.db")))
+    monkeypatch.setattr(ai_client, "rate_limiter", ai_client.TokenBucket(0, 1))
+    monkeypatch.setattr(ai_client, "AI_BACKOFF_SECONDS", 0.01)
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_batch_reads_once_and_streams_a_line_per_peer(stub, seeded_db):
+    client = TestClient(app)
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(read_engine, "before_cursor_execute", record)
+    try:
+        response = client.post("/ai/compare/batch", json={"anchor_id": 1, "peer_ids": [2, 3, 1, 2]})
+    finally:
+        event.remove(read_engine, "before_cursor_execute", record)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = _lines(response)
+    assert sorted(line["peer_id"] for line in lines) == [2, 3]
+    assert all(line["status"] == "done" and line["cache"] == "MISS" for line in lines)
+    assert len([statement for statement in statements if "FROM responses" in statement]) == 1
+
+    again = _lines(client.post("/ai/compare/batch", json={"anchor_id": 1, "peer_ids": [3]}))
+    assert again[0]["cache"] == "HIT"
+    assert client.post("/ai/compare/batch", json={"anchor_id": 1, "peer_ids": [99]}).status_code == 404
+    assert client.post("/ai/compare/batch", json={"anchor_id": 1, "peer_ids": [1]}).status_code == 400
+
+
+def test_peers_run_concurrently_and_survive_429s(stub, monkeypatch):
+    monkeypatch.setattr(ai_compare, "AI_STUB_LATENCY", 0.2)
+    monkeypatch.setattr(ai_compare, "AI_STUB_429_RATE", 0.3)
+    monkeypatch.setattr(ai_client, "AI_MAX_RETRIES", 20)
+    monkeypatch.setattr(ai_batch, "AI_BATCH_CONCURRENCY", 4)
+    monkeypatch.setattr(ai_batch, "_executor", None)
+    anchor, *peers = [schemas.Organization(id=i, name=f"Org {i}", year_of_association=2020) for i in range(9)]
+    packed = {org.id: [] for org in [anchor] + peers}
+
+    started = time.perf_counter()
+    lines = [json.loads(line) for line in ai_batch.run_batch(anchor, peers, packed, schemas.AiCompareBatchCreate(
+        anchor_id=0, peer_ids=[peer.id for peer in peers],
+    ))]
+    elapsed = time.perf_counter() - started
+    ai_batch._executor.shutdown()
+
+    assert sorted(line["peer_id"] for line in lines) == list(range(1, 9))
+    assert all(line["status"] == "done" for line in lines)
+    # Four workers: far less than the same comparisons run back to back, retries included
+    assert elapsed < sum(line["elapsed_ms"] for line in lines) / 1000 / 2
+
+
+def test_retries_back_off_exponentially_then_give_up():
+    delays = []
+    model = ai_client.RateLimitedModel(
+        LocalStubModel(rate_limit_rate=1.0), ai_client.TokenBucket(0, 1), max_retries=3, sleep=delays.append
+    )
+    with pytest.raises(StubRateLimitError):
+        model.generate_content("prompt")
+    assert model.retries == 3
+    bases = [ai_client.AI_BACKOFF_SECONDS * 2 ** attempt for attempt in range(3)]
+    assert all(base / 2 <= delay <= base for delay, base in zip(delays, bases))
+
+    class Broken:
+        def generate_content(self, prompt):
+            raise ValueError("bad request")
+
+    model = ai_client.RateLimitedModel(Broken(), ai_client.TokenBucket(0, 1), sleep=delays.append)
+    with pytest.raises(ValueError):
+        model.generate_content("prompt")
+    assert model.retries == 0
+
+
+def test_token_bucket_paces_calls_after_the_burst():
+    now = [0.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    bucket = ai_client.TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=sleep)
+    for _ in range(6):
+        bucket.acquire()
+    assert now[0] == pytest.approx(2.0)  # two free, then one every half second
+
+    bucket.drain()
+    bucket.acquire()
+    assert now[0] == pytest.approx(2.5)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+/ai/compare result cache, exercised against a stub in place of genai
+"""
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import ai_compare
+from ai_cache import ComparisonCache
+from app import app
+
+
+class StubGenAI:
+    """Counts generate_content calls and answers with fixed JSON"""
+
+    def __init__(self, delay: float = 0):
+        self.calls = 0
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def configure(self, api_key):
+        pass
+
+    def GenerativeModel(self, name):
+        def generate_content(prompt):
+            with self._lock:
+                self.calls += 1
+            time.sleep(self.delay)
+            return SimpleNamespace(text='{"similarities": ["a"], "differences": [], "summary": "stub"}')
+        return SimpleNamespace(generate_content=generate_content)
+
+
+@pytest.fixture
+def stub(monkeypatch, tmp_path, seeded_db):
+    genai = StubGenAI()
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    monkeypatch.setattr(ai_compare, "genai", genai)
+    monkeypatch.setattr(ai_compare, "comparison_cache", ComparisonCache(str(tmp_path / "cache.db")))
+    return genai
+
+
+def test_repeat_request_is_served_from_cache(stub):
+    client = TestClient(app)
+    first = client.get("/ai/compare?org1_id=1&org2_id=2")
+    second = client.get("/ai/compare?org1_id=1&org2_id=2")
+    assert first.json() == second.json() == {"similarities": ["a"], "differences": [], "summary": "stub"}
+    assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("MISS", "HIT")
+    assert stub.calls == 1
+
+    client.get("/ai/compare?org1_id=1&org2_id=2&clause_id=1")
+    assert stub.calls == 2
+
+
+def test_persistent_tier_survives_a_new_process(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ComparisonCache(path).set("key", {"summary": "kept"})
+    assert ComparisonCache(path).get("key") == {"summary": "kept"}
+
+
+def test_expired_entries_are_ignored(tmp_path):
+    cache = ComparisonCache(str(tmp_path / "cache.db"), ttl=-1)
+    cache.set("key", {"summary": "stale"})
+    assert cache.get("key") is None
+
+
+def test_concurrent_identical_requests_are_coalesced(tmp_path):
+    cache = ComparisonCache(str(tmp_path / "cache.db"))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"summary": "once"}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("key", compute))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert [value for value, _ in results] == [{"summary": "once"}] * 5
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+AI comparison jobs: a job orphaned by a stopped worker is requeued, a live one is left alone, a deleted one is skipped
+"""
+import os
+import sys
+import time
+import uuid
+from datetime import timedelta
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import ai_client
+import ai_compare
+import ai_jobs
+from ai_cache import ComparisonCache
+from app import app
+from database import SessionLocal
+from models import AiComparisonJob
+
+
+@pytest.fixture
+def stub(monkeypatch, tmp_path):
+    monkeypatch.setattr(ai_compare, "MODEL_NAME", ai_compare.LOCAL_STUB_MODEL)
+    monkeypatch.setattr(ai_compare, "comparison_cache", ComparisonCache(str(tmp_path / "cache.db")))
+    monkeypatch.setattr(ai_client, "rate_limiter", ai_client.TokenBucket(0, 1))
+
+
+def _add_job(db, status, seconds_ago):
+    touched = ai_jobs._now() - timedelta(seconds=seconds_ago)
+    job_id = uuid.uuid4().hex
+    job = AiComparisonJob(
+        id=job_id, org1_id=1, org2_id=2, status=status, progress=40,
+        message="Model call 1 of 2 finished", created_at=touched, updated_at=touched,
+    )
+    db.add(job)
+    db.commit()
+    return job_id
+
+
+def _wait_until_finished(job_id, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = ai_jobs._load_job(job_id)
+        if job["status"] in ai_jobs.TERMINAL_STATUSES:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} still {job['status']}")
+
+
+def test_stale_jobs_are_requeued_once_and_live_ones_left_alone(stub, seeded_db):
+    db = SessionLocal()
+    stale_age = ai_jobs.AI_JOB_STALE_SECONDS * 2
+    ids = []
+    try:
+        ids = [_add_job(db, "running", stale_age), _add_job(db, "queued", stale_age), _add_job(db, "running", 0)]
+        orphaned_running, orphaned_queued, live = ids
+
+        assert sorted(ai_jobs.recover_stale_jobs()) == sorted([orphaned_running, orphaned_queued])
+        assert ai_jobs.recover_stale_jobs() == []
+        for job_id in (orphaned_running, orphaned_queued):
+            job = _wait_until_finished(job_id)
+            assert job["status"] == "done" and job["result"]
+
+        assert ai_jobs._load_job(live)["status"] == "running"
+    finally:
+        db.query(AiComparisonJob).filter(AiComparisonJob.id.in_(ids)).delete()
+        db.commit()
+        db.close()
+
+
+def test_job_timestamps_read_the_same_when_created_and_loaded(stub, seeded_db):
+    client = TestClient(app)
+    created = client.post("/ai/compare/jobs", json={"org1_id": 1, "org2_id": 2}).json()
+    try:
+        job = _wait_until_finished(created["id"])
+        loaded = client.get(f"/ai/compare/jobs/{created['id']}").json()
+        assert loaded["created_at"] == created["created_at"]
+        assert "+" not in created["created_at"] and not created["created_at"].endswith("Z")
+        assert job["updated_at"] >= job["created_at"]
+    finally:
+        db = SessionLocal()
+        db.query(AiComparisonJob).filter(AiComparisonJob.id == created["id"]).delete()
+        db.commit()
+        db.close()
+
+
+def test_a_deleted_job_is_skipped_and_its_stream_fails(stub, seeded_db, monkeypatch):
+    missing = uuid.uuid4().hex
+    ai_jobs._update_job(missing, status="running")
+    ai_jobs._pending.acquire()  # _run_job releases the slot its caller took
+    ai_jobs._run_job(missing)
+    assert ai_jobs._load_job(missing) is None
+
+    # Found by the 404 check and the first poll, gone by the second
+    db = SessionLocal()
+    try:
+        job_id = _add_job(db, "queued", 0)
+    finally:
+        db.close()
+    found = ai_jobs._load_job(job_id)
+    loads = iter([found, found, None])
+    monkeypatch.setattr(ai_jobs, "_load_job", lambda job_id: next(loads))
+    monkeypatch.setattr(ai_jobs, "AI_JOB_POLL_INTERVAL", 0)
+    try:
+        body = TestClient(app).get(f"/ai/compare/jobs/{job_id}/events").text
+        events = [line.split(": ", 1)[1] for line in body.splitlines() if line.startswith("event: ")]
+        assert events == ["progress", "failed"]
+        assert '"error": "Job not found"' in body
+    finally:
+        db = SessionLocal()
+        db.query(AiComparisonJob).filter(AiComparisonJob.id == job_id).delete()
+        db.commit()
+        db.close()
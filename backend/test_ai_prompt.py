@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Token budget and compaction logic of ai_prompt, run against the local stub model
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_prompt import LocalStubModel, estimate_tokens, run_comparison, summarize_clauses
+
+ORG1 = SimpleNamespace(name="Org A", year_of_association=2020, details="Federal ministry")
+ORG2 = SimpleNamespace(name="Org B", year_of_association=2021, details="Provincial department")
+
+
+def survey(clauses: int, questions: int, comment: str = "Backups are tested quarterly and MFA is enforced"):
+    return [
+        {
+            "clause_id": c,
+            "question_id": c * 100 + q,
+            "response_type": ["Yes", "No", "Not applicable"][q % 3],
+            "comment": f"{comment} ({q % 4})",
+            "date": "2024-01-01",
+        }
+        for c in range(1, clauses + 1)
+        for q in range(questions)
+    ]
+
+
+def test_small_survey_uses_a_single_compact_call():
+    model = LocalStubModel()
+    result = run_comparison(model, ORG1, ORG2, survey(2, 3), survey(2, 3), budget=2000)
+    assert len(model.prompts) == 1
+    assert "q100=Y" in model.prompts[0] and "{'clause_id'" not in model.prompts[0]
+    assert result["summary"].startswith("Local stub model")
+
+
+def test_comments_are_deduplicated_per_clause():
+    clauses = summarize_clauses(survey(1, 12))
+    assert len(clauses[1]["comments"]) == 4
+    assert len(clauses[1]["answers"]) == 12
+
+
+def test_latest_answer_wins():
+    responses = [
+        {"clause_id": 1, "question_id": 1, "response_type": "No", "comment": None, "date": "2024-01-01"},
+        {"clause_id": 1, "question_id": 1, "response_type": "Yes", "comment": None, "date": "2024-02-01"},
+    ]
+    assert summarize_clauses(responses)[1]["answers"] == {1: "Y"}
+
+
+def test_large_survey_falls_back_to_map_reduce_within_budget():
+    model = LocalStubModel()
+    budget = 800
+    run_comparison(model, ORG1, ORG2, survey(12, 25), survey(12, 25), budget=budget)
+    assert len(model.prompts) > 2  # several map calls plus one reduce
+    assert "Merge these partial results" in model.prompts[-1]
+    assert all(estimate_tokens(prompt) <= budget for prompt in model.prompts)
+
+
+def test_single_oversized_clause_is_trimmed_to_budget():
+    model = LocalStubModel()
+    budget = 300
+    run_comparison(model, ORG1, ORG2, survey(1, 200), survey(1, 200), budget=budget)
+    assert all(estimate_tokens(prompt) <= budget for prompt in model.prompts)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Columnar analytics snapshot: results match SQL, refreshes follow writes
+"""
+import os
+import sys
+from datetime import date
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+
+import analytics
+import crud
+import models
+from app import app
+
+
+def _sql_counts(db, **filters):
+    response = models.Response
+    query = db.query(response.organization_id, response.response_type, func.count())
+    query = crud.filter_responses(query, **filters).group_by(response.organization_id, response.response_type)
+    counts = {}
+    for org_id, response_type, count in query:
+        counts.setdefault(org_id, [0, 0, 0])[analytics.RESPONSE_CODES[response_type]] = count
+    return counts
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"clause_id": 1},
+    {"organization_id": 2, "start_date": date(2024, 1, 2)},
+    {"end_date": date(2024, 1, 2)},
+])
+def test_counts_match_sql(db, filters):
+    snapshot = analytics.snapshot(db)
+    selected = snapshot.mask(
+        [filters["organization_id"]] if "organization_id" in filters else None,
+        filters.get("clause_id"),
+        None,
+        filters.get("start_date"),
+        filters.get("end_date"),
+    )
+    assert snapshot.counts(selected) == _sql_counts(db, **{
+        "organization_id": None, "clause_id": None, "question_id": None,
+        "response_type": None, "start_date": None, "end_date": None, **filters,
+    })
+
+
+def test_inserts_append_and_edits_reload(db):
+    before = analytics.snapshot(db)
+    created = crud.create_response(db, {
+        "organization_id": 1, "clause_id": 1, "question_id": 1, "response_type": "Not applicable", "date": date(2030, 1, 1),
+    })
+    appended = analytics.snapshot(db)
+    assert len(appended) == len(before) + 1
+    assert appended.max_id == created.id
+    assert appended.built_from[1] == before.built_from[1]
+
+    matrix = appended.latest_answers(appended.mask([1]), [1], [1])
+    assert matrix.tolist() == [[analytics.RESPONSE_CODES[models.ResponseType.NOT_APPLICABLE]]]
+
+    crud.delete_response(db, created.id)
+    reloaded = analytics.snapshot(db)
+    assert len(reloaded) == len(before)
+    assert reloaded.built_from[1] != before.built_from[1]
+
+
+def test_endpoints(seeded_db):
+    client = TestClient(app)
+    counts = client.get("/analytics/counts", params={"organization_ids": [1, 2], "clause_id": 1}).json()
+    assert [row["organization_id"] for row in counts] == [1, 2]
+    assert all(row["Total"] == row["Yes"] + row["No"] + row["Not applicable"] for row in counts)
+
+    matrix = client.get("/analytics/matrix", params={"organization_ids": [3, 1], "clause_id": 2}).json()
+    assert matrix["organization_ids"] == [3, 1]
+    assert len(matrix["matrix"]) == 2
+    assert all(len(row) == len(matrix["question_ids"]) for row in matrix["matrix"])
+    assert all(cell is None or matrix["labels"][cell] for row in matrix["matrix"] for cell in row)
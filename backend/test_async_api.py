@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+USE_ASYNC_DB: the async crud functions and endpoints, on aiosqlite, match the sync ones
+"""
+import asyncio
+import os
+import sys
+import threading
+from datetime import date
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import async_api
+import crud
+import crud_async
+import versions
+from app import app
+from database import SessionLocal, get_async_sessionmaker, read_engine
+
+pytest.importorskip("aiosqlite")
+
+CHART_URLS = [
+    "/chart-data/yes-no",
+    "/chart-data/yes-no-comparison?org1_id=1&org2_id=2",
+    "/chart-data/yes-no-comparison?org_ids=1&org_ids=2&org_ids=3&clause_id=1",
+    "/chart-data/yes-no-comparison?org_ids=3&org_ids=1&start_date=2024-01-02",
+]
+
+
+@pytest.fixture
+def clients(seeded_db):
+    async_app = FastAPI()
+    async_app.include_router(async_api.router)
+    return TestClient(app), TestClient(async_app)
+
+
+def _run(function, *args):
+    """Await a crud_async function on a fresh AsyncSession"""
+    async def call():
+        async with get_async_sessionmaker()() as db:
+            return await function(db, *args)
+    return asyncio.run(call())
+
+
+@pytest.mark.parametrize("url", CHART_URLS + [
+    "/organizations", "/clauses", "/questions?clause_id=2", "/responses?organization_id=2&limit=1",
+    "/compare?organization_ids=1&organization_ids=3&clause_id=1",
+])
+def test_async_endpoints_match_the_sync_ones(clients, url):
+    sync_client, async_client = clients
+    expected, actual = sync_client.get(url), async_client.get(url)
+    assert actual.status_code == expected.status_code == 200
+    assert actual.json() == expected.json()
+    assert actual.headers.get("X-Next-Cursor") == expected.headers.get("X-Next-Cursor")
+
+
+def test_async_reads_match_crud(seeded_db):
+    db = SessionLocal()
+    try:
+        assert _run(crud_async.get_organizations, None, 2) == crud.get_organizations(db, None, 2)
+        assert _run(crud_async.get_organization, 2) == crud.get_organization(db, 2)
+        assert _run(crud_async.get_questions, 1) == crud.get_questions(db, 1)
+        assert _run(crud_async.question_count, None) == crud.question_count(db, None)
+        assert _run(crud_async.get_responses, 1, None, None, "Yes") == crud.get_responses(db, 1, response_type="Yes")
+    finally:
+        db.close()
+
+
+def test_async_writes_keep_the_aggregates_in_step(clients):
+    sync_client, async_client = clients
+    before = [sync_client.get(url).json() for url in CHART_URLS]
+    version = versions.current()["responses"]
+
+    created = _run(crud_async.create_response, {
+        "organization_id": 2, "clause_id": 1, "question_id": 1, "response_type": "Not applicable", "date": date(2024, 3, 1),
+    })
+    try:
+        assert versions.current()["responses"] > version
+        for url in CHART_URLS:
+            assert async_client.get(url).json() == sync_client.get(url).json()
+        assert sync_client.get("/chart-data/yes-no").json() != before[0]
+
+        updated = _run(crud_async.update_response, created.id, {
+            "organization_id": 2, "clause_id": 2, "question_id": 2, "response_type": "Yes", "date": date(2024, 3, 1),
+        })
+        assert updated.question_id == 2
+        for url in CHART_URLS:
+            assert async_client.get(url).json() == sync_client.get(url).json()
+    finally:
+        assert _run(crud_async.delete_response, created.id) is True
+    assert _run(crud_async.delete_response, created.id) is False
+    assert [sync_client.get(url).json() for url in CHART_URLS] == before
+    assert [async_client.get(url).json() for url in CHART_URLS] == before
+
+
+def test_version_reread_runs_off_the_event_loop(seeded_db, monkeypatch):
+    threads = []
+    record = lambda *args: threads.append(threading.current_thread())
+
+    async def check():
+        monkeypatch.setattr(versions, "_checked_at", 0.0)
+        event.listen(read_engine, "before_cursor_execute", record)
+        try:
+            return await versions.current_async(), threading.current_thread()
+        finally:
+            event.remove(read_engine, "before_cursor_execute", record)
+
+    current, loop_thread = asyncio.run(check())
+    assert current["responses"] >= 1
+    assert threads and loop_thread not in threads
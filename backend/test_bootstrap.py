@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+GET /bootstrap: one payload of reference data, rebuilt only when it changes
+"""
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import bootstrap
+import crud
+import models
+import serialization
+import versions
+from app import app
+from database import ReadSessionLocal, SessionLocal
+
+
+@pytest.fixture
+def client(seeded_db):
+    return TestClient(app)
+
+
+def test_payload_matches_reference_endpoints(client):
+    data = client.get("/bootstrap").json()
+    assert data["organizations"] == client.get("/organizations").json()
+    assert data["clauses"] == client.get("/clauses").json()
+    flattened = [
+        dict(question, clause_id=group["clause_id"]) for group in data["questions"] for question in group["questions"]
+    ]
+    assert sorted(flattened, key=lambda question: question["id"]) == client.get("/questions").json()
+    assert all("clause_id" not in question for group in data["questions"] for question in group["questions"])
+
+
+def test_blob_is_reused_until_reference_data_changes(client):
+    first = client.get("/bootstrap", headers={"Accept-Encoding": "identity"})
+    tag = first.headers["ETag"]
+    assert tag == f'"{first.json()["version"]}"'
+
+    db = ReadSessionLocal()
+    try:
+        assert bootstrap.blob(db) is bootstrap.blob(db)
+    finally:
+        db.close()
+    assert client.get("/bootstrap", headers={"If-None-Match": tag}).status_code == 304
+    response_id = question_id = None
+    try:
+        # Responses are not reference data
+        response_id = client.post("/responses", json={
+            "organization_id": 1, "clause_id": 1, "question_id": 1, "response_type": "Yes", "date": "2024-02-01",
+        }).json()["id"]
+        assert client.get("/bootstrap", headers={"If-None-Match": tag}).status_code == 304
+
+        question_id = client.post("/questions", json={"text": "Bootstrap?", "title": "Q boot", "clause_id": 2}).json()["id"]
+        fresh = client.get("/bootstrap", headers={"If-None-Match": tag})
+        assert fresh.status_code == 200
+        assert fresh.headers["ETag"] != tag
+        group = next(group for group in fresh.json()["questions"] if group["clause_id"] == 2)
+        assert "Q boot" in [question["title"] for question in group["questions"]]
+    finally:
+        _remove(response_id, question_id)
+
+
+def _remove(response_id, question_id):
+    """Undo the writes above, so the session-wide seeded_db is left as found"""
+    db = SessionLocal()
+    try:
+        if response_id is not None:
+            crud.delete_response(db, response_id)
+        if question_id is not None:
+            db.delete(db.get(models.Question, question_id))
+            versions.bump(db, "questions")
+            db.commit()
+    finally:
+        db.close()
+
+
+def test_compressed_body_is_kept_with_the_blob(client, monkeypatch):
+    monkeypatch.setattr(serialization, "COMPRESS_MIN_BYTES", 0)
+    response = client.get("/bootstrap", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    plain = client.get("/bootstrap", headers={"Accept-Encoding": "identity"})
+    assert response.json() == plain.json()
+    assert "gzip" in bootstrap._blob.bodies
+    # Each coding is its own representation, and either tag revalidates
+    assert response.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+    for tag in (response.headers["ETag"], plain.headers["ETag"]):
+        assert client.get("/bootstrap", headers={"If-None-Match": tag, "Accept-Encoding": "gzip"}).status_code == 304
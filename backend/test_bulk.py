@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+/responses/bulk: bad rows and NDJSON lines are reported by index, the rest are inserted
+"""
+import json
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import crud
+import models
+from app import app
+
+MARKER = "bulk test"
+
+
+def _row(day, **fields):
+    return dict({
+        "organization_id": 1, "clause_id": 1, "question_id": 1, "response_type": "Yes",
+        "date": f"2030-01-{day:02d}", "comment": MARKER,
+    }, **fields)
+
+
+@pytest.fixture
+def client(db):
+    yield TestClient(app)
+    # seeded_db is shared by the whole session: remove what the test inserted
+    for (response_id,) in db.query(models.Response.id).filter(models.Response.comment == MARKER).all():
+        crud.delete_response(db, response_id)
+
+
+def _inserted(db):
+    db.expire_all()
+    return sorted(day.day for (day,) in db.query(models.Response.date).filter(models.Response.comment == MARKER))
+
+
+def test_mixed_array_inserts_the_valid_rows(client, db):
+    rows = [_row(1), _row(2, response_type="Maybe"), _row(3), {"organization_id": 1}, _row(5)]
+    result = client.post("/responses/bulk", params={"chunk_size": 2}, json=rows).json()
+
+    assert result["received"] == 5 and result["inserted"] == 3
+    assert [error["index"] for error in result["errors"]] == [1, 3]
+    assert result["errors"][0]["detail"].startswith("response_type: Input should be")
+    assert "date: Field required" in result["errors"][1]["detail"]
+    assert _inserted(db) == [1, 3, 5]
+
+    assert client.post("/responses/bulk", content=b'{"not": "a list"}').status_code == 400
+
+
+def test_ndjson_reports_bad_lines_by_line_number(client, db):
+    lines = [json.dumps(_row(1)), "", "{not json", json.dumps(_row(4, question_id="x")), json.dumps(_row(5))]
+    result = client.post(
+        "/responses/bulk", content="\n".join(lines).encode(), headers={"Content-Type": "application/x-ndjson"},
+    ).json()
+
+    assert result["received"] == 4 and result["inserted"] == 2
+    assert [error["index"] for error in result["errors"]] == [2, 3]
+    assert result["errors"][0]["detail"].startswith("Invalid JSON")
+    assert result["errors"][1]["detail"].startswith("question_id:")
+    assert _inserted(db) == [1, 5]
+
+
+def test_failed_chunk_is_retried_row_by_row(client, db, monkeypatch):
+    insert_responses = crud.insert_responses
+
+    def reject_day_3(session, rows):
+        if any(row["date"].day == 3 for row in rows):
+            raise RuntimeError("constraint failed")
+        return insert_responses(session, rows)
+
+    monkeypatch.setattr(crud, "insert_responses", reject_day_3)
+    result = client.post("/responses/bulk", params={"chunk_size": 3}, json=[_row(day) for day in range(1, 6)]).json()
+
+    assert result["inserted"] == 4
+    assert result["errors"] == [{"index": 2, "detail": "constraint failed"}]
+    assert _inserted(db) == [1, 2, 4, 5]
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Yes/no comparison chart: the N-organization query gives each organization the numbers the pairwise one did
+"""
+import os
+import random
+import sys
+from datetime import date, timedelta
+from itertools import permutations
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import sessionmaker
+
+import charts
+import current_answers
+import models
+
+FILTERS = [
+    {},
+    {"clause_id": 1},
+    {"clause_id": 2, "start_date": date(2024, 1, 20)},
+    {"end_date": date(2024, 2, 1)},
+    {"start_date": date(2024, 1, 10), "end_date": date(2024, 2, 10)},
+]
+
+
+@pytest.fixture
+def survey(tmp_path):
+    """A database of its own: four organizations, two clauses of three questions, at most one answer per question.
+
+    Organization 4 never answers. seeded_db is not used: other tests add
+    repeat answers to it, which the pairwise endpoint counted differently.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'charts.db'}")
+    models.Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        db.add_all([models.Organization(id=i, name=f"Org {i}", year_of_association=2020) for i in range(1, 5)])
+        db.add_all([models.Clause(id=i, name=f"clause_{i}", title=f"Clause {i}") for i in (1, 2)])
+        db.add_all([
+            models.Question(id=i, text=f"Question {i}?", title=f"Q{i}", clause_id=(i - 1) // 3 + 1) for i in range(1, 7)
+        ])
+        db.commit()
+        rng = random.Random(4)
+        db.execute(insert(models.Response), [
+            {
+                "organization_id": org_id,
+                "clause_id": (question_id - 1) // 3 + 1,
+                "question_id": question_id,
+                "response_type": rng.choice(list(models.ResponseType)),
+                "date": date(2024, 1, 1) + timedelta(days=rng.randrange(60)),
+            }
+            for org_id in range(1, 4)
+            for question_id in range(1, 7)
+            if rng.random() < 0.8
+        ])
+        # Plain inserts, so nothing is published to this process's live hub; build the projection after
+        current_answers.rebuild(db)
+        yield db
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def _total_questions(db, clause_id):
+    query = db.query(func.count(models.Question.id))
+    return (query.filter(models.Question.clause_id == clause_id) if clause_id else query).scalar()
+
+
+def _pairwise_counts(db, org_id, clause_id=None, start_date=None, end_date=None):
+    """(Yes, No, Not Applicable, No Response) as the two-organization endpoint computed them, one org at a time"""
+    query = db.query(models.Response.question_id, models.Response.response_type).filter(
+        models.Response.organization_id == org_id
+    )
+    if clause_id:
+        query = query.filter(models.Response.clause_id == clause_id)
+    if start_date:
+        query = query.filter(models.Response.date >= start_date)
+    if end_date:
+        query = query.filter(models.Response.date <= end_date)
+    answers = query.all()
+
+    def distinct_questions(response_type):
+        return len({question_id for question_id, answer in answers if answer == response_type})
+
+    return (
+        distinct_questions(models.ResponseType.YES),
+        distinct_questions(models.ResponseType.NO),
+        distinct_questions(models.ResponseType.NOT_APPLICABLE),
+        _total_questions(db, clause_id) - len({question_id for question_id, _ in answers}),
+    )
+
+
+def _chart(db, org_ids, clause_id=None, start_date=None, end_date=None):
+    organizations = {org.id: org for org in db.query(models.Organization)}
+    rows = db.execute(charts.yes_no_comparison_query(org_ids, clause_id, start_date, end_date)).all()
+    return charts.yes_no_comparison_chart(rows, org_ids, organizations, _total_questions(db, clause_id))
+
+
+def _column(chart, org_id):
+    return tuple(row[f"Org {org_id}"] for row in chart)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_every_pair_matches_the_pairwise_counts(survey, filters):
+    for org1_id, org2_id in permutations(range(1, 5), 2):
+        chart = _chart(survey, [org1_id, org2_id], **filters)
+        assert [row["name"] for row in chart] == charts.COMPARISON_LABELS
+        assert list(chart[0]) == ["name", f"Org {org1_id}", f"Org {org2_id}"]
+        assert _column(chart, org1_id) == _pairwise_counts(survey, org1_id, **filters)
+        assert _column(chart, org2_id) == _pairwise_counts(survey, org2_id, **filters)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_n_organizations_match_their_pairs(survey, filters):
+    chart = _chart(survey, [3, 1, 4, 2], **filters)
+    assert list(chart[0]) == ["name", "Org 3", "Org 1", "Org 4", "Org 2"]
+    for org_id in range(1, 5):
+        assert _column(chart, org_id) == _column(_chart(survey, [org_id, 1 + org_id % 4], **filters), org_id)
+    assert _column(chart, 4) == (0, 0, 0, _total_questions(survey, filters.get("clause_id")))
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Columnar snapshot files: exact round trips, zero-copy loading, import into a fresh database
+"""
+import os
+import sqlite3
+import subprocess
+import sys
+from datetime import date
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import analytics
+import columnar_snapshot
+import crud
+import models
+import versions
+from database import ReadSessionLocal
+
+BACKEND = os.path.dirname(os.path.abspath(__file__))
+RESPONSE_COLUMNS = "id, organization_id, clause_id, question_id, response_type, date, comment"
+
+
+def _export(path):
+    db = ReadSessionLocal()
+    try:
+        return columnar_snapshot.export(db, str(path)), analytics.snapshot(db)
+    finally:
+        db.close()
+
+
+def _rows(snapshot):
+    comments = snapshot.comments() + [None]
+    columns = [snapshot.column(name).tolist() for name in columnar_snapshot.COLUMNS]
+    return [
+        (row_id, org_id, clause_id, question_id, columnar_snapshot.RESPONSE_TYPES[code].name,
+         date.fromordinal(ordinal).isoformat(), comments[comment])
+        for row_id, org_id, clause_id, question_id, code, ordinal, comment in zip(*columns)
+    ]
+
+
+def _database_rows(url, statement=f"SELECT {RESPONSE_COLUMNS} FROM responses ORDER BY id"):
+    connection = sqlite3.connect(url.removeprefix("sqlite:///"))
+    try:
+        return connection.execute(statement).fetchall()
+    finally:
+        connection.close()
+
+
+def test_export_loads_without_copying_and_matches_the_database(seeded_db, tmp_path):
+    path = tmp_path / "responses.ncs"
+    rows, live = _export(path)
+    snapshot = columnar_snapshot.ColumnarSnapshot(str(path))
+
+    assert len(snapshot) == rows == len(live)
+    assert _rows(snapshot) == _database_rows(os.environ["DATABASE_URL"])
+    for table, rows in snapshot.tables.items():
+        # Other tests may have added reference rows to seeded_db: compare with the live tables
+        ids = _database_rows(os.environ["DATABASE_URL"], f"SELECT id FROM {table} ORDER BY id")
+        assert [row["id"] for row in rows] == [row_id for row_id, in ids]
+    assert all(not array.flags.owndata and not array.flags.writeable for array in snapshot.raw.values())
+
+    offline = snapshot.to_analytics()
+    assert offline.counts(offline.mask()) == live.counts(live.mask())
+
+
+def test_columns_use_the_narrowest_type():
+    assert columnar_snapshot._narrow(np.array([738000, 738900]))[1].dtype == np.uint16
+    assert columnar_snapshot._narrow(np.array([-1, 0, 200]))[0] == -1
+    assert columnar_snapshot._narrow(np.array([-1, 0, 200]))[1].dtype == np.uint8
+    assert columnar_snapshot._narrow(np.array([1, 70_000]))[1].dtype == np.uint32
+
+
+def test_import_restores_a_fresh_database(seeded_db, tmp_path):
+    path = tmp_path / "responses.ncs"
+    _export(path)
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'restored.db'}")
+    command = [sys.executable, os.path.join(BACKEND, "columnar_snapshot.py"), "import", str(path)]
+
+    subprocess.run(command, env=env, check=True, capture_output=True)
+    assert _database_rows(env["DATABASE_URL"]) == _database_rows(os.environ["DATABASE_URL"])
+    # Refuses to merge into a database that already has data
+    assert subprocess.run(command, env=env, capture_output=True).returncode == 1
+
+
+def test_failed_import_leaves_the_database_empty_for_a_retry(seeded_db, tmp_path, monkeypatch):
+    path = tmp_path / "responses.ncs"
+    rows, _ = _export(path)
+    snapshot = columnar_snapshot.ColumnarSnapshot(str(path))
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    models.Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        versions.ensure_rows(connection)
+
+    calls = []
+    insert_responses = crud.insert_responses
+
+    def fail_on_second_chunk(db, chunk):
+        calls.append(len(chunk))
+        if len(calls) == 2:
+            raise RuntimeError("disk full")
+        return insert_responses(db, chunk)
+
+    db = sessionmaker(bind=engine)()
+    try:
+        monkeypatch.setattr(crud, "insert_responses", fail_on_second_chunk)
+        with pytest.raises(RuntimeError):
+            columnar_snapshot.import_snapshot(db, snapshot, chunk_size=2)
+        assert db.query(models.Response).count() == db.query(models.Organization).count() == 0
+
+        monkeypatch.setattr(crud, "insert_responses", insert_responses)
+        assert columnar_snapshot.import_snapshot(db, snapshot, chunk_size=2) == rows
+        assert db.query(models.Response).count() == rows
+    finally:
+        db.close()
+        engine.dispose()
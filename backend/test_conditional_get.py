@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+ETag / If-None-Match handling on the reference data endpoints
+"""
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import app
+from database import read_engine as engine
+
+
+@pytest.fixture
+def client(seeded_db):
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("url", ["/organizations", "/clauses", "/questions", "/questions?clause_id=1"])
+def test_revalidation_returns_304_without_queries(client, url):
+    first = client.get(url)
+    assert first.status_code == 200
+    tag = first.headers["ETag"]
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        second = client.get(url, headers={"If-None-Match": tag})
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert second.status_code == 304
+    assert second.headers["ETag"] == tag
+    assert statements == []
+
+
+def test_create_changes_the_etag(client):
+    tag = client.get("/organizations").headers["ETag"]
+    assert client.post("/organizations", json={"name": "Org ETag", "year_of_association": 2024}).status_code == 200
+
+    fresh = client.get("/organizations", headers={"If-None-Match": tag})
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != tag
+    assert "Org ETag" in [org["name"] for org in fresh.json()]
+
+
+def test_etag_depends_on_query(client):
+    assert client.get("/questions?clause_id=1").headers["ETag"] != client.get("/questions?clause_id=2").headers["ETag"]
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+current_answers projection: latest answer wins, history stays in responses
+"""
+import os
+import sys
+from datetime import date
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import crud
+import current_answers
+import models
+from app import app
+
+
+def _current(db, org_id):
+    db.expire_all()
+    return {
+        row.question_id: (row.response_type.value, row.date)
+        for row in db.query(models.CurrentAnswer).filter(models.CurrentAnswer.organization_id == org_id)
+    }
+
+
+def _answer(db, org_id, response_type, day):
+    return crud.create_response(db, {
+        "organization_id": org_id, "clause_id": 1, "question_id": 1, "response_type": response_type, "date": day,
+    })
+
+
+def test_writes_keep_latest_answer(db):
+    org = crud.create_organization(db, {"name": "Org Current", "year_of_association": 2024})
+    first = _answer(db, org.id, "No", date(2024, 3, 1))
+    assert _current(db, org.id) == {1: ("No", date(2024, 3, 1))}
+
+    _answer(db, org.id, "Yes", date(2024, 4, 1))
+    _answer(db, org.id, "Not applicable", date(2024, 2, 1))  # older: history only
+    assert _current(db, org.id) == {1: ("Yes", date(2024, 4, 1))}
+
+    crud.update_response(db, first.id, {
+        "organization_id": org.id, "clause_id": 1, "question_id": 1, "response_type": "No", "date": date(2024, 5, 1),
+    })
+    assert _current(db, org.id) == {1: ("No", date(2024, 5, 1))}
+
+    crud.delete_response(db, first.id)
+    assert _current(db, org.id) == {1: ("Yes", date(2024, 4, 1))}
+
+    crud.create_responses_bulk(db, [
+        {"organization_id": org.id, "clause_id": 1, "question_id": 1,
+         "response_type": models.ResponseType.NO, "date": date(2024, 6, day)}
+        for day in (2, 9, 5)
+    ])
+    assert _current(db, org.id) == {1: ("No", date(2024, 6, 9))}
+    assert db.query(models.Response).filter(models.Response.organization_id == org.id).count() == 5
+
+    client = TestClient(app)
+    chart = client.get("/chart-data/yes-no-comparison", params={"org_ids": [org.id]}).json()
+    assert {row["name"]: row["Org Current"] for row in chart}["No"] == 1
+    as_of = client.get("/chart-data/yes-no-comparison", params={"org_ids": [org.id], "end_date": "2024-04-30"}).json()
+    assert {row["name"]: row["Org Current"] for row in as_of}["Yes"] == 1
+
+
+def test_rebuild_matches_maintained_rows(db):
+    maintained = {
+        (row.organization_id, row.question_id): (row.response_id, row.response_type)
+        for row in db.query(models.CurrentAnswer)
+    }
+    current_answers.rebuild(db)
+    assert maintained == {
+        (row.organization_id, row.question_id): (row.response_id, row.response_type)
+        for row in db.query(models.CurrentAnswer)
+    }
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generator: distribution shape and bulk insertion
+"""
+import os
+import random
+import sys
+from collections import Counter
+from datetime import date
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func
+
+import generate_data
+import models
+from database import ReadSessionLocal
+
+
+def test_generated_rows_are_skewed_and_mixed():
+    rng = random.Random(7)
+    profiles = generate_data.organization_profiles(range(1, 21), rng)
+    questions = [(question_id, 1 + question_id // 5) for question_id in range(1, 21)]
+    rows = list(generate_data.generate_responses(profiles, questions, 20_000, rng, date(2024, 1, 1), 365))
+
+    assert len(rows) == 20_000
+    per_org = Counter(row["organization_id"] for row in rows).most_common()
+    assert per_org[0][1] > 5 * per_org[-1][1]
+
+    types = Counter(row["response_type"] for row in rows)
+    assert set(types) == {models.ResponseType.YES, models.ResponseType.NO, models.ResponseType.NOT_APPLICABLE}
+    assert 0.05 < types[models.ResponseType.NOT_APPLICABLE] / len(rows) < 0.11
+    assert all(date(2024, 1, 1) <= row["date"] < date(2025, 1, 1) for row in rows)
+
+
+def _response_totals():
+    db = ReadSessionLocal()
+    try:
+        rollup = models.ResponseRollup
+        return (
+            db.query(func.count(models.Response.id)).scalar(),
+            db.query(func.sum(rollup.yes_count + rollup.no_count + rollup.not_applicable_count)).scalar(),
+        )
+    finally:
+        db.close()
+
+
+def test_populate_keeps_rollups_in_step(seeded_db):
+    responses, counted = _response_totals()
+    assert responses == counted
+    assert generate_data.populate(organizations=3, clauses=2, questions_per_clause=2,
+                                  responses=2_500, chunk_size=1_000, verbose=False) == 2_500
+    assert _response_totals() == (responses + 2_500, responses + 2_500)
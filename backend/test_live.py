@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Live counts: committed writes fan out as one delta event, rollbacks publish nothing
+"""
+import asyncio
+import json
+import os
+import sys
+from datetime import date
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from starlette.concurrency import run_in_threadpool
+
+import crud
+import live
+import models
+from database import SessionLocal
+
+
+def _parse(body: bytes):
+    fields = dict(line.split(": ", 1) for line in body.decode().strip().splitlines())
+    return fields["event"], int(fields["id"]), json.loads(fields["data"])
+
+
+def _totals(counts, org_id):
+    return [sum(row[label] for row in counts if row["organization_id"] == org_id) for label in live.LABELS.values()]
+
+
+def _write(action, *args):
+    db = SessionLocal()
+    try:
+        return action(db, *args)
+    finally:
+        db.close()
+
+
+def test_writes_fan_out_to_every_stream(seeded_db):
+    async def scenario():
+        streams = [live._stream() for _ in range(3)]
+        snapshots = [_parse(await anext(stream)) for stream in streams]
+        kind, version, data = snapshots[0]
+        assert kind == "snapshot" and all(snapshot[1] == version for snapshot in snapshots)
+        before = _totals(data["counts"], 1)
+
+        created = await run_in_threadpool(_write, crud.create_response, {
+            "organization_id": 1, "clause_id": 2, "question_id": 2, "response_type": "No", "date": date(2024, 5, 1),
+        })
+        events = [await asyncio.wait_for(anext(stream), 5) for stream in streams]
+        assert events[0] is events[1] is events[2]  # encoded once, shared by every subscriber
+        kind, created_version, data = _parse(events[0])
+        assert kind == "delta" and created_version > version
+        assert data["deltas"] == [{"organization_id": 1, "clause_id": 2, "Yes": 0, "No": 1, "Not applicable": 0}]
+
+        await run_in_threadpool(_write, crud.update_response, created.id, {
+            "organization_id": 1, "clause_id": 2, "question_id": 2, "response_type": "Yes", "date": date(2024, 5, 1),
+        })
+        _, _, data = _parse(await asyncio.wait_for(anext(streams[0]), 5))
+        assert data["deltas"] == [{"organization_id": 1, "clause_id": 2, "Yes": 1, "No": -1, "Not applicable": 0}]
+
+        await run_in_threadpool(_write, crud.delete_response, created.id)
+        _, _, data = _parse(await asyncio.wait_for(anext(streams[0]), 5))
+        assert data["deltas"][0]["Yes"] == -1
+
+        # A late subscriber starts from a snapshot that already includes every write
+        late = live._stream()
+        kind, _, data = _parse(await anext(late))
+        assert kind == "snapshot" and _totals(data["counts"], 1) == before
+
+        for stream in streams + [late]:
+            await stream.aclose()
+        assert len(live.hub) == 0
+
+    asyncio.run(scenario())
+
+
+def test_rolled_back_writes_publish_nothing(seeded_db):
+    published = []
+    original = live.hub.publish
+    live.hub.publish = published.append
+    db = SessionLocal()
+    try:
+        response = db.query(models.Response).first()
+        live.stage(db, [response], delta=-1)
+        db.rollback()
+        assert live.PENDING_KEY not in db.info
+        db.commit()
+        assert published == []
+    finally:
+        live.hub.publish = original
+        db.close()
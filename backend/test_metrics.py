@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Request instrumentation: Server-Timing headers, /metrics and the slow-query log
+"""
+import logging
+import os
+import re
+import sys
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import metrics
+from app import app
+
+
+@pytest.fixture
+def client(seeded_db):
+    metrics.reset()
+    return TestClient(app)
+
+
+def test_server_timing_counts_statements(client):
+    response = client.get("/responses", params={"organization_id": 1, "limit": 5})
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    assert re.search(r"app;dur=[\d.]+", timing)
+    assert int(re.search(r'desc="(\d+) statements"', timing).group(1)) >= 1
+
+
+def test_metrics_groups_by_route_template(client):
+    client.get("/organizations/1")
+    client.get("/organizations/2")
+    client.get("/does-not-exist")
+
+    body = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/organizations/{org_id}",status="200"} 2' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/organizations/{org_id}"} 2' in body
+    assert 'route="unmatched",status="404"} 1' in body
+    assert 'db_statements_per_request_bucket{method="GET",route="/organizations/{org_id}",le="+Inf"} 2' in body
+
+
+def test_slow_queries_are_logged(client, monkeypatch, caplog):
+    monkeypatch.setattr(metrics, "SLOW_QUERY_MS", 1e-9)
+    with caplog.at_level(logging.WARNING, logger="ncert.slow_query"):
+        client.get("/responses", params={"limit": 1})
+    assert any("FROM responses" in record.getMessage() for record in caplog.records)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+EXPLAIN QUERY PLAN regression tests: every filtered read of the responses
+data must be served by an index, never by a full table scan, and the reads
+the composite indexes were added for must keep using them.
+"""
+import os
+import re
+import sys
+from contextlib import contextmanager
+from datetime import date
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+
+import ai_compare
+import analytics
+import charts
+import current_answers
+from database import ReadSessionLocal, read_engine as engine
+from app import app
+
+WATCHED_TABLES = ("responses", "response_rollups", "current_answers")
+# "SCAN t USING INDEX i" still walks the whole index, so any SCAN fails
+FULL_SCAN = re.compile(r"\bSCAN (%s)\b" % "|".join(WATCHED_TABLES))
+
+ENDPOINTS = [
+    "/compare?organization_ids=1&organization_ids=2",
+    "/compare?organization_ids=1&clause_id=1&start_date=2024-01-01&end_date=2024-06-30",
+    "/compare?clause_id=2&start_date=2024-01-01",
+    "/compare?organization_ids=1&format=ndjson",
+    "/responses?organization_id=1&limit=10",
+    "/responses?organization_id=1&clause_id=1&start_date=2024-01-01",
+    "/responses?organization_id=1&question_id=3",
+    "/chart-data/yes-no-comparison?org1_id=1&org2_id=2",
+    "/chart-data/yes-no-comparison?org_ids=1&org_ids=2&org_ids=3&clause_id=1&start_date=2024-01-01",
+    "/chart-data/yes-no-comparison?org1_id=1&org2_id=2&end_date=2024-06-30",
+]
+# Without these indexes the reads fall back to a weaker one rather than a scan
+ENDPOINT_INDEXES = {
+    "/compare?organization_ids=1&clause_id=1&start_date=2024-01-01&end_date=2024-06-30": "ix_responses_org_clause_date",
+    "/compare?clause_id=2&start_date=2024-01-01": "ix_responses_clause_date",
+    "/responses?organization_id=1&clause_id=1&start_date=2024-01-01": "ix_responses_org_clause_date",
+    "/responses?organization_id=1&question_id=3": "ix_responses_org_question",
+}
+
+END_DATE = date(2024, 6, 30)
+READS = {
+    "chart": (lambda db: db.execute(charts.yes_no_comparison_query([1, 2], 1, date(2024, 1, 1))).all(),
+              "ix_current_answers_clause_org"),
+    "chart as of end_date": (lambda db: db.execute(charts.yes_no_comparison_query([1, 2], None, None, END_DATE)).all(),
+                             "ix_responses_org_question"),
+    "chart as of end_date, clause": (lambda db: db.execute(charts.yes_no_comparison_query([1, 2], 1, None, END_DATE)).all(),
+                                     "ix_responses_org_clause_date"),
+    "as_of organizations, clause": (lambda db: db.execute(select(current_answers.as_of(END_DATE, [1, 2], 1))).all(),
+                                    "ix_responses_org_clause_date"),
+    "as_of clause": (lambda db: db.execute(select(current_answers.as_of(END_DATE, None, 2))).all(),
+                     "ix_responses_clause_date"),
+    "analytics snapshot load": (lambda db: analytics._load_columns(db, 1), "INTEGER PRIMARY KEY"),
+}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _seed(seeded_db):
+    pass
+
+
+@contextmanager
+def captured_statements():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def query_plan(statement, parameters):
+    with engine.connect() as conn:
+        raw = conn.connection.driver_connection
+        return [row[-1] for row in raw.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+
+def plans_of(statements):
+    return [query_plan(statement, parameters) for statement, parameters in statements]
+
+
+def uses_index(plans, index: str) -> bool:
+    return any(step.startswith("SEARCH ") and f" {index}" in step for plan in plans for step in plan)
+
+
+@pytest.mark.parametrize("url", ENDPOINTS)
+def test_endpoint_queries_use_indexes(url):
+    client = TestClient(app)
+    with captured_statements() as statements:
+        response = client.get(url)
+    assert response.status_code == 200, response.text
+
+    watched = [s for s in statements if any(t in s[0] for t in WATCHED_TABLES)]
+    assert watched, f"{url} issued no query against {WATCHED_TABLES}"
+    for statement, parameters in watched:
+        plan = query_plan(statement, parameters)
+        scans = [step for step in plan if FULL_SCAN.search(step)]
+        assert not scans, f"{url} regressed to a full scan: {scans}\n{statement}"
+    if url in ENDPOINT_INDEXES:
+        assert uses_index(plans_of(watched), ENDPOINT_INDEXES[url]), f"{url} no longer uses {ENDPOINT_INDEXES[url]}"
+
+
+@pytest.mark.parametrize("name", READS)
+def test_reads_use_their_index(name):
+    run, index = READS[name]
+    db = ReadSessionLocal()
+    try:
+        with captured_statements() as statements:
+            run(db)
+    finally:
+        db.close()
+
+    plans = plans_of([s for s in statements if any(t in s[0] for t in WATCHED_TABLES)])
+    assert plans, f"{name} issued no query against {WATCHED_TABLES}"
+    assert not [step for plan in plans for step in plan if FULL_SCAN.search(step)], f"{name} regressed to a full scan: {plans}"
+    assert uses_index(plans, index), f"{name} no longer uses {index}: {plans}"
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"clause_id": 1, "start_date": date(2024, 1, 1), "end_date": date(2024, 6, 30)},
+])
+def test_ai_compare_load_uses_an_index(filters):
+    db = ReadSessionLocal()
+    try:
+        with captured_statements() as statements:
+            ai_compare.load_responses(db, [1, 2, 3], **filters)
+    finally:
+        db.close()
+
+    (statement, parameters), = [s for s in statements if "FROM responses" in s[0]]
+    plan = query_plan(statement, parameters)
+    assert not [step for step in plan if FULL_SCAN.search(step)], f"/ai/compare load regressed to a full scan: {plan}"
+    assert any("USING INDEX" in step or "USING COVERING INDEX" in step for step in plan), plan
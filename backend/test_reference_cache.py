@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+In-process reference data snapshots: warm reads skip the database, writes invalidate
+"""
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import crud
+import versions
+from app import app
+from database import read_engine as engine
+
+
+def _statements(fn):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return result, statements
+
+
+def test_warm_lookups_issue_no_queries(db):
+    crud.get_organizations(db)
+    crud.get_questions(db)
+
+    (org, questions, total), statements = _statements(lambda: (
+        crud.get_organization(db, 1),
+        crud.get_questions(db, clause_id=1),
+        crud.question_count(db),
+    ))
+    assert org.name == "Org 1"
+    assert [question.clause_id for question in questions] == [1]
+    assert total >= 2
+    assert statements == []
+
+
+def test_create_invalidates_snapshot(db):
+    before = crud.reference_snapshot(db, "clauses")
+    clause = crud.create_clause(db, {"name": "clause_cache", "title": "Cached"})
+
+    after = crud.reference_snapshot(db, "clauses")
+    assert after.version != before.version
+    assert after.by_id[clause.id].name == "clause_cache"
+
+
+def test_snapshot_carries_the_version_its_rows_were_read_at(db, monkeypatch):
+    stored = crud.reference_snapshot(db, "organizations").version
+    # versions.current() has seen a commit that db's transaction predates
+    ahead = dict(versions.current(), organizations=stored + 1)
+    monkeypatch.setattr(versions, "current", lambda: ahead)
+
+    assert crud.reference_snapshot(db, "organizations").version == stored
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        crud.reference_snapshot(db, "organizations")
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    # Not mistaken for the newer version: the next read loads again
+    assert statements
+
+
+def test_charts_resolve_names_from_snapshot(seeded_db):
+    client = TestClient(app)
+    chart = client.get("/chart-data/yes-no-comparison", params={"org_ids": [1, 2]})
+    assert chart.status_code == 200
+    assert set(chart.json()[0]) == {"name", "Org 1", "Org 2"}
+    assert client.get("/chart-data/yes-no-comparison", params={"org_ids": [1, 999]}).status_code == 404
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Response rollups: the counters match a recount of `responses` after every kind of write
+"""
+import os
+import sys
+from collections import Counter
+from datetime import date
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import models
+import rollups
+from app import app
+from database import ReadSessionLocal
+
+
+def _counters_match_a_recount():
+    # A short read transaction per check: a held one would not see the writes, or would block them
+    db = ReadSessionLocal()
+    try:
+        recount = Counter()
+        for row in db.query(models.Response):
+            key = tuple(getattr(row, column) for column in rollups.KEY_COLUMNS)
+            recount[key + (rollups.COUNT_COLUMNS[row.response_type],)] += 1
+        counters = Counter()
+        for row in db.query(models.ResponseRollup):
+            key = tuple(getattr(row, column) for column in rollups.KEY_COLUMNS)
+            for column in rollups.COUNT_COLUMNS.values():
+                if getattr(row, column):
+                    counters[key + (column,)] = getattr(row, column)
+        return counters == recount
+    finally:
+        db.close()
+
+
+def _created_in_bulk(day):
+    db = ReadSessionLocal()
+    try:
+        return [response_id for (response_id,) in db.query(models.Response.id).filter(
+            models.Response.date == day, models.Response.response_type == models.ResponseType.NOT_APPLICABLE
+        )]
+    finally:
+        db.close()
+
+
+def _chart_totals(client):
+    return {row["name"]: (row["Yes"], row["No"], row["Not applicable"]) for row in client.get("/chart-data/yes-no").json()}
+
+
+def test_counters_follow_create_update_and_delete(seeded_db):
+    client = TestClient(app)
+    before = _chart_totals(client)
+    assert _counters_match_a_recount()
+
+    row = {"organization_id": 2, "clause_id": 1, "question_id": 1, "response_type": "No", "date": "2031-05-01"}
+    created = [client.post("/responses", json=row).json()["id"]]
+    try:
+        bulk = client.post("/responses/bulk", json=[dict(row, response_type="Not applicable")] * 2).json()
+        assert bulk["inserted"] == 2
+        created += _created_in_bulk(date(2031, 5, 1))
+        assert len(created) == 3
+        assert _counters_match_a_recount()
+        yes, no, not_applicable = before["Org 2"]
+        assert _chart_totals(client)["Org 2"] == (yes, no + 1, not_applicable + 2)
+
+        # Moves the count to another key and another type
+        moved = dict(row, question_id=2, clause_id=2, response_type="Yes", date="2031-05-02")
+        assert client.put(f"/responses/{created[0]}", json=moved).status_code == 200
+        assert _counters_match_a_recount()
+        assert _chart_totals(client)["Org 2"] == (yes + 1, no, not_applicable + 2)
+    finally:
+        for response_id in created:
+            assert client.delete(f"/responses/{response_id}").status_code == 200
+    assert _counters_match_a_recount()
+    assert _chart_totals(client) == before
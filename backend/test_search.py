@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+/search: FTS5 ranking, snippets, filters, pagination and trigger sync
+"""
+import os
+import sys
+from datetime import date
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import crud
+import search
+from app import app
+from database import SessionLocal
+
+
+@pytest.fixture(scope="module")
+def client(seeded_db):
+    db = SessionLocal()
+    try:
+        crud.create_question(db, {"text": "Is there a tested incident response plan?", "title": "Incident response", "clause_id": 2})
+        for org_id, comment, day in [
+            (1, "MFA enforced for all admin accounts", date(2024, 2, 1)),
+            (2, "Nightly backups, MFA rollout pending", date(2024, 3, 1)),
+            (3, "Offsite backup copies verified quarterly", date(2024, 4, 1)),
+        ]:
+            crud.create_response(db, {
+                "organization_id": org_id, "clause_id": 1, "question_id": 1,
+                "response_type": "Yes", "comment": comment, "date": day,
+            })
+    finally:
+        db.close()
+    return TestClient(app)
+
+
+def test_fts_query_is_quoted():
+    assert search.fts_query('MFA OR backup*') == '"MFA" OR "backup"*'
+    assert search.fts_query('"incident response" (x') == '"incident response" "(x"'
+    assert search.fts_query("OR OR") == ""
+
+
+def test_search_ranks_and_highlights(client):
+    hits = client.get("/search", params={"q": "MFA"}).json()
+    assert {hit["organization_id"] for hit in hits} == {1, 2}
+    assert all("<mark>MFA</mark>" in hit["snippet"] for hit in hits)
+
+    either = client.get("/search", params={"q": "MFA OR backup", "scope": "responses"}).json()
+    assert {hit["organization_id"] for hit in either} == {1, 2, 3}
+
+    questions = client.get("/search", params={"q": "incident", "scope": "questions"}).json()
+    assert [hit["title"] for hit in questions] == ["Incident response"]
+
+
+def test_filters_and_pagination(client):
+    hits = client.get("/search", params={"q": "backup", "start_date": "2024-03-15"}).json()
+    assert [hit["organization_id"] for hit in hits] == [3]
+
+    first = client.get("/search", params={"q": "MFA OR backup", "limit": 2})
+    assert len(first.json()) == 2
+    rest = client.get("/search", params={"q": "MFA OR backup", "limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    assert "X-Next-Cursor" not in rest.headers
+    assert {hit["id"] for hit in first.json()}.isdisjoint(hit["id"] for hit in rest.json())
+
+
+def test_index_follows_updates_and_deletes(client):
+    db = SessionLocal()
+    try:
+        response = crud.create_response(db, {
+            "organization_id": 1, "clause_id": 1, "question_id": 1,
+            "response_type": "No", "comment": "Firewall review overdue", "date": date(2024, 5, 1),
+        })
+        assert [hit["id"] for hit in client.get("/search", params={"q": "firewall"}).json()] == [response.id]
+        crud.update_response(db, response.id, {
+            "organization_id": 1, "clause_id": 1, "question_id": 1,
+            "response_type": "No", "comment": "Perimeter review overdue", "date": date(2024, 5, 1),
+        })
+        assert client.get("/search", params={"q": "firewall"}).json() == []
+        crud.delete_response(db, response.id)
+        assert client.get("/search", params={"q": "perimeter"}).json() == []
+    finally:
+        db.close()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Fast list serialization matches the response models; compression is negotiated
+"""
+import gzip
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+
+import crud
+import schemas
+import serialization
+from app import app
+from database import ReadSessionLocal
+
+
+@pytest.fixture
+def client(seeded_db):
+    return TestClient(app)
+
+
+def test_fast_payloads_match_response_models(client):
+    db = ReadSessionLocal()
+    try:
+        responses = TypeAdapter(list[schemas.Response]).dump_python(
+            [schemas.Response.model_validate(row, from_attributes=True) for row in crud.get_responses(db)], mode="json"
+        )
+        questions = [schemas.Question.model_validate(row).model_dump(mode="json") for row in crud.get_questions(db)]
+    finally:
+        db.close()
+    assert client.get("/responses").json() == responses
+    assert client.get("/questions").json() == questions
+
+    page = client.get("/questions", params={"limit": 1})
+    assert page.headers["ETag"] and page.headers["X-Next-Cursor"]
+    compared = client.get("/compare", params={"organization_ids": [1]}).json()
+    assert {row["response_type"] for row in compared} <= {"Yes", "No", "Not applicable"}
+    assert set(compared[0]) == {"organization_id", "clause_id", "question_id", "response_type", "comment", "date"}
+
+
+def test_compression_is_negotiated_above_threshold(seeded_db):
+    # The seeded lists are small: wrap the app with a lower threshold
+    client = TestClient(serialization.CompressionMiddleware(app, minimum_size=200))
+    plain = client.get("/responses", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    compressed = client.get("/responses", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.json() == plain.json()
+    assert "Accept-Encoding" in compressed.headers["vary"]
+
+    small = client.get("/organizations/1", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+    # Streamed exports are compressed chunk by chunk and still decode to the whole body
+    stream = client.stream("GET", "/compare", params={"format": "ndjson"}, headers={"Accept-Encoding": "gzip"})
+    with stream as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(raw).decode().count("\n") == len(client.get("/compare").json())
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("", None),
+    ("identity", None),
+    ("gzip, deflate", "gzip"),
+    ("gzip;q=0, deflate", None),
+    ("*", next(iter(serialization.ENCODERS))),
+    ("br;q=0.5, gzip;q=0.8", "gzip"),
+])
+def test_negotiate(header, expected):
+    assert serialization.negotiate(header) == expected
+
+
+def test_compressed_body_gets_its_own_etag(seeded_db):
+    client = TestClient(serialization.CompressionMiddleware(app, minimum_size=0))
+    plain = client.get("/questions", headers={"Accept-Encoding": "identity"})
+    compressed = client.get("/questions", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+    for tag in (compressed.headers["ETag"], plain.headers["ETag"]):
+        assert client.get("/questions", headers={"Accept-Encoding": "gzip", "If-None-Match": tag}).status_code == 304
+    assert serialization.encoded_etag('W/"weak"', "gzip") == 'W/"weak"'
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Organization similarity: vectorized scores match a direct count, cache follows writes
+"""
+import os
+import sys
+from datetime import date
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import crud
+import similarity
+from app import app
+from database import SessionLocal
+
+
+def test_compute_matches_pairwise_count():
+    latest = np.array([
+        [0, 1, 2, -1],
+        [0, 0, 2, 1],
+        [-1, -1, -1, -1],
+    ], dtype=np.int8)
+    scores, shared = similarity.compute(latest)
+    assert shared.tolist() == [[3, 3, 0], [3, 4, 0], [0, 0, 0]]
+    assert scores[0, 1] == pytest.approx(2 / 3)
+    assert scores[1, 1] == 1.0
+    assert np.isnan(scores[0, 2])
+
+
+def test_endpoints_and_invalidation(seeded_db):
+    client = TestClient(app)
+    full = client.get("/analytics/similarity").json()
+    size = len(full["organization_ids"])
+    assert len(full["similarity"]) == size and all(len(row) == size for row in full["similarity"])
+
+    nearest = client.get("/analytics/similarity", params={"organization_id": 1, "top_k": 2}).json()
+    assert 0 < len(nearest) <= 2
+    assert all(row["organization_id"] != 1 for row in nearest)
+    assert client.get("/analytics/similarity", params={"organization_id": 999}).status_code == 404
+
+    pairs = client.get("/analytics/similarity/pairs", params={"min_shared": 1, "limit": 3}).json()
+    assert [pair["similarity"] for pair in pairs] == sorted(pair["similarity"] for pair in pairs)
+
+    db = SessionLocal()
+    created = None
+    try:
+        before = similarity.similarity_matrix(db)
+        assert similarity.similarity_matrix(db) is before
+        created = crud.create_response(db, {
+            "organization_id": 1, "clause_id": 1, "question_id": 1, "response_type": "No", "date": date(2031, 1, 1),
+        })
+        assert similarity.similarity_matrix(db) is not before
+    finally:
+        # seeded_db is shared by the whole session: leave it as found
+        if created is not None:
+            crud.delete_response(db, created.id)
+        db.close()
@@ -0,0 +1,112 @@
+"""
+Per-table data versions for conditional GETs and in-process caches.
+
+Every crud write bumps its table's counter in the same transaction. Readers
+use a process-local copy that is re-read from the database at most every
+VERSION_CHECK_INTERVAL seconds (and right after this process commits a
+bump), so validating an ETag normally costs no query at all while writes
+from other workers are still picked up.
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Optional
+
+from fastapi import Request
+from fastapi import Response as HTTPResponse
+from sqlalchemy import event, insert, select, update
+from starlette.concurrency import run_in_threadpool
+
+import models
+import serialization
+
+# "response_edits" is bumped only by response updates and deletes, so caches
+# built from the append-only part of `responses` know when a reload is needed
+TRACKED_TABLES = ("organizations", "clauses", "questions", "responses", "response_edits")
+VERSION_CHECK_INTERVAL = float(os.getenv("VERSION_CHECK_INTERVAL", "1.0"))
+
+_versions = {}
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _expire(*args):
+    global _checked_at
+    with _lock:
+        _checked_at = 0.0
+
+
+def ensure_rows(connection):
+    """Create a version row for every tracked table that lacks one"""
+    table = models.TableVersion.__table__
+    existing = set(connection.execute(select(table.c.name)).scalars())
+    missing = [{"name": name, "version": 1} for name in TRACKED_TABLES if name not in existing]
+    if missing:
+        connection.execute(insert(table), missing)
+
+
+def bump_statement(*tables: str):
+    table = models.TableVersion.__table__
+    return update(table).where(table.c.name.in_(tables)).values(version=table.c.version + 1)
+
+
+def expire_after_commit(session):
+    """Re-read versions on the next check once `session` (a sync Session) commits"""
+    # Not once=True: a spent once-listener stays registered and would swallow
+    # the next listen() for the same session
+    if not event.contains(session, "after_commit", _expire):
+        event.listen(session, "after_commit", _expire)
+
+
+def bump(db, *tables: str):
+    """Increment `tables` inside the caller's transaction; takes effect on commit"""
+    db.execute(bump_statement(*tables))
+    expire_after_commit(db)
+
+
+def current() -> dict:
+    """{table: version}, served from memory while the last check is fresh"""
+    global _checked_at
+    with _lock:
+        if time.monotonic() - _checked_at < VERSION_CHECK_INTERVAL:
+            return _versions
+    from database import read_engine
+
+    with read_engine.connect() as connection:
+        table = models.TableVersion.__table__
+        rows = dict(connection.execute(select(table.c.name, table.c.version)).all())
+    with _lock:
+        _versions.clear()
+        _versions.update(rows)
+        _checked_at = time.monotonic()
+        return _versions
+
+
+async def current_async() -> dict:
+    """current() for async handlers: a due re-read runs in the threadpool, not on the event loop"""
+    with _lock:
+        if time.monotonic() - _checked_at < VERSION_CHECK_INTERVAL:
+            return _versions
+    return await run_in_threadpool(current)
+
+
+def token(versions: dict, *tables: str, variant: str = "") -> str:
+    """Short hash of the given versions of `tables` plus a variant"""
+    state = ";".join(f"{name}={versions.get(name, 0)}" for name in tables) + "|" + variant
+    return hashlib.sha1(state.encode()).hexdigest()[:20]
+
+
+def etag(*tables: str, variant: str = "") -> str:
+    """Strong ETag over the versions of `tables` plus a request variant (e.g. query string)"""
+    return '"' + token(current(), *tables, variant=variant) + '"'
+
+
+def not_modified(request: Request, http_response: HTTPResponse, *tables: str) -> Optional[HTTPResponse]:
+    """Set ETag on the response, or return a 304 if the client already has this version"""
+    tag = etag(*tables, variant=request.url.query)
+    headers = {"ETag": tag, "Cache-Control": "no-cache"}
+    if serialization.etag_matches(request.headers.get("if-none-match", ""), tag):
+        return HTTPResponse(status_code=304, headers=headers)
+    http_response.headers.update(headers)
+    return None
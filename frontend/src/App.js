@@ -16,7 +16,7 @@ import ExpandLess from '@mui/icons-material/ExpandLess';
 import ExpandMore from '@mui/icons-material/ExpandMore';
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts';
 import OrganizationsPage from './pages/OrganizationsPage';
-import { API_BASE } from './api';
+import { API_BASE, getBootstrap, getResponsesPage } from './api';
 import ComparisonAI from './pages/ComparisonAI';
 
 function Home() { return <Box p={3}><Typography variant="h4">Welcome to NCERT Survey</Typography><Typography sx={{mt:2}}>A modern survey management and analytics platform.</Typography></Box>; }
@@ -181,23 +181,40 @@ function Responses() {
   const [clauses, setClauses] = useState([]);
   const [questions, setQuestions] = useState([]);
   const [selectedOrg, setSelectedOrg] = useState('');
+  const [selectedClause, setSelectedClause] = useState('');
+  const [selectedType, setSelectedType] = useState('');
   const [responses, setResponses] = useState([]);
+  // Filters of the list on screen, so "Load more" continues it even if the selects change
+  const [shownFilters, setShownFilters] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
   const [editingId, setEditingId] = useState(null);
   const [editValue, setEditValue] = useState('');
   const [editingRemarksId, setEditingRemarksId] = useState(null);
   const [editRemarksValue, setEditRemarksValue] = useState('');
 
   useEffect(() => {
-    fetch(`${API_BASE}/organizations`).then(res => res.json()).then(setOrgs);
-    fetch(`${API_BASE}/clauses`).then(res => res.json()).then(setClauses);
-    fetch(`${API_BASE}/questions`).then(res => res.json()).then(setQuestions);
+    getBootstrap().then(data => {
+      setOrgs(data.organizations);
+      setClauses(data.clauses);
+      setQuestions(data.questions);
+    });
   }, []);
 
   const handleShow = () => {
     if (!selectedOrg) return;
-    fetch(`${API_BASE}/responses?organization_id=${selectedOrg}`)
-      .then(res => res.json())
-      .then(setResponses);
+    const filters = { organization_id: selectedOrg, clause_id: selectedClause, response_type: selectedType };
+    getResponsesPage(filters).then(page => {
+      setResponses(page.items);
+      setShownFilters(filters);
+      setNextCursor(page.nextCursor);
+    });
+  };
+
+  const handleLoadMore = () => {
+    getResponsesPage(shownFilters, nextCursor).then(page => {
+      setResponses(prev => [...prev, ...page.items]);
+      setNextCursor(page.nextCursor);
+    });
   };
 
   const handleEdit = (response) => {
@@ -424,6 +441,38 @@ function Responses() {
         ))}
       </TextField>
 
+      <TextField
+        label="Clause (optional)"
+        select
+        value={selectedClause}
+        onChange={e => setSelectedClause(e.target.value)}
+        fullWidth
+        sx={{ mt: 2 }}
+        SelectProps={{ native: true }}
+      >
+        <option value="">All clauses</option>
+        {clauses.map(clause => (
+          <option key={clause.id} value={clause.id}>
+            {clause.title || clause.name}
+          </option>
+        ))}
+      </TextField>
+
+      <TextField
+        label="Response (optional)"
+        select
+        value={selectedType}
+        onChange={e => setSelectedType(e.target.value)}
+        fullWidth
+        sx={{ mt: 2 }}
+        SelectProps={{ native: true }}
+      >
+        <option value="">All responses</option>
+        <option value="Yes">Yes</option>
+        <option value="No">No</option>
+        <option value="Not applicable">Not applicable</option>
+      </TextField>
+
       <Button
         variant="contained"
         sx={{ mt: 2 }}
@@ -457,6 +506,12 @@ function Responses() {
           </Table>
         </TableContainer>
       )}
+
+      {nextCursor && (
+        <Button variant="outlined" sx={{ mt: 2 }} onClick={handleLoadMore}>
+          Load more
+        </Button>
+      )}
     </Box>
   );
 }
@@ -474,9 +529,11 @@ function AddResponse() {
   const [success, setSuccess] = useState(false);
   
   useEffect(() => {
-    fetch(`${API_BASE}/organizations`).then(res => res.json()).then(setOrgs);
-    fetch(`${API_BASE}/clauses`).then(res => res.json()).then(setClauses);
-    fetch(`${API_BASE}/questions`).then(res => res.json()).then(setQuestions);
+    getBootstrap().then(data => {
+      setOrgs(data.organizations);
+      setClauses(data.clauses);
+      setQuestions(data.questions);
+    });
   }, []);
   
   const handleSubmit = e => {
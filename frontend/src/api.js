@@ -41,6 +41,15 @@ export const createClause = (clause) => fetchData('/clauses', {
 
 // Question API functions
 export const getQuestions = () => fetchData('/questions');
+
+// Organizations, clauses and questions in one round trip. The server groups
+// questions by clause; they are flattened back to the /questions shape here.
+export const getBootstrap = async () => {
+    const data = await fetchData('/bootstrap');
+    const questions = data.questions.flatMap(group =>
+        group.questions.map(question => ({ ...question, clause_id: group.clause_id })));
+    return { ...data, questions };
+};
 export const createQuestion = (question) => fetchData('/questions', {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
@@ -52,6 +61,23 @@ export const getResponses = (organizationId = null) => {
     const url = organizationId ? `/responses?organization_id=${organizationId}` : '/responses';
     return fetchData(url);
 };
+// Keyset-paginated responses; filters: organization_id, clause_id, question_id,
+// response_type, start_date, end_date. Pass nextCursor back to get the next page.
+export const getResponsesPage = async (filters = {}, cursor = null, limit = 100) => {
+    const params = new URLSearchParams();
+    Object.entries(filters).forEach(([key, value]) => {
+        if (value) params.set(key, value);
+    });
+    if (cursor) params.set('cursor', cursor);
+    params.set('limit', limit);
+
+    const response = await fetch(`${API_BASE}/responses?${params.toString()}`);
+    if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+    }
+    return { items: await response.json(), nextCursor: response.headers.get('X-Next-Cursor') };
+};
 export const createResponse = (response) => fetchData('/responses', {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
@@ -90,6 +116,91 @@ export const aiCompareSurveys = (org1_id, org2_id, clause_id, start_date, end_da
     return fetchData(`/ai/compare?${params.toString()}`);
 };
 
+// Background AI comparison jobs
+export const createAiCompareJob = (org1_id, org2_id, clause_id, start_date, end_date) => fetchData('/ai/compare/jobs', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({
+        org1_id: Number(org1_id),
+        org2_id: Number(org2_id),
+        clause_id: clause_id ? Number(clause_id) : null,
+        start_date: start_date || null,
+        end_date: end_date || null
+    })
+});
+export const getAiCompareJob = (id) => fetchData(`/ai/compare/jobs/${id}`);
+
+const pollAiCompareJob = async (id, onProgress, intervalMs = 1000) => {
+    for (;;) {
+        const job = await getAiCompareJob(id);
+        if (onProgress) onProgress(job);
+        if (job.status === 'done') return job.result;
+        if (job.status === 'failed') throw new Error(job.error || 'AI comparison failed');
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+};
+
+// Queue an AI comparison and resolve with its result. Progress arrives over
+// Server-Sent Events, falling back to polling if the stream cannot be opened.
+export const runAiCompareJob = async (org1_id, org2_id, clause_id, start_date, end_date, onProgress) => {
+    const job = await createAiCompareJob(org1_id, org2_id, clause_id, start_date, end_date);
+    if (onProgress) onProgress(job);
+    if (typeof EventSource === 'undefined') return pollAiCompareJob(job.id, onProgress);
+
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(`${API_BASE}/ai/compare/jobs/${job.id}/events`);
+        const update = (event) => {
+            const data = JSON.parse(event.data);
+            if (onProgress) onProgress(data);
+            return data;
+        };
+        source.addEventListener('progress', update);
+        source.addEventListener('done', (event) => {
+            source.close();
+            resolve(update(event).result);
+        });
+        source.addEventListener('failed', (event) => {
+            source.close();
+            reject(new Error(update(event).error || 'AI comparison failed'));
+        });
+        source.onerror = () => {
+            source.close();
+            pollAiCompareJob(job.id, onProgress).then(resolve, reject);
+        };
+    });
+};
+
+// Compare one organization with many peers. `onResult` gets each peer's
+// `{peer_id, status, result | error}` line as soon as that comparison
+// finishes; resolves with all of them.
+export const aiCompareBatch = async (anchor_id, peer_ids, clause_id, start_date, end_date, onResult) => {
+    const response = await fetch(`${API_BASE}/ai/compare/batch`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ anchor_id, peer_ids, clause_id, start_date, end_date }),
+    });
+    if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+    }
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    const results = [];
+    let buffered = '';
+    for (;;) {
+        const { value, done } = await reader.read();
+        buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        for (const line of lines.filter(Boolean)) {
+            const item = JSON.parse(line);
+            results.push(item);
+            if (onResult) onResult(item);
+        }
+        if (done) return results;
+    }
+};
+
 // Chart data API functions
 export const getYesNoChartData = () => fetchData('/chart-data/yes-no');
 
@@ -102,4 +213,84 @@ export const getYesNoComparisonChartData = (org1_id, org2_id, clause_id, start_d
     if (end_date) params.set('end_date', end_date);
     
     return fetchData(`/chart-data/yes-no-comparison?${params.toString()}`);
-};
\ No newline at end of file
+};
+
+export const getYesNoGroupComparisonChartData = (org_ids, clause_id, start_date, end_date) => {
+    const params = new URLSearchParams();
+    org_ids.forEach(id => params.append('org_ids', id));
+    if (clause_id) params.set('clause_id', clause_id);
+    if (start_date) params.set('start_date', start_date);
+    if (end_date) params.set('end_date', end_date);
+    
+    return fetchData(`/chart-data/yes-no-comparison?${params.toString()}`);
+};
+
+// Live Yes/No/Not applicable totals per organization and clause over Server-Sent
+// Events. `onChange` gets the full list of totals after the initial snapshot and
+// after every committed response write. Returns a function that closes the stream.
+export const subscribeToLiveCounts = (onChange) => {
+    const source = new EventSource(`${API_BASE}/live/counts`);
+    const key = row => `${row.organization_id}:${row.clause_id}`;
+    let counts = new Map();
+    const emit = () => onChange(Array.from(counts.values()));
+
+    // Sent on connect and after every reconnect, replacing whatever was accumulated
+    source.addEventListener('snapshot', event => {
+        counts = new Map(JSON.parse(event.data).counts.map(row => [key(row), row]));
+        emit();
+    });
+    source.addEventListener('delta', event => {
+        JSON.parse(event.data).deltas.forEach(delta => {
+            const row = counts.get(key(delta)) || { organization_id: delta.organization_id, clause_id: delta.clause_id, Yes: 0, No: 0, 'Not applicable': 0 };
+            counts.set(key(delta), {
+                ...row,
+                Yes: row.Yes + delta.Yes,
+                No: row.No + delta.No,
+                'Not applicable': row['Not applicable'] + delta['Not applicable'],
+            });
+        });
+        emit();
+    });
+    return () => source.close();
+};
+
+// Analytics API functions
+const filterParams = (clause_id, start_date, end_date) => {
+    const params = new URLSearchParams();
+    if (clause_id) params.set('clause_id', clause_id);
+    if (start_date) params.set('start_date', start_date);
+    if (end_date) params.set('end_date', end_date);
+    return params;
+};
+
+// The `top_k` organizations that answer most like `organization_id`
+export const getSimilarOrganizations = (organization_id, top_k = 5, clause_id, start_date, end_date) => {
+    const params = filterParams(clause_id, start_date, end_date);
+    params.set('organization_id', organization_id);
+    params.set('top_k', top_k);
+    return fetchData(`/analytics/similarity?${params.toString()}`);
+};
+
+// Organization pairs worth an AI comparison, least similar first
+export const getAiComparisonCandidates = (limit = 10, clause_id, start_date, end_date) => {
+    const params = filterParams(clause_id, start_date, end_date);
+    params.set('limit', limit);
+    return fetchData(`/analytics/similarity/pairs?${params.toString()}`);
+};
+
+// Full-text search over question titles/texts and response comments.
+// Resolves with { hits, nextCursor }; pass nextCursor back for the next page.
+export const searchText = async (q, { scope, organization_id, clause_id, start_date, end_date, cursor, limit } = {}) => {
+    const params = filterParams(clause_id, start_date, end_date);
+    params.set('q', q);
+    if (scope) params.set('scope', scope);
+    if (organization_id) params.set('organization_id', organization_id);
+    if (cursor) params.set('cursor', cursor);
+    if (limit) params.set('limit', limit);
+    const response = await fetch(`${API_BASE}/search?${params.toString()}`);
+    if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+    }
+    return { hits: await response.json(), nextCursor: response.headers.get('X-Next-Cursor') };
+};
@@ -24,12 +24,12 @@ import {
   ResponsiveContainer,
 } from 'recharts';
 import {
-  getOrganizations,
-  getClauses,
+  getBootstrap,
   compareSurveys,
-  aiCompareSurveys,
+  runAiCompareJob,
   getYesNoChartData,
   getYesNoComparisonChartData,
+  subscribeToLiveCounts,
 } from '../api';
 
 function ComparisonAI() {
@@ -43,6 +43,7 @@ function ComparisonAI() {
   const [aiResults, setAiResults] = useState(null);
   const [chartResults, setChartResults] = useState([]);
   const [loading, setLoading] = useState(false);
+  const [aiProgress, setAiProgress] = useState('');
   const [error, setError] = useState('');
   const [yesNoChartData, setYesNoChartData] = useState([]);
   const [showYesNoChart, setShowYesNoChart] = useState(false);
@@ -51,25 +52,38 @@ function ComparisonAI() {
   const [showComparisonChart, setShowComparisonChart] = useState(false);
 
   useEffect(() => {
-    fetchOrganizations();
-    fetchClauses();
+    fetchReferenceData();
   }, []);
 
-  const fetchOrganizations = async () => {
-    try {
-      const data = await getOrganizations();
-      setOrganizations(data);
-    } catch {
-      setError('Failed to fetch organizations');
-    }
-  };
+  // While the Yes/No chart is shown, keep it current from the live counts stream
+  useEffect(() => {
+    if (!showYesNoChart) return undefined;
+    return subscribeToLiveCounts(counts => {
+      const totals = new Map();
+      counts.forEach(row => {
+        const total = totals.get(row.organization_id) || { Yes: 0, No: 0, 'Not applicable': 0 };
+        total.Yes += row.Yes;
+        total.No += row.No;
+        total['Not applicable'] += row['Not applicable'];
+        totals.set(row.organization_id, total);
+      });
+      setYesNoChartData(organizations
+        .filter(org => totals.has(org.id))
+        .map(org => {
+          const total = totals.get(org.id);
+          return { name: org.name, ...total, Total: total.Yes + total.No + total['Not applicable'] };
+        })
+        .filter(row => row.Total > 0));
+    });
+  }, [showYesNoChart, organizations]);
 
-  const fetchClauses = async () => {
+  const fetchReferenceData = async () => {
     try {
-      const data = await getClauses();
-      setClauses(data);
+      const data = await getBootstrap();
+      setOrganizations(data.organizations);
+      setClauses(data.clauses);
     } catch {
-      setError('Failed to fetch clauses');
+      setError('Failed to fetch organizations and clauses');
     }
   };
 
@@ -90,7 +104,14 @@ function ComparisonAI() {
 
     try {
       console.log('Fetching comparison for:', { selectedOrg1, selectedOrg2, selectedClause, startDate, endDate });
-      const aiResponse = await aiCompareSurveys(selectedOrg1, selectedOrg2, selectedClause, startDate, endDate);
+      const aiResponse = await runAiCompareJob(
+        selectedOrg1,
+        selectedOrg2,
+        selectedClause,
+        startDate,
+        endDate,
+        (job) => setAiProgress(`${job.message || job.status} (${job.progress}%)`)
+      );
       setAiResults(aiResponse);
 
       const chartResponse = await compareSurveys(
@@ -115,6 +136,7 @@ function ComparisonAI() {
       setError(err.message || 'Failed to fetch comparison data.');
     } finally {
       setLoading(false);
+      setAiProgress('');
     }
   };
 
@@ -244,6 +266,11 @@ function ComparisonAI() {
             {chartLoading ? <CircularProgress size={20} /> : 'Generate Yes/No Chart'}
           </Button>
         </Box>
+        {loading && aiProgress && (
+          <Typography variant="body2" color="text.secondary" sx={{ mt: 1 }}>
+            {aiProgress}
+          </Typography>
+        )}
       </Card>
 
       {error && (